@@ -25,12 +25,17 @@ import click
 import discord_mod
 from discord_mod.ext import commands
 
+from jishaku_mod_.profiling import ImportProfiler
+
 LOG_FORMAT: logging.Formatter = logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s')
 LOG_STREAM: logging.Handler = logging.StreamHandler(stream=sys.stdout)
 LOG_STREAM.setFormatter(LOG_FORMAT)
 
 LOGGER = logging.getLogger('jishaku.__main__')
 
+# The number of slowest imports logged by --profile-imports
+PROFILE_IMPORT_COUNT = 40
+
 
 async def entry(bot: commands.Bot, *args: typing.Any, **kwargs: typing.Any):
     """
@@ -39,13 +44,29 @@ async def entry(bot: commands.Bot, *args: typing.Any, **kwargs: typing.Any):
 
     LOGGER.critical("Beginning async context")
     async with bot:
-        LOGGER.critical("Loading jishaku")
-        await bot.load_extension('jishaku')
+        profiler = ImportProfiler() if bot.profile_imports else None  # type: ignore
+
+        if profiler is not None:
+            profiler.start()
 
-        for extension in bot.extensions_to_load:  # type: ignore
-            extension: str
-            LOGGER.critical("Loading %s", extension)
-            await bot.load_extension(extension)
+        try:
+            LOGGER.critical("Loading jishaku")
+            await bot.load_extension('jishaku')
+
+            for extension in bot.extensions_to_load:  # type: ignore
+                extension: str
+                LOGGER.critical("Loading %s", extension)
+                await bot.load_extension(extension)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+
+        if profiler is not None:
+            LOGGER.critical(
+                'Slowest imports while loading extensions'
+                ' (modules imported before this point are not included, use `python -X importtime` for those):\n%s',
+                '\n'.join(profiler.format(PROFILE_IMPORT_COUNT))
+            )
 
         LOGGER.critical(
             'Generated a unique UUID for this session: %s'
@@ -89,13 +110,15 @@ async def entry(bot: commands.Bot, *args: typing.Any, **kwargs: typing.Any):
 @click.option('--log-file', '-l', default=None)
 @click.option('--load-extension', '-e', multiple=True)
 @click.option('--skip-wait', '-s', default=False, is_flag=True)
+@click.option('--profile-imports', '-p', default=False, is_flag=True)
 def entrypoint(
     intents: typing.Iterable[str],
     token: str,
     log_level: str,
     log_file: typing.Optional[str] = None,
     load_extension: typing.Iterable[str] = (),
-    skip_wait: bool = False
+    skip_wait: bool = False,
+    profile_imports: bool = False
 ):
     """
     Entrypoint accessible through `python -m jishaku <TOKEN>`
@@ -106,6 +129,8 @@ def entrypoint(
     Arguments are applied in order.
     You can also set log level and output to a file:
         -m jishaku --log-level INFO --log-file bot.log -- +all <TOKEN>
+    To see which imports make loading extensions slow:
+        -m jishaku --profile-imports -e cogs.music -- +all <TOKEN>
     """
 
     logger = logging.getLogger()
@@ -167,6 +192,7 @@ def entrypoint(
     bot.unique_id = str(uuid.uuid4())  # type: ignore
     bot.extensions_to_load = load_extension  # type: ignore
     bot.skip_wait = skip_wait  # type: ignore
+    bot.profile_imports = profile_imports  # type: ignore
 
     asyncio.run(entry(bot, token))
 
@@ -21,6 +21,7 @@ from jishaku_mod_.features.filesystem import FilesystemFeature
 from jishaku_mod_.features.guild import GuildFeature
 from jishaku_mod_.features.invocation import InvocationFeature
 from jishaku_mod_.features.management import ManagementFeature
+from jishaku_mod_.features.profiling import ProfilingFeature
 from jishaku_mod_.features.python import PythonFeature
 from jishaku_mod_.features.root_command import RootCommand
 from jishaku_mod_.features.shell import ShellFeature
@@ -34,7 +35,18 @@ __all__ = (
     "setup",
 )
 
-STANDARD_FEATURES = (VoiceFeature, GuildFeature, FilesystemFeature, InvocationFeature, ShellFeature, SQLFeature, PythonFeature, ManagementFeature, RootCommand)
+STANDARD_FEATURES = (
+    VoiceFeature,
+    GuildFeature,
+    FilesystemFeature,
+    InvocationFeature,
+    ShellFeature,
+    SQLFeature,
+    PythonFeature,
+    ProfilingFeature,
+    ManagementFeature,
+    RootCommand,
+)
 
 OPTIONAL_FEATURES: typing.List[typing.Type[Feature]] = []
 
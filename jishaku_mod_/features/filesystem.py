@@ -39,6 +39,7 @@ class FilesystemFeature(Feature):
         Read out a file, using syntax highlighting if detected.
 
         Lines and linespans are supported by adding '#L12' or '#L12-14' etc to the end of the filename.
+        Files larger than 128MB can only be read with a linespan.
         """
 
         match = self.__cat_line_regex.search(argument)
@@ -63,8 +64,9 @@ class FilesystemFeature(Feature):
             return await ctx.send(f"`{path}`: Cowardly refusing to read a file with no size stat"
                                   f" (it may be empty, endless or inaccessible).")
 
-        if size > 128 * (1024 ** 2):
-            return await ctx.send(f"`{path}`: Cowardly refusing to read a file >128MB.")
+        # Linespans are read through a memory mapping, so only whole files need to fit in memory
+        if size > 128 * (1024 ** 2) and not line_span:
+            return await ctx.send(f"`{path}`: Cowardly refusing to read a file >128MB without a linespan.")
 
         try:
             with open(path, "rb") as file:
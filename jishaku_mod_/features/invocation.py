@@ -11,6 +11,8 @@ The jishaku command invocation related commands.
 
 """
 
+import asyncio
+import collections
 import contextlib
 import inspect
 import io
@@ -24,8 +26,10 @@ from discord_mod.ext import commands
 
 from jishaku_mod_.exception_handling import ReplResponseReactor
 from jishaku_mod_.features.baseclass import Feature
-from jishaku_mod_.models import copy_context_with
+from jishaku_mod_.math import format_percentiles, natural_time
+from jishaku_mod_.models import clone_context, copy_context_with
 from jishaku_mod_.paginators import PaginatorInterface, WrappedPaginator, use_file_check
+from jishaku_mod_.profiling import InvocationProfile
 from jishaku_mod_.types import ContextA, ContextT
 
 UserIDConverter = commands.IDConverter[typing.Union[discord_mod.Member, discord_mod.User]]
@@ -88,6 +92,13 @@ class InvocationFeature(Feature):
 
     OVERRIDE_SIGNATURE = typing.Union[SlimUserConverter, SlimChannelConverter]
 
+    # The option that makes jsk repeat run invocations concurrently, and how many it can run at once
+    REPEAT_CONCURRENCY_REGEX = re.compile(r'--concurrency[ =](\d+)\s+')
+    MAX_REPEAT_CONCURRENCY = 100
+
+    # The option that makes jsk debug profile the invocation
+    DEBUG_PROFILE_REGEX = re.compile(r'--profile\s+')
+
     @Feature.Command(parent="jsk", name="override", aliases=["execute", "exec", "override!", "execute!", "exec!"])
     async def jsk_override(self, ctx: ContextT, overrides: commands.Greedy[OVERRIDE_SIGNATURE], *, command_string: str):
         """
@@ -146,8 +157,16 @@ class InvocationFeature(Feature):
 
         This acts like the command was invoked several times manually, so it obeys cooldowns.
         You can use this in conjunction with `jsk sudo` to bypass this.
+
+        Starting the command with `--concurrency N` runs up to N invocations at a time,
+        and reports the throughput and latency of the invocations once they have all finished.
         """
 
+        match = self.REPEAT_CONCURRENCY_REGEX.match(command_string)
+
+        if match:
+            return await self.jsk_repeat_concurrent(ctx, times, int(match.group(1)), command_string[match.end():])
+
         with self.submit(ctx):  # allow repeats to be cancelled
             for _ in range(times):
                 if ctx.prefix:
@@ -161,12 +180,77 @@ class InvocationFeature(Feature):
 
                 await alt_ctx.command.reinvoke(alt_ctx)
 
+    async def jsk_repeat_concurrent(self, ctx: ContextT, times: int, concurrency: int, command_string: str):
+        """
+        Runs a command multiple times, up to `concurrency` at a time, reporting throughput and latency.
+
+        The context is only built once, and each invocation gets a clone of it.
+        """
+
+        if not 1 <= concurrency <= self.MAX_REPEAT_CONCURRENCY:
+            raise commands.BadArgument(f"Concurrency must be between 1 and {self.MAX_REPEAT_CONCURRENCY}.")
+
+        if not ctx.prefix:
+            return await ctx.send("Reparsing requires a prefix")
+
+        alt_ctx = await copy_context_with(ctx, content=ctx.prefix + command_string)
+
+        if alt_ctx.command is None:
+            return await ctx.send(f'Command "{alt_ctx.invoked_with}" is not found')
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies: typing.List[float] = []
+        failures: typing.Counter[str] = collections.Counter()
+
+        async def invoke():
+            async with semaphore:
+                invocation_ctx = clone_context(alt_ctx)
+                start = time.perf_counter()
+
+                try:
+                    await invocation_ctx.command.reinvoke(invocation_ctx)  # type: ignore
+                except Exception as error:  # pylint: disable=broad-except
+                    failures[type(error).__name__] += 1
+                finally:
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+
+        with self.submit(ctx):  # allow repeats to be cancelled
+            await asyncio.gather(*(invoke() for _ in range(times)))
+
+        duration = time.perf_counter() - start
+
+        if not latencies:
+            return
+
+        summary = [
+            f"Ran {len(latencies)} invocations, {concurrency} at a time, in {natural_time(duration).strip()} "
+            f"({len(latencies) / duration:,.2f}/s).",
+            f"Latency: {format_percentiles(latencies)}",
+        ]
+
+        if failures:
+            summary.append(
+                f"{sum(failures.values())} failed: " + ", ".join(f"{name} \N{MULTIPLICATION SIGN}{count}" for name, count in failures.most_common())
+            )
+
+        await ctx.send("\n".join(summary))
+
     @Feature.Command(parent="jsk", name="debug", aliases=["dbg"])
     async def jsk_debug(self, ctx: ContextT, *, command_string: str):
         """
         Run a command timing execution and catching exceptions.
+
+        Starting the command with `--profile` also records a cProfile of the invocation,
+        the HTTP requests it made, and the time spent in its checks and converters.
         """
 
+        match = self.DEBUG_PROFILE_REGEX.match(command_string)
+
+        if match:
+            command_string = command_string[match.end():]
+
         if ctx.prefix:
             alt_ctx = await copy_context_with(ctx, content=ctx.prefix + command_string)
         else:
@@ -176,6 +260,9 @@ class InvocationFeature(Feature):
         if alt_ctx.command is None:
             return await ctx.send(f'Command "{alt_ctx.invoked_with}" is not found')
 
+        if match:
+            return await self.jsk_debug_profile(ctx, alt_ctx)
+
         start = time.perf_counter()
 
         async with ReplResponseReactor(ctx.message):
@@ -185,6 +272,45 @@ class InvocationFeature(Feature):
         end = time.perf_counter()
         return await ctx.send(f"Command `{alt_ctx.command.qualified_name}` finished in {end - start:.3f}s.")
 
+    async def jsk_debug_profile(self, ctx: ContextT, alt_ctx: ContextT):
+        """
+        Invokes a command under an InvocationProfile, reporting where its time went.
+        """
+
+        profile = InvocationProfile()
+
+        async with ReplResponseReactor(ctx.message):
+            with self.submit(ctx):
+                with profile.activate(
+                    http=ctx.bot.http,
+                    command=alt_ctx.command,
+                    ratelimit_class=getattr(discord_mod.http, 'Ratelimit', None),
+                ):
+                    await alt_ctx.command.invoke(alt_ctx)  # type: ignore
+
+        paginator = WrappedPaginator(prefix='```prolog', max_size=1980)
+
+        for line in [f"Command `{alt_ctx.command.qualified_name}` profile:", *profile.summary()]:  # type: ignore
+            paginator.add_line(line)
+
+        stats = profile.stats()
+
+        if stats is not None:
+            paginator.add_line()
+
+            for line in stats.strip().split('\n'):
+                paginator.add_line(line)
+        else:
+            paginator.add_line("cProfile was unavailable, as another profiler is active.")
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        await interface.send_to(ctx)
+
+        dump = profile.dump()
+
+        if dump is not None:
+            await ctx.send(file=discord_mod.File(filename="debug.prof", fp=io.BytesIO(dump)))
+
     @Feature.Command(parent="jsk", name="source", aliases=["src"])
     async def jsk_source(self, ctx: ContextA, *, command_name: str):
         """
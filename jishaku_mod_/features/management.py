@@ -11,7 +11,11 @@ The jishaku extension and bot control commands.
 
 """
 
+import asyncio
+import contextlib
+import hashlib
 import itertools
+import json
 import re
 import time
 import traceback
@@ -21,61 +25,267 @@ from urllib.parse import urlencode
 import discord_mod
 from discord_mod.ext import commands
 
+from jishaku_mod_.exception_handling import ReplResponseReactor
 from jishaku_mod_.features.baseclass import Feature
 from jishaku_mod_.flags import Flags
-from jishaku_mod_.math import mean_stddev
-from jishaku_mod_.modules import ExtensionConverter
+from jishaku_mod_.math import format_bargraph, format_percentiles, mean_stddev, natural_time
+from jishaku_mod_.modules import ExtensionConverter, ExtensionPreloader
+from jishaku_mod_.paginators import PaginatorInterface, WrappedPaginator
+from jishaku_mod_.profiling import HeartbeatMonitor, ImportProfiler, InvocationProfile, RequestTrace, RequestTracer
 from jishaku_mod_.repl import inspections
 from jishaku_mod_.types import ContextA
 
 
+# Fields Discord adds to application commands it returns, which are never part of a payload we send
+REMOTE_ONLY_FIELDS = frozenset({'id', 'application_id', 'version', 'guild_id', 'name_localized', 'description_localized'})
+
+
+def normalize_command_payload(payload: typing.Any, reference: typing.Any = None) -> typing.Any:
+    """
+    Normalizes an application command payload so local and remote versions of the same command compare equal.
+
+    Discord omits or fills in fields that are empty or left at their defaults, so empty values are dropped.
+    If `reference` is given (the local payload), top level fields it doesn't set are dropped too, as Discord fills those in.
+    """
+
+    if isinstance(payload, dict):
+        return {
+            key: normalize_command_payload(value)
+            for key, value in payload.items()  # type: ignore
+            if key not in REMOTE_ONLY_FIELDS
+            and (reference is None or key in reference)
+            and not (value is None or value is False or value == [] or value == {})
+        }
+
+    if isinstance(payload, list):
+        return [normalize_command_payload(value) for value in payload]  # type: ignore
+
+    return payload
+
+
+def command_key(payload: typing.Dict[str, typing.Any]) -> typing.Tuple[int, str]:
+    """
+    Returns what identifies an application command: its type (defaulting to chat input) and its name.
+    """
+
+    return payload.get('type') or 1, payload['name']
+
+
+def hash_command_payload(payload: typing.Any) -> str:
+    """
+    Returns a stable hash of a normalized application command payload.
+    """
+
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+class CommandDiff(typing.NamedTuple):
+    """
+    The difference between the local and remote application commands of a sync target, by command name.
+    """
+
+    added: typing.List[str]
+    removed: typing.List[str]
+    changed: typing.List[str]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+def diff_command_payloads(
+    local: typing.List[typing.Dict[str, typing.Any]],
+    remote: typing.List[typing.Dict[str, typing.Any]]
+) -> CommandDiff:
+    """
+    Compares locally generated application command payloads against those Discord currently has.
+    """
+
+    local_hashes = {command_key(command): hash_command_payload(normalize_command_payload(command)) for command in local}
+    remote_by_key = {command_key(command): command for command in remote}
+    local_by_key = {command_key(command): command for command in local}
+
+    remote_hashes = {
+        key: hash_command_payload(normalize_command_payload(command, reference=local_by_key.get(key)))
+        for key, command in remote_by_key.items()
+    }
+
+    return CommandDiff(
+        added=sorted(key[1] for key in local_hashes.keys() - remote_hashes.keys()),
+        removed=sorted(key[1] for key in remote_hashes.keys() - local_hashes.keys()),
+        changed=sorted(key[1] for key, digest in local_hashes.items() if key in remote_hashes and remote_hashes[key] != digest),
+    )
+
+
 class ManagementFeature(Feature):
     """
     Feature containing the extension and bot control commands
     """
 
+    # Options that can be given to jsk load before or among the extension names
+    LOAD_OPTIONS = ('--parallel', '--profile')
+    # The number of slowest imports shown by jsk load --profile
+    PROFILE_IMPORT_COUNT = 40
+    # Limits on the samples and warmup samples taken per route by jsk rtt benchmark
+    MAX_RTT_SAMPLES = 100
+    MAX_RTT_WARMUP = 20
+    # Upper bounds in seconds of the jsk rtt benchmark histogram buckets, with a final bucket catching anything longer
+    RTT_BUCKETS: typing.Tuple[float, ...] = tuple(2 ** power / 1000 for power in range(4, 12))
+
+    def __init__(self, *args: typing.Any, **kwargs: typing.Any):
+        super().__init__(*args, **kwargs)
+        self.heartbeat_monitor = HeartbeatMonitor(self.jsk_latencies)
+
+    def cog_unload(self):  # type: ignore
+        """
+        Stops the heartbeat monitor so it doesn't outlive the cog.
+        """
+
+        self.heartbeat_monitor.stop()
+        return super().cog_unload()
+
+    def jsk_latencies(self) -> typing.List[typing.Tuple[typing.Optional[int], float]]:
+        """
+        Returns the current heartbeat latency of each shard, or of the single connection if the bot isn't sharded.
+        """
+
+        latencies = getattr(self.bot, 'latencies', None)
+
+        if latencies:
+            return list(latencies)
+
+        return [(None, self.bot.latency)]
+
+    async def jsk_load_extension(self, extension: str, import_time: typing.Optional[float] = None) -> str:
+        """
+        Loads or reloads a single extension, returning a line reporting how it went.
+
+        If `import_time` is given, the time taken to import and set up the extension is included.
+        """
+
+        method, icon = (
+            (self.bot.reload_extension, "\N{CLOCKWISE RIGHTWARDS AND LEFTWARDS OPEN CIRCLE ARROWS}")
+            if extension in self.bot.extensions else
+            (self.bot.load_extension, "\N{INBOX TRAY}")
+        )
+
+        start = time.perf_counter()
+
+        try:
+            await discord_mod.utils.maybe_coroutine(method, extension)
+        except Exception as exc:  # pylint: disable=broad-except
+            if isinstance(exc, commands.ExtensionFailed) and exc.__cause__:
+                cause = exc.__cause__
+                traceback_data = ''.join(traceback.format_exception(type(cause), cause, cause.__traceback__, 8))
+            else:
+                traceback_data = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__, 2))
+
+            return f"{icon}\N{WARNING SIGN} `{extension}`\n```py\n{traceback_data}\n```"
+
+        if import_time is None:
+            return f"{icon} `{extension}`"
+
+        return (
+            f"{icon} `{extension}` (import {natural_time(import_time).strip()}, "
+            f"setup {natural_time(time.perf_counter() - start).strip()})"
+        )
+
     @Feature.Command(parent="jsk", name="load", aliases=["reload"])
     async def jsk_load(self, ctx: ContextA, *extensions: ExtensionConverter):  # type: ignore
         """
         Loads or reloads the given extension names.
 
         Reports any extensions that failed to load.
+
+        With --parallel, the extensions are imported at the same time on a thread pool,
+        then set up in order of the imports between them.
+
+        With --profile, the time taken to import each module while loading is recorded, and the slowest imports are shown.
         """
 
         extensions: typing.Iterable[typing.List[str]] = extensions  # type: ignore
 
+        names: typing.List[str] = []
+        options: typing.Set[str] = set()
+
+        for name in itertools.chain(*extensions):
+            if not name.startswith('--'):
+                names.append(name)
+            elif name in self.LOAD_OPTIONS:
+                options.add(name)
+            else:
+                raise commands.BadArgument(f"Unknown option {name}, expected one of: {', '.join(self.LOAD_OPTIONS)}")
+
         paginator = commands.Paginator(prefix='', suffix='')
 
         # 'jsk reload' on its own just reloads jishaku
-        if ctx.invoked_with == 'reload' and not extensions:
-            extensions = [['jishaku']]
+        if ctx.invoked_with == 'reload' and not names:
+            names = ['jishaku']
 
-        for extension in itertools.chain(*extensions):
-            method, icon = (
-                (self.bot.reload_extension, "\N{CLOCKWISE RIGHTWARDS AND LEFTWARDS OPEN CIRCLE ARROWS}")
-                if extension in self.bot.extensions else
-                (self.bot.load_extension, "\N{INBOX TRAY}")
-            )
+        profiler = ImportProfiler() if '--profile' in options else None
 
-            try:
-                await discord_mod.utils.maybe_coroutine(method, extension)
-            except Exception as exc:  # pylint: disable=broad-except
-                if isinstance(exc, commands.ExtensionFailed) and exc.__cause__:
-                    cause = exc.__cause__
-                    traceback_data = ''.join(traceback.format_exception(type(cause), cause, cause.__traceback__, 8))
-                else:
-                    traceback_data = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__, 2))
+        if profiler is not None:
+            profiler.start()
 
-                paginator.add_line(
-                    f"{icon}\N{WARNING SIGN} `{extension}`\n```py\n{traceback_data}\n```",
-                    empty=True
-                )
-            else:
-                paginator.add_line(f"{icon} `{extension}`", empty=True)
+        try:
+            await self.jsk_load_all(names, paginator, parallel='--parallel' in options, profiler=profiler)
+        finally:
+            if profiler is not None:
+                profiler.stop()
 
         for page in paginator.pages:
             await ctx.send(page)
 
+        if profiler is not None:
+            if not profiler.timings:
+                return await ctx.send("No modules were imported.")
+
+            profile_paginator = WrappedPaginator(prefix='```prolog', max_size=1980)
+
+            for line in profiler.format(self.PROFILE_IMPORT_COUNT):
+                profile_paginator.add_line(line)
+
+            interface = PaginatorInterface(ctx.bot, profile_paginator, owner=ctx.author)
+            await interface.send_to(ctx)
+
+    async def jsk_load_all(
+        self,
+        names: typing.List[str],
+        paginator: commands.Paginator,
+        parallel: bool = False,
+        profiler: typing.Optional[ImportProfiler] = None
+    ):
+        """
+        Loads or reloads a list of extensions, adding a line for each to the paginator.
+        """
+
+        if parallel:
+            start = time.perf_counter()
+            preloader = ExtensionPreloader(names)
+            await preloader.prepare_all()
+
+            results: typing.Dict[str, str] = {}
+
+            with preloader:
+                # The profiler has to see modules before the preloader does to time them
+                if profiler is not None:
+                    profiler.start()
+
+                for wave in preloader.waves():
+                    lines = await asyncio.gather(*(
+                        self.jsk_load_extension(name, preloader.prepared[name].duration) for name in wave
+                    ))
+                    results.update(zip(wave, lines))
+
+            for name in preloader.names:
+                paginator.add_line(results[name], empty=True)
+
+            paginator.add_line(
+                f"Loaded {len(preloader.names)} extensions in {natural_time(time.perf_counter() - start).strip()}"
+            )
+        else:
+            for extension in names:
+                paginator.add_line(await self.jsk_load_extension(extension), empty=True)
+
     @Feature.Command(parent="jsk", name="unload")
     async def jsk_unload(self, ctx: ContextA, *extensions: ExtensionConverter):  # type: ignore
         """
@@ -145,10 +355,12 @@ class ManagementFeature(Feature):
             f"Link to invite this bot:\n<https://discordapp.com/oauth2/authorize?{urlencode(query, safe='+')}>"
         )
 
-    @Feature.Command(parent="jsk", name="rtt", aliases=["ping"])
+    @Feature.Command(parent="jsk", name="rtt", aliases=["ping"], invoke_without_command=True)
     async def jsk_rtt(self, ctx: ContextA):
         """
         Calculates Round-Trip Time to the API.
+
+        Use `jsk rtt benchmark` for a more thorough measurement.
         """
 
         message = None
@@ -197,12 +409,317 @@ class ManagementFeature(Feature):
             if self.bot.latency > 0.0:
                 websocket_readings.append(self.bot.latency)
 
+    def jsk_rtt_histogram(self, readings: typing.Sequence[float]) -> typing.List[str]:
+        """
+        Draws a histogram of readings into power-of-two millisecond buckets.
+        """
+
+        counts = [0] * (len(self.RTT_BUCKETS) + 1)
+
+        for reading in readings:
+            counts[next((index for index, bound in enumerate(self.RTT_BUCKETS) if reading < bound), -1)] += 1
+
+        # Trim empty buckets from either end so the histogram only covers the readings
+        first = next(index for index, count in enumerate(counts) if count)
+        last = len(counts) - next(index for index, count in enumerate(reversed(counts)) if count)
+
+        largest = max(counts)
+        lines: typing.List[str] = []
+
+        for index in range(first, last):
+            lower = self.RTT_BUCKETS[index - 1] if index else 0.0
+            bound = self.RTT_BUCKETS[index] if index < len(self.RTT_BUCKETS) else None
+
+            label = f"{natural_time(lower)} - {natural_time(bound)}" if bound is not None else f"{natural_time(lower)} +        "
+            lines.append(f"  {label} {format_bargraph(counts[index] / largest, 10)} {counts[index]}")
+
+        return lines
+
+    @Feature.Command(parent="jsk_rtt", name="benchmark", aliases=["bench"])
+    async def jsk_rtt_benchmark(self, ctx: ContextA, samples: int = 10, warmup: int = 2):
+        """
+        Benchmarks several API routes, reporting percentiles and histograms of their round-trip times.
+
+        Each route is requested `warmup` times before `samples` readings are taken, so connection setup and cold caches
+        don't skew the results. Readings are split into time waiting on ratelimits and time on the wire, and
+        new connections are split into DNS resolution and connection setup (including TLS).
+
+        Gateway heartbeat latency is also tracked per shard while the cog is loaded, starting from the first benchmark.
+        """
+
+        if not 1 <= samples <= self.MAX_RTT_SAMPLES:
+            raise commands.BadArgument(f"Samples must be between 1 and {self.MAX_RTT_SAMPLES}.")
+
+        if not 0 <= warmup <= self.MAX_RTT_WARMUP:
+            raise commands.BadArgument(f"Warmup must be between 0 and {self.MAX_RTT_WARMUP}.")
+
+        self.heartbeat_monitor.start()
+        self.heartbeat_monitor.sample()
+
+        message = await ctx.send("Benchmarking round-trip time...")
+
+        routes: typing.Dict[str, typing.Callable[[], typing.Awaitable[typing.Any]]] = {
+            "GET message": lambda: ctx.channel.fetch_message(message.id),
+            "PATCH message": lambda: message.edit(content="Benchmarking round-trip time..."),
+            "POST typing": lambda: ctx.channel.typing(),  # pylint: disable=unnecessary-lambda
+        }
+
+        totals: typing.Dict[str, typing.List[float]] = {route: [] for route in routes}
+        wires: typing.Dict[str, typing.List[float]] = {route: [] for route in routes}
+        waits: typing.Dict[str, float] = {route: 0.0 for route in routes}
+        traces: typing.List[RequestTrace] = []
+
+        profile = InvocationProfile()
+        tracer = RequestTracer()
+        # The session is private to the HTTP client, so connection tracing is only done if it can be found
+        session = getattr(self.bot.http, '_HTTPClient__session', None)
+
+        async with ReplResponseReactor(ctx.message):
+            with self.submit(ctx):
+                with contextlib.ExitStack() as stack:
+                    stack.enter_context(profile.activate(
+                        http=self.bot.http,
+                        ratelimit_class=getattr(discord_mod.http, 'Ratelimit', None),
+                        use_cprofile=False
+                    ))
+
+                    if session is not None and hasattr(session, 'trace_configs'):
+                        stack.enter_context(tracer.attach(session))
+                    else:
+                        session = None
+
+                    for iteration in range(warmup + samples):
+                        for route, request in routes.items():
+                            requests_before, traces_before = len(profile.requests), len(tracer.traces)
+
+                            start = time.perf_counter()
+                            await request()
+                            end = time.perf_counter()
+
+                            if iteration < warmup:
+                                continue
+
+                            totals[route].append(end - start)
+                            wires[route].append(sum(timing.wire for timing in profile.requests[requests_before:]))
+                            waits[route] += sum(timing.waiting for timing in profile.requests[requests_before:])
+                            traces.extend(tracer.traces[traces_before:])
+
+        paginator = WrappedPaginator(prefix='```prolog', max_size=1980)
+        paginator.add_line(f"{samples} samples per route after {warmup} warmup samples")
+
+        for route in routes:
+            paginator.add_line()
+            paginator.add_line(f"{route}:")
+            paginator.add_line(f"  Total: {format_percentiles(totals[route])}")
+            paginator.add_line(f"  Wire:  {format_percentiles(wires[route])}")
+            paginator.add_line(f"  Ratelimit waits: {natural_time(waits[route]).strip()} in total")
+
+            for line in self.jsk_rtt_histogram(totals[route]):
+                paginator.add_line(line)
+
+        paginator.add_line()
+
+        if session is None:
+            paginator.add_line("Connection breakdown unavailable, as the HTTP session could not be found.")
+        elif traces:
+            reused = sum(trace.reused for trace in traces)
+            paginator.add_line(f"Connections: {reused} of {len(traces)} requests reused a connection")
+
+            for label, readings in (
+                ("DNS", [trace.dns for trace in traces if trace.dns is not None]),
+                ("Connect", [trace.connect for trace in traces if trace.connect is not None]),
+                ("Request", [trace.request for trace in traces]),
+            ):
+                if readings:
+                    paginator.add_line(f"  {label}: {format_percentiles(readings)}")
+
+        paginator.add_line()
+
+        if self.heartbeat_monitor.history:
+            paginator.add_line("Heartbeat latency:")
+
+            for shard_id, history in sorted(self.heartbeat_monitor.history.items(), key=lambda item: item[0] or 0):
+                latencies = [latency for _, latency in history]
+                since = natural_time(time.time() - history[0][0]).strip()
+
+                paginator.add_line(
+                    f"  {'Gateway' if shard_id is None else f'Shard {shard_id}'}: {latencies[-1] * 1000:.2f}ms now, "
+                    f"{format_percentiles(latencies)} over {len(latencies)} heartbeats in {since}"
+                )
+        else:
+            paginator.add_line("No heartbeats have been acknowledged yet.")
+
+        await message.delete()
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        await interface.send_to(ctx)
+
     SLASH_COMMAND_ERROR = re.compile(r"In ((?:\d+\.[a-z]+\.?)+)")
 
+    # Options that can be given to jsk sync among the targets
+    SYNC_OPTIONS = ('--dry-run', '--force')
+    # How many sync targets are compared and upserted at once
+    SYNC_CONCURRENCY = 4
+
+    async def jsk_sync_payload(self, guild: typing.Optional[int]) -> typing.Tuple[typing.List[typing.Any], typing.List[typing.Dict[str, typing.Any]]]:
+        """
+        Builds the application command payload for a sync target, returning the commands it was built from as well.
+        """
+
+        slash_commands = self.bot.tree._get_all_commands(  # type: ignore  # pylint: disable=protected-access
+            guild=discord_mod.Object(guild) if guild else None
+        )
+        translator = getattr(self.bot.tree, 'translator', None)
+        needs_dpy_2_4_signature_changes = discord_mod.version_info.major >= 2 and discord_mod.version_info.minor >= 4
+
+        if needs_dpy_2_4_signature_changes:
+            if translator:
+                payload = [await command.get_translated_payload(self.bot.tree, translator) for command in slash_commands]
+            else:
+                payload = [command.to_dict(self.bot.tree) for command in slash_commands]
+        else:
+            if translator:
+                payload = [await command.get_translated_payload(translator) for command in slash_commands]
+            else:
+                payload = [command.to_dict() for command in slash_commands]
+
+        return slash_commands, payload  # type: ignore
+
+    def jsk_sync_diagnose(self, error: discord_mod.HTTPException, slash_commands: typing.List[typing.Any]) -> str:
+        """
+        Annotates a failed sync with the commands that likely caused it.
+        """
+
+        error_lines: typing.List[str] = []
+        for line in str(error).split("\n"):
+            error_lines.append(line)
+
+            try:
+                match = self.SLASH_COMMAND_ERROR.match(line)
+                if not match:
+                    continue
+
+                pool = slash_commands
+                selected_command = None
+                name = ""
+                parts = match.group(1).split('.')
+                assert len(parts) % 2 == 0
+
+                for part_index in range(0, len(parts), 2):
+                    index = int(parts[part_index])
+                    # prop = parts[part_index + 1]
+
+                    if pool:
+                        # If the pool exists, this should be a subcommand
+                        selected_command = pool[index]  # type: ignore
+                        name += selected_command.name + " "
+
+                        if hasattr(selected_command, '_children'):  # type: ignore
+                            pool = list(selected_command._children.values())  # type: ignore  # pylint: disable=protected-access
+                        else:
+                            pool = None
+                    else:
+                        # Otherwise, the pool has been exhausted, and this likely is referring to a parameter
+                        param = list(selected_command._params.keys())[index]  # type: ignore  # pylint: disable=protected-access
+                        name += f"(parameter: {param}) "
+
+                if selected_command:
+                    to_inspect: typing.Any = None
+
+                    if hasattr(selected_command, 'callback'):  # type: ignore
+                        to_inspect = selected_command.callback  # type: ignore
+                    elif isinstance(selected_command, commands.Cog):
+                        to_inspect = type(selected_command)
+
+                    try:
+                        error_lines.append(''.join([
+                            "\N{MAGNET} This is likely caused by: `",
+                            name,
+                            "` at ",
+                            str(inspections.file_loc_inspection(to_inspect)),  # type: ignore
+                            ":",
+                            str(inspections.line_span_inspection(to_inspect)),  # type: ignore
+                        ]))
+                    except Exception:  # pylint: disable=broad-except
+                        error_lines.append(f"\N{MAGNET} This is likely caused by: `{name}`")
+
+            except Exception as diag_error:  # pylint: disable=broad-except
+                error_lines.append(f"\N{MAGNET} Couldn't determine cause: {type(diag_error).__name__}: {diag_error}")
+
+        return '\n'.join(error_lines)
+
+    async def jsk_sync_target(
+        self,
+        ctx: ContextA,
+        guild: typing.Optional[int],
+        options: typing.Set[str],
+        semaphore: asyncio.Semaphore
+    ) -> str:
+        """
+        Syncs a single global or guild target, returning a line reporting how it went.
+
+        The remote commands are fetched first, and the upsert is skipped if they already match the local ones.
+        """
+
+        slash_commands, payload = await self.jsk_sync_payload(guild)
+        label = f"`{guild}`" if guild else "Global"
+        kind = "guild" if guild else "global"
+        diff: typing.Optional[CommandDiff] = None
+
+        async with semaphore:
+            try:
+                if '--force' not in options:
+                    if guild is None:
+                        remote = await self.bot.http.get_global_commands(self.bot.application_id)  # type: ignore
+                    else:
+                        remote = await self.bot.http.get_guild_commands(self.bot.application_id, guild)  # type: ignore
+
+                    diff = diff_command_payloads(payload, remote)  # type: ignore
+
+                    if not diff:
+                        return f"\N{WHITE HEAVY CHECK MARK} {label}: {len(payload)} {kind} commands are already up to date"
+
+                if '--dry-run' in options:
+                    if diff is None:
+                        return f"\N{MEMO} {label}: Would sync {len(payload)} {kind} commands"
+
+                    return "\n".join([
+                        f"\N{MEMO} {label}: Would sync {len(payload)} {kind} commands",
+                        *(f"{prefix} {', '.join(names)}" for prefix, names in zip(("+", "-", "~"), diff) if names),
+                    ])
+
+                if guild is None:
+                    data = await self.bot.http.bulk_upsert_global_commands(self.bot.application_id, payload=payload)  # type: ignore
+                else:
+                    data = await self.bot.http.bulk_upsert_guild_commands(self.bot.application_id, guild, payload=payload)  # type: ignore
+
+                synced = [
+                    discord_mod.app_commands.AppCommand(data=d, state=ctx._state)  # type: ignore  # pylint: disable=protected-access,no-member
+                    for d in data
+                ]
+
+            except discord_mod.HTTPException as error:
+                return f"\N{WARNING SIGN} {label}: {self.jsk_sync_diagnose(error, slash_commands)}"
+
+        if guild:
+            line = f"\N{SATELLITE ANTENNA} `{guild}` Synced {len(synced)} guild commands"
+        else:
+            line = f"\N{SATELLITE ANTENNA} Synced {len(synced)} global commands"
+
+        if diff is not None:
+            line += " (" + ", ".join(
+                f"{count} {verb}" for count, verb in zip(map(len, diff), ("added", "removed", "changed")) if count
+            ) + ")"
+
+        return line
+
     @Feature.Command(parent="jsk", name="sync")
     async def jsk_sync(self, ctx: ContextA, *targets: str):
         """
         Sync global or guild application commands to Discord.
+
+        Targets whose commands already match what Discord has are skipped, and the rest are synced concurrently.
+        Pass `--dry-run` to only report what would change, or `--force` to sync without comparing first.
         """
 
         if not self.bot.application_id:
@@ -211,9 +728,15 @@ class ManagementFeature(Feature):
 
         paginator = commands.Paginator(prefix='', suffix='')
 
+        options: typing.Set[str] = set()
         guilds_set: typing.Set[typing.Optional[int]] = set()
         for target in targets:
-            if target == '$':
+            if target.startswith('--'):
+                if target not in self.SYNC_OPTIONS:
+                    raise commands.BadArgument(f"Unknown option {target}, expected one of: {', '.join(self.SYNC_OPTIONS)}")
+
+                options.add(target)
+            elif target == '$':
                 guilds_set.add(None)
             elif target == '*':
                 guilds_set |= set(self.bot.tree._guild_commands.keys())  # type: ignore  # pylint: disable=protected-access
@@ -229,110 +752,17 @@ class ManagementFeature(Feature):
                 except ValueError as error:
                     raise commands.BadArgument(f"{target} is not a valid guild ID") from error
 
-        if not targets:
+        if all(target.startswith('--') for target in targets):
             guilds_set.add(None)
 
         guilds: typing.List[typing.Optional[int]] = list(guilds_set)
         guilds.sort(key=lambda g: (g is not None, g))
 
-        for guild in guilds:
-            slash_commands = self.bot.tree._get_all_commands(  # type: ignore  # pylint: disable=protected-access
-                guild=discord_mod.Object(guild) if guild else None
-            )
-            translator = getattr(self.bot.tree, 'translator', None)
-            needs_dpy_2_4_signature_changes = discord_mod.version_info.major >= 2 and discord_mod.version_info.minor >= 4
-
-            if needs_dpy_2_4_signature_changes:
-                if translator:
-                    payload = [await command.get_translated_payload(self.bot.tree, translator) for command in slash_commands]
-                else:
-                    payload = [command.to_dict(self.bot.tree) for command in slash_commands]
-            else:
-                if translator:
-                    payload = [await command.get_translated_payload(translator) for command in slash_commands]
-                else:
-                    payload = [command.to_dict() for command in slash_commands]
-
-            try:
-                if guild is None:
-                    data = await self.bot.http.bulk_upsert_global_commands(self.bot.application_id, payload=payload)
-                else:
-                    data = await self.bot.http.bulk_upsert_guild_commands(self.bot.application_id, guild, payload=payload)
-
-                synced = [
-                    discord_mod.app_commands.AppCommand(data=d, state=ctx._state)  # type: ignore  # pylint: disable=protected-access,no-member
-                    for d in data
-                ]
+        # The HTTP client waits out ratelimits itself, this just keeps a large sync from queueing every request at once
+        semaphore = asyncio.Semaphore(self.SYNC_CONCURRENCY)
 
-            except discord_mod.HTTPException as error:
-                # It's diagnosis time
-                error_lines: typing.List[str] = []
-                for line in str(error).split("\n"):
-                    error_lines.append(line)
-
-                    try:
-                        match = self.SLASH_COMMAND_ERROR.match(line)
-                        if not match:
-                            continue
-
-                        pool = slash_commands
-                        selected_command = None
-                        name = ""
-                        parts = match.group(1).split('.')
-                        assert len(parts) % 2 == 0
-
-                        for part_index in range(0, len(parts), 2):
-                            index = int(parts[part_index])
-                            # prop = parts[part_index + 1]
-
-                            if pool:
-                                # If the pool exists, this should be a subcommand
-                                selected_command = pool[index]  # type: ignore
-                                name += selected_command.name + " "
-
-                                if hasattr(selected_command, '_children'):  # type: ignore
-                                    pool = list(selected_command._children.values())  # type: ignore  # pylint: disable=protected-access
-                                else:
-                                    pool = None
-                            else:
-                                # Otherwise, the pool has been exhausted, and this likely is referring to a parameter
-                                param = list(selected_command._params.keys())[index]  # type: ignore  # pylint: disable=protected-access
-                                name += f"(parameter: {param}) "
-
-                        if selected_command:
-                            to_inspect: typing.Any = None
-
-                            if hasattr(selected_command, 'callback'):  # type: ignore
-                                to_inspect = selected_command.callback  # type: ignore
-                            elif isinstance(selected_command, commands.Cog):
-                                to_inspect = type(selected_command)
-
-                            try:
-                                error_lines.append(''.join([
-                                    "\N{MAGNET} This is likely caused by: `",
-                                    name,
-                                    "` at ",
-                                    str(inspections.file_loc_inspection(to_inspect)),  # type: ignore
-                                    ":",
-                                    str(inspections.line_span_inspection(to_inspect)),  # type: ignore
-                                ]))
-                            except Exception:  # pylint: disable=broad-except
-                                error_lines.append(f"\N{MAGNET} This is likely caused by: `{name}`")
-
-                    except Exception as diag_error:  # pylint: disable=broad-except
-                        error_lines.append(f"\N{MAGNET} Couldn't determine cause: {type(diag_error).__name__}: {diag_error}")
-
-                error_text = '\n'.join(error_lines)
-
-                if guild:
-                    paginator.add_line(f"\N{WARNING SIGN} `{guild}`: {error_text}", empty=True)
-                else:
-                    paginator.add_line(f"\N{WARNING SIGN} Global: {error_text}", empty=True)
-            else:
-                if guild:
-                    paginator.add_line(f"\N{SATELLITE ANTENNA} `{guild}` Synced {len(synced)} guild commands", empty=True)
-                else:
-                    paginator.add_line(f"\N{SATELLITE ANTENNA} Synced {len(synced)} global commands", empty=True)
+        for line in await asyncio.gather(*(self.jsk_sync_target(ctx, guild, options, semaphore) for guild in guilds)):
+            paginator.add_line(line, empty=True)
 
         for page in paginator.pages:
             await ctx.send(page)
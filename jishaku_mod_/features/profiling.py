@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.features.profiling
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+The jishaku profiling commands.
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import io
+import time
+import typing
+
+import discord_mod
+from discord_mod.ext import commands
+
+from jishaku_mod_.exception_handling import ReplResponseReactor
+from jishaku_mod_.features.baseclass import Feature
+from jishaku_mod_.math import format_bargraph, format_percentiles, natural_time
+from jishaku_mod_.paginators import PaginatorInterface, WrappedPaginator
+from jishaku_mod_.profiling import LoopLagMonitor, StackSampler
+from jishaku_mod_.types import ContextA
+
+
+class ProfilingFeature(Feature):
+    """
+    Feature containing the profiling commands
+    """
+
+    def __init__(self, *args: typing.Any, **kwargs: typing.Any):
+        super().__init__(*args, **kwargs)
+        self.loop_monitor = LoopLagMonitor()
+
+    def cog_unload(self):  # type: ignore
+        """
+        Stops the loop monitor so it doesn't outlive the cog.
+        """
+
+        self.loop_monitor.stop()
+        return super().cog_unload()
+
+    @Feature.Command(parent="jsk", name="profile")
+    async def jsk_profile(self, ctx: ContextA, seconds: float = 10.0, rate: int = 200):
+        """
+        Samples the stacks of all threads in this process for a number of seconds.
+
+        The rate is the number of samples taken per second.
+        Produces a table of the busiest functions and a collapsed stack file usable with flamegraph tools.
+        """
+
+        if not 0 < seconds <= 600:
+            raise commands.BadArgument("Profiling duration must be between 0 and 600 seconds.")
+
+        if not 0 < rate <= 1000:
+            raise commands.BadArgument("Sampling rate must be between 1 and 1000 samples per second.")
+
+        sampler = StackSampler(interval=1 / rate)
+
+        async with ReplResponseReactor(ctx.message):
+            with self.submit(ctx):
+                sampler.start()
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    await asyncio.get_running_loop().run_in_executor(None, sampler.stop)
+
+        if not sampler.sample_count:
+            return await ctx.send("No samples were taken.")
+
+        await ctx.send(
+            content=f"Took {sampler.sample_count} samples over {sampler.duration:.2f}s.",
+            file=discord_mod.File(
+                filename="stacks.collapsed.txt",
+                fp=io.BytesIO(sampler.collapsed().encode('utf-8'))
+            )
+        )
+
+        paginator = WrappedPaginator(prefix='```prolog', max_size=1980)
+        paginator.add_line(f"{'self':>7} {'total':>7}  function")
+
+        for label, self_samples, total_samples in sampler.top(50):
+            paginator.add_line(
+                f"{self_samples / sampler.sample_count:7.1%} {total_samples / sampler.sample_count:7.1%}  {label}"
+            )
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        await interface.send_to(ctx)
+
+    @Feature.Command(parent="jsk", name="loop", invoke_without_command=True, ignore_extra=False)
+    async def jsk_loop(self, ctx: ContextA):
+        """
+        Reports event loop lag and slow callbacks recorded by the loop monitor.
+        """
+
+        monitor = self.loop_monitor
+
+        lines = [
+            f"Loop lag sampler is {'running' if monitor.running else 'stopped'} "
+            f"(every {natural_time(monitor.interval).strip()}), "
+            f"slow callback capture is {'enabled' if monitor.debugging else 'disabled'}.",
+        ]
+
+        if monitor.samples:
+            lines.append(f"Lag over the last {len(monitor.samples)} samples: {format_percentiles(monitor.samples)}")
+            lines.append("")
+
+            largest_bucket = max(monitor.histogram) or 1
+            lower = 0.0
+
+            for bound, count in zip((*monitor.BUCKETS, None), monitor.histogram):
+                label = f"{natural_time(lower)} - {natural_time(bound)}" if bound is not None else f"{natural_time(lower)} +        "
+                lines.append(f"{label} {format_bargraph(count / largest_bucket, 10)} {count}")
+                lower = bound or lower
+        else:
+            lines.append("No lag samples have been recorded. Use `jsk loop start` to begin sampling.")
+
+        if monitor.slow_callbacks:
+            lines.append("")
+            lines.append(f"Last {len(monitor.slow_callbacks)} slow callbacks:")
+
+            now = time.time()
+
+            # Discord timestamp markup doesn't render inside the code block, so the age is written out instead
+            for callback in reversed(monitor.slow_callbacks):
+                age = natural_time(max(0.0, now - callback.timestamp)).strip()
+                lines.append(f"{callback.duration * 1000:.1f}ms, {age} ago: {callback.description}")
+
+        paginator = WrappedPaginator(prefix='```prolog', max_size=1980)
+
+        for line in lines:
+            paginator.add_line(line)
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        await interface.send_to(ctx)
+
+    @Feature.Command(parent="jsk_loop", name="start")
+    async def jsk_loop_start(self, ctx: ContextA, interval: float = 0.1):
+        """
+        Starts sampling event loop lag, waking up every `interval` seconds.
+        """
+
+        if not 0.001 <= interval <= 60:
+            raise commands.BadArgument("Sampling interval must be between 0.001 and 60 seconds.")
+
+        if self.loop_monitor.running:
+            return await ctx.send("The loop lag sampler is already running.")
+
+        self.loop_monitor.interval = interval
+        self.loop_monitor.reset()
+        self.loop_monitor.start(self.bot.loop)
+
+        await ctx.send(f"Sampling loop lag every {natural_time(interval).strip()}.")
+
+    @Feature.Command(parent="jsk_loop", name="stop")
+    async def jsk_loop_stop(self, ctx: ContextA):
+        """
+        Stops sampling event loop lag and disables slow callback capture.
+        """
+
+        self.loop_monitor.stop()
+        await ctx.send("Stopped the loop lag sampler.")
+
+    @Feature.Command(parent="jsk_loop", name="debug")
+    async def jsk_loop_debug(self, ctx: ContextA, toggle: bool, threshold: float = 0.1):
+        """
+        Turns asyncio debug mode on or off, capturing callbacks that block the loop for longer than `threshold` seconds.
+
+        Debug mode adds overhead to every callback, so avoid leaving it on.
+        """
+
+        if toggle:
+            self.loop_monitor.enable_debug(threshold, self.bot.loop)
+            return await ctx.send(f"Capturing callbacks that take longer than {natural_time(threshold).strip()}.")
+
+        self.loop_monitor.disable_debug()
+        await ctx.send("Slow callback capture is disabled.")
@@ -27,9 +27,9 @@ from jishaku_mod_.features.baseclass import Feature
 from jishaku_mod_.flags import Flags
 from jishaku_mod_.formatting import MultilineFormatter
 from jishaku_mod_.functools import AsyncSender
-from jishaku_mod_.math import format_bargraph, format_stddev
+from jishaku_mod_.math import format_bargraph, format_stddev, natural_size, natural_time, next_batch_size, subtract_overhead
 from jishaku_mod_.paginators import PaginatorInterface, WrappedPaginator, use_file_check
-from jishaku_mod_.repl import AsyncCodeExecutor, Scope, all_inspections, create_tree, disassemble, get_adaptive_spans, get_var_dict_from_ctx
+from jishaku_mod_.repl import CODE_CACHE, AsyncCodeExecutor, Scope, all_inspections, create_tree, disassemble, get_adaptive_spans, get_var_dict_from_ctx
 from jishaku_mod_.types import ContextA
 
 try:
@@ -90,6 +90,27 @@ class PythonFeature(Feature):
         self.retain = False
         return await ctx.send("Variable retention is OFF. Future REPL sessions will dispose their scope when done.")
 
+    @Feature.Command(parent="jsk", name="py_cache", aliases=["pycache", "python_cache"])
+    async def jsk_python_cache(self, ctx: ContextA, action: typing.Optional[typing.Literal['clear']] = None):
+        """
+        Shows statistics for the compiled REPL code cache.
+
+        Pass 'clear' to empty the cache.
+        """
+
+        if action == 'clear':
+            CODE_CACHE.clear()
+            return await ctx.send("The REPL code cache has been cleared.")
+
+        lookups = CODE_CACHE.hits + CODE_CACHE.misses
+        hit_rate = f" ({CODE_CACHE.hits / lookups:.1%} hit rate)" if lookups else ""
+
+        return await ctx.send("\n".join([
+            f"The REPL code cache holds {len(CODE_CACHE)}/{CODE_CACHE.max_entries} entries, "
+            f"using {natural_size(CODE_CACHE.size)} of {natural_size(CODE_CACHE.max_bytes)}.",
+            f"{CODE_CACHE.hits} hits, {CODE_CACHE.misses} misses{hit_rate}, {CODE_CACHE.evictions} evictions.",
+        ]))
+
     async def jsk_python_result_handling(self, ctx: ContextA, result: typing.Any):  # pylint: disable=too-many-return-statements
         """
         Determines what is done with a result when it comes out of jsk py.
@@ -188,7 +209,12 @@ class PythonFeature(Feature):
         try:
             async with ReplResponseReactor(ctx.message):
                 with self.submit(ctx):
-                    executor = AsyncCodeExecutor(argument.content, scope, arg_dict=arg_dict, convertables=convertables)
+                    executor = await AsyncCodeExecutor.create(
+                        argument.content, scope,
+                        arg_dict=arg_dict,
+                        convertables=convertables,
+                        offload_threshold=Flags.COMPILE_OFFLOAD_THRESHOLD
+                    )
                     async for send, result in AsyncSender(executor):  # type: ignore
                         send: typing.Callable[..., None]
                         result: typing.Any
@@ -218,7 +244,12 @@ class PythonFeature(Feature):
         try:
             async with ReplResponseReactor(ctx.message):
                 with self.submit(ctx):
-                    executor = AsyncCodeExecutor(argument.content, scope, arg_dict=arg_dict, convertables=convertables)
+                    executor = await AsyncCodeExecutor.create(
+                        argument.content, scope,
+                        arg_dict=arg_dict,
+                        convertables=convertables,
+                        offload_threshold=Flags.COMPILE_OFFLOAD_THRESHOLD
+                    )
                     async for send, result in AsyncSender(executor):  # type: ignore
                         send: typing.Callable[..., None]
                         result: typing.Any
@@ -260,6 +291,37 @@ class PythonFeature(Feature):
         finally:
             scope.clear_intersection(arg_dict)
 
+    # The wall time each batch of jsk timeit iterations should take before yielding to the event loop
+    TIMEIT_BATCH_TARGET: float = 0.05
+
+    async def jsk_timeit_batch(
+        self,
+        ctx: ContextA,
+        executor: AsyncCodeExecutor,
+        iterations: int,
+        timings: typing.List[float],
+        handle_results: bool = True
+    ):
+        """
+        Runs a batch of timeit iterations back-to-back without yielding to the loop in between,
+        appending the wall time of each iteration to `timings`.
+        """
+
+        for _ in range(iterations):
+            start = time.perf_counter()
+            async for send, result in AsyncSender(executor):  # type: ignore
+                send: typing.Callable[..., None]
+                result: typing.Any
+
+                if result is None or not handle_results:
+                    continue
+
+                self.last_result = result
+
+                send(await self.jsk_python_result_handling(ctx, result))
+
+            timings.append(time.perf_counter() - start)
+
     if line_profiler is not None:
         @Feature.Command(parent="jsk", name="timeit")
         async def jsk_timeit(self, ctx: ContextA, *, argument: codeblock_converter):  # type: ignore
@@ -276,62 +338,86 @@ class PythonFeature(Feature):
             try:
                 async with ReplResponseReactor(ctx.message):
                     with self.submit(ctx):
-                        executor = AsyncCodeExecutor(
+                        executor = await AsyncCodeExecutor.create(
                             argument.content, scope,
                             arg_dict=arg_dict,
                             convertables=convertables,
-                            auto_return=False
+                            auto_return=False,
+                            offload_threshold=Flags.COMPILE_OFFLOAD_THRESHOLD
                         )
 
+                        # A single profiler is used for the whole run, and per-line timings are taken
+                        #  as the difference in totals between batches.
+                        profile = line_profiler.LineProfiler()  # type: ignore
+                        profile.add_function(executor.function)  # type: ignore
+
                         overall_start = time.perf_counter()
                         count: int = 0
+                        batch_count: int = 0
+                        batch_size: int = 1
                         timings: typing.List[float] = []
-                        ioless_timings: typing.List[float] = []
+                        # Line timings are only available as totals per batch, so active time is kept as a total
+                        ioless_total: float = 0.0
                         line_timings: typing.Dict[int, typing.List[float]] = collections.defaultdict(list)
+                        line_totals: typing.Dict[int, typing.Tuple[int, float]] = {}
 
                         while count < 10_000 and (time.perf_counter() - overall_start) < 30.0:
-                            profile = line_profiler.LineProfiler()  # type: ignore
-                            profile.add_function(executor.function)  # type: ignore
+                            iterations = min(batch_size, 10_000 - count)
 
+                            batch_start = time.perf_counter()
                             profile.enable()  # type: ignore
                             try:
-                                start = time.perf_counter()
-                                async for send, result in AsyncSender(executor):  # type: ignore
-                                    send: typing.Callable[..., None]
-                                    result: typing.Any
-
-                                    if result is None:
-                                        continue
+                                await self.jsk_timeit_batch(ctx, executor, iterations, timings)
+                            finally:
+                                profile.disable()  # type: ignore
+                            batch_time = time.perf_counter() - batch_start
 
-                                    self.last_result = result
+                            count += iterations
+                            batch_count += 1
 
-                                    send(await self.jsk_python_result_handling(ctx, result))
-                                    # Reduces likelihood of hardblocking
-                                    await asyncio.sleep(0.001)
+                            for function in profile.code_map.values():  # type: ignore
+                                for timing in function.values():  # type: ignore
+                                    lineno: int = timing['lineno']  # type: ignore
+                                    last_hits, last_time = line_totals.get(lineno, (0, 0.0))
+                                    total_time: float = timing['total_time'] * profile.timer_unit  # type: ignore
+                                    line_totals[lineno] = (timing['nhits'], total_time)  # type: ignore
 
-                                end = time.perf_counter()
-                            finally:
-                                profile.disable()  # type: ignore
+                                    if timing['nhits'] == last_hits:  # type: ignore
+                                        continue
 
-                            # Reduces likelihood of hardblocking
-                            await asyncio.sleep(0.001)
+                                    line_timings[lineno].append((total_time - last_time) / iterations)
+                                    ioless_total += total_time - last_time
 
-                            count += 1
-                            timings.append(end - start)
+                            # Size batches adaptively, similar to timeit's autorange,
+                            #  so fast code isn't dominated by loop ticks and slow code doesn't hardblock
+                            batch_size = next_batch_size(batch_size, batch_time, self.TIMEIT_BATCH_TARGET)
 
-                            ioless_time: float = 0
+                            await asyncio.sleep(0)
 
-                            for function in profile.code_map.values():  # type: ignore
-                                for timing in function.values():  # type: ignore
-                                    line_timings[timing['lineno']].append(timing['total_time'] * profile.timer_unit)  # type: ignore
-                                    ioless_time += timing['total_time'] * profile.timer_unit  # type: ignore
+                        # Measure the cost of the harness itself by timing an empty executor the same way,
+                        #  including the line tracing, so it can be subtracted from the user code timings
+                        overhead_executor = await AsyncCodeExecutor.create(
+                            'pass', Scope(),
+                            arg_dict=arg_dict,
+                            auto_return=False
+                        )
+                        profile.add_function(overhead_executor.function)  # type: ignore
+                        overhead_timings: typing.List[float] = []
 
-                            ioless_timings.append(ioless_time)
+                        for _ in range(min(batch_count, 100)):
+                            profile.enable()  # type: ignore
+                            try:
+                                await self.jsk_timeit_batch(ctx, overhead_executor, max(1, count // batch_count), overhead_timings, False)
+                            finally:
+                                profile.disable()  # type: ignore
+                            await asyncio.sleep(0)
 
                         execution_time = format_stddev(timings)
-                        active_time = format_stddev(ioless_timings)
+                        active_time = natural_time(ioless_total / count)
+                        overhead_time = format_stddev(overhead_timings)
+                        user_time = natural_time(subtract_overhead(timings, overhead_timings))
 
-                        max_line_time = max(max(timing) for timing in line_timings.values())
+                        max_line_time = max((max(timing) for timing in line_timings.values()), default=0.0) or 1.0
 
                         linecache = executor.create_linecache()
                         lines: typing.List[str] = []
@@ -349,10 +435,11 @@ class PythonFeature(Feature):
 
                         await ctx.send(
                             content="\n".join([
-                                f"Executed {count} times",
+                                f"Executed {count} times in {batch_count} batches",
                                 f"Actual execution time: {execution_time}",
-                                f"Active (non-waiting) time: {active_time}",
-                                "**Delay will be added by async setup, use only for relative measurements**",
+                                f"Active (non-waiting) time: {active_time} mean per iteration",
+                                f"Harness overhead: {overhead_time}",
+                                f"Estimated user code time: {user_time}",
                             ]),
                             file=discord_mod.File(
                                 filename="lines.ansi",
@@ -423,7 +510,12 @@ class PythonFeature(Feature):
             try:
                 async with ReplResponseReactor(ctx.message):
                     with self.submit(ctx):
-                        executor = AsyncCodeExecutor(argument.content, scope, arg_dict=arg_dict, convertables=convertables)
+                        executor = await AsyncCodeExecutor.create(
+                            argument.content, scope,
+                            arg_dict=arg_dict,
+                            convertables=convertables,
+                            offload_threshold=Flags.COMPILE_OFFLOAD_THRESHOLD
+                        )
                         async for send, result in AsyncSender(executor):  # type: ignore
                             send: typing.Callable[..., None]
                             result: typing.Any
@@ -130,10 +130,10 @@ class ShellFeature(Feature):
                     interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author, additional_buttons=[stdin_button])
                     self.bot.loop.create_task(interface.send_to(ctx))
 
-                    async for line in reader:
+                    async for lines in reader.batches():
                         if interface.closed:
                             return
-                        await interface.add_line(line)
+                        await interface.add_lines(lines)
 
                 await interface.add_line(f"\n[status] Return code {reader.close_code}")
 
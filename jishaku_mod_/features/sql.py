@@ -11,21 +11,35 @@ The jishaku SQL-related commands and utilities.
 
 """
 
+import asyncio
 import collections
 import contextlib
+import csv
+import gzip
 import io
+import itertools
+import json
+import re
+import time
 import typing
 
 import discord_mod
-from tabulate import tabulate
+from discord_mod.ext import commands
 
+from jishaku_mod_.codeblocks import Codeblock, codeblock_converter
 from jishaku_mod_.exception_handling import ReplResponseReactor
 from jishaku_mod_.features.baseclass import Feature
+from jishaku_mod_.flags import Flags
+from jishaku_mod_.formatting import ColumnarTable
+from jishaku_mod_.math import natural_size, natural_time
 from jishaku_mod_.paginators import PaginatorInterface, WrappedPaginator, use_file_check
 from jishaku_mod_.types import ContextA
 
 T = typing.TypeVar('T')
 
+# A tuple of (column names, rows), where each row is a sequence of values in column order
+RowBatch = typing.Tuple[typing.Sequence[str], typing.Sequence[typing.Sequence[typing.Any]]]
+
 
 class Adapter(typing.Generic[T]):
     """
@@ -44,6 +58,13 @@ class Adapter(typing.Generic[T]):
         """
         yield
 
+    @property
+    def pooled(self) -> bool:
+        """
+        Does each use of this adapter acquire its own connection, so that separate instances can be used concurrently?
+        """
+        return False
+
     def info(self) -> str:
         """
         A string summarizing this adapter's exposable information about its connection.
@@ -64,12 +85,38 @@ class Adapter(typing.Generic[T]):
         """
         raise NotImplementedError()
 
+    async def stream(self, query: str, batch_size: int = 500) -> typing.AsyncIterator[RowBatch]:
+        """
+        An async iterator that executes a fetch-style request and yields batches of up to `batch_size` rows.
+
+        Each batch is a tuple of (column names, rows), where each row is a sequence of values in column order.
+
+        Adapters should implement this using server-side cursors where possible, so the whole result is never held in memory.
+        By default, this fetches every entry and then splits them into batches.
+        """
+        records = await self.fetch(query)
+
+        for index in range(0, len(records), batch_size):
+            batch = records[index:index + batch_size]
+            columns = tuple(batch[0].keys())
+
+            yield columns, [tuple(record.get(column) for column in columns) for record in batch]
+
     async def execute(self, query: str) -> str:
         """
         A function that executes a execute-style request and returns a status string.
         """
         raise NotImplementedError()
 
+    async def explain(self, query: str, analyze: bool = False) -> str:
+        """
+        A function that returns the plan the database would use to run a query, as text.
+
+        If `analyze` is True, the query is actually run and the plan should include what it cost, where the database supports this.
+        Adapters should undo any changes made by running the query, where possible.
+        """
+        raise NotImplementedError()
+
     async def table_summary(self, table_query: typing.Optional[str]) -> typing.Dict[str, typing.Dict[str, str]]:
         """
         A function that queries to find table structures identified by this adapter.
@@ -95,10 +142,39 @@ def adapter(*types: typing.Type[typing.Any]):
     def wrapper(klass: typing.Type[Adapter[typing.Any]]):
         for handled_type in types:
             KNOWN_ADAPTERS[handled_type] = klass
+        RESOLVED_ADAPTERS.clear()
         return klass
 
     return wrapper
 
+
+RESOLVED_ADAPTERS: typing.Dict[type, typing.Optional[typing.Type[Adapter[typing.Any]]]] = {}
+
+
+def resolve_adapter(connector: typing.Any) -> typing.Optional[typing.Type[Adapter[typing.Any]]]:
+    """
+    Returns the adapter class that handles a connector, or None if there is no such adapter.
+
+    The result is remembered for the connector's type, so the known adapters are only searched once per type.
+    """
+
+    connector_type = type(connector)
+
+    try:
+        return RESOLVED_ADAPTERS[connector_type]
+    except KeyError:
+        pass
+
+    resolved = None
+
+    for adapter_class, adapter_shim in KNOWN_ADAPTERS.items():
+        if isinstance(connector, adapter_class):
+            resolved = adapter_shim
+            break
+
+    RESOLVED_ADAPTERS[connector_type] = resolved
+    return resolved
+
 # pylint: disable=missing-class-docstring,missing-function-docstring
 
 
@@ -113,6 +189,10 @@ else:
             super().__init__(connection)
             self.connection: asyncpg.Connection = None  # type: ignore
 
+        @property
+        def pooled(self) -> bool:
+            return isinstance(self.connector, asyncpg.pool.Pool)
+
         @contextlib.asynccontextmanager
         async def use(self):
             if isinstance(self.connector, asyncpg.pool.Pool):
@@ -140,9 +220,42 @@ else:
                 for record in await self.connection.fetch(query)  # type: ignore
             ]
 
+        async def stream(self, query: str, batch_size: int = 500) -> typing.AsyncIterator[RowBatch]:
+            # Cursors only exist within a transaction
+            async with self.connection.transaction():  # type: ignore
+                cursor = await self.connection.cursor(query)  # type: ignore
+
+                while True:
+                    records = await cursor.fetch(batch_size)  # type: ignore
+
+                    if not records:
+                        break
+
+                    try:
+                        # Records are already sequences of their values
+                        yield tuple(records[0].keys()), records  # type: ignore
+                    except GeneratorExit:
+                        # Stopping early (e.g. at a row limit) still commits, like a fetch of the whole result would,
+                        #  so anything the statement changed isn't silently rolled back
+                        break
+
         async def execute(self, query: str) -> str:
             return await self.connection.execute(query)  # type: ignore
 
+        async def explain(self, query: str, analyze: bool = False) -> str:
+            if not analyze:
+                records = await self.connection.fetch(f"EXPLAIN {query}")  # type: ignore
+            else:
+                # ANALYZE runs the query, so anything it changes is rolled back
+                transaction = self.connection.transaction()  # type: ignore
+                await transaction.start()  # type: ignore
+                try:
+                    records = await self.connection.fetch(f"EXPLAIN (ANALYZE, BUFFERS) {query}")  # type: ignore
+                finally:
+                    await transaction.rollback()  # type: ignore
+
+            return '\n'.join(record[0] for record in records)  # type: ignore
+
         async def table_summary(self, table_query: typing.Optional[str]) -> typing.Dict[str, typing.Dict[str, str]]:
             tables: typing.Dict[str, typing.Dict[str, str]] = collections.defaultdict(dict)
 
@@ -179,6 +292,10 @@ else:
             super().__init__(connection)
             self.connection: aiomysql.Connection = None  # type: ignore
 
+        @property
+        def pooled(self) -> bool:
+            return isinstance(self.connector, aiomysql.Pool)
+
         @contextlib.asynccontextmanager
         async def use(self):
             if isinstance(self.connector, aiomysql.Pool):
@@ -215,6 +332,23 @@ else:
             finally:
                 await cursor.close()  # type: ignore
 
+        async def stream(self, query: str, batch_size: int = 500) -> typing.AsyncIterator[RowBatch]:
+            # Unbuffered cursors read rows from the server as they are fetched
+            cursor = await self.connection.cursor(aiomysql.SSCursor)  # type: ignore
+            try:
+                await cursor.execute(query)  # type: ignore
+                columns = tuple(column[0] for column in cursor.description or ())  # type: ignore
+
+                while True:
+                    records = await cursor.fetchmany(batch_size)  # type: ignore
+
+                    if not records:
+                        break
+
+                    yield columns, records  # type: ignore
+            finally:
+                await cursor.close()  # type: ignore
+
         async def execute(self, query: str) -> str:
             cursor = await self.connection.cursor(aiomysql.DictCursor)  # type: ignore
             try:
@@ -222,6 +356,25 @@ else:
             finally:
                 await cursor.close()  # type: ignore
 
+        async def explain(self, query: str, analyze: bool = False) -> str:
+            cursor = await self.connection.cursor()  # type: ignore
+            try:
+                if not analyze:
+                    await cursor.execute(f"EXPLAIN {query}")  # type: ignore
+                    table = ColumnarTable()
+                    table.extend(tuple(column[0] for column in cursor.description), await cursor.fetchall())  # type: ignore
+                    return table.render()
+
+                # EXPLAIN ANALYZE runs the query, so anything it changes is rolled back
+                await self.connection.begin()  # type: ignore
+                try:
+                    await cursor.execute(f"EXPLAIN ANALYZE {query}")  # type: ignore
+                    return '\n'.join(str(row[0]) for row in await cursor.fetchall())  # type: ignore
+                finally:
+                    await self.connection.rollback()  # type: ignore
+            finally:
+                await cursor.close()  # type: ignore
+
         async def table_summary(self, table_query: typing.Optional[str]) -> typing.Dict[str, typing.Dict[str, str]]:
             tables: typing.Dict[str, typing.Dict[str, str]] = collections.defaultdict(dict)
 
@@ -265,6 +418,10 @@ else:
             super().__init__(connection)
             self.connection: asqlite.Connection = None  # type: ignore
 
+        @property
+        def pooled(self) -> bool:
+            return isinstance(self.connector, asqlite.Pool)
+
         @contextlib.asynccontextmanager
         async def use(self):
             if isinstance(self.connector, asqlite.Pool):
@@ -285,30 +442,49 @@ else:
         async def fetch(self, query: str) -> typing.List[typing.Dict[str, typing.Any]]:
             return [dict(row) for row in await self.connection.fetchall(query)]
 
+        async def stream(self, query: str, batch_size: int = 500) -> typing.AsyncIterator[RowBatch]:
+            cursor = await self.connection.execute(query)
+            try:
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+
+                    if not rows:
+                        break
+
+                    yield tuple(rows[0].keys()), rows
+            finally:
+                await cursor.close()
+
         async def execute(self, query: str) -> str:
             # This is really the best analogue I can come up with, given that sqlite doesn't
             # output status strings like other RDBMS systems.
             return str((await self.connection.execute(query)).get_cursor().rowcount)
 
-        async def table_summary(self, table_query: typing.Optional[str]) -> typing.Dict[str, typing.Dict[str, str]]:
-            tables: typing.Dict[str, typing.Dict[str, str]] = collections.defaultdict(dict)
+        async def explain(self, query: str, analyze: bool = False) -> str:
+            # sqlite can only describe its plan, not what running it cost, so analyze is treated the same
+            depths: typing.Dict[int, int] = {0: -1}
+            lines: typing.List[str] = []
 
-            if table_query:
-                for row in await self.connection.fetchall(
-                    "SELECT name, type, `notnull`, dflt_value, pk from pragma_table_info(?);",
-                    table_query,
-                ):
-                    tables[table_query][row['name']] = self.format_column_row(row)
+            for row in await self.connection.fetchall(f"EXPLAIN QUERY PLAN {query}"):
+                depth = depths[row['id']] = depths.get(row['parent'], -1) + 1
+                lines.append(f"{'  ' * depth}{row['detail']}")
 
-            else:
-                for row in await self.connection.fetchall("SELECT name FROM sqlite_master WHERE type = 'table';"):
-                    name = row['name']
+            return '\n'.join(lines)
+
+        async def table_summary(self, table_query: typing.Optional[str]) -> typing.Dict[str, typing.Dict[str, str]]:
+            tables: typing.Dict[str, typing.Dict[str, str]] = collections.defaultdict(dict)
 
-                    for table_column in await self.connection.fetchall(
-                        "SELECT name, type, `notnull`, dflt_value, pk from pragma_table_info(?);",
-                        name,
-                    ):
-                        tables[name][table_column['name']] = self.format_column_row(table_column)
+            # pragma_table_info can be joined against sqlite_master, so every table is described in one query
+            for row in await self.connection.fetchall(
+                """
+                SELECT m.name AS table_name, p.name, p.type, p.`notnull`, p.dflt_value, p.pk
+                FROM sqlite_master AS m, pragma_table_info(m.name) AS p
+                WHERE m.type = 'table' AND (?1 IS NULL OR m.name = ?1)
+                ORDER BY m.name, p.cid;
+                """,
+                table_query,
+            ):
+                tables[row['table_name']][row['name']] = self.format_column_row(row)
 
             return tables
 
@@ -323,6 +499,389 @@ else:
 
 # pylint: enable=missing-class-docstring,missing-function-docstring
 
+
+DOLLAR_QUOTE_REGEX = re.compile(r'\$(?:[A-Za-z_][A-Za-z0-9_]*)?\$')
+
+
+def split_statements(script: str) -> typing.List[str]:
+    """
+    Splits a script into its statements on semicolons, ignoring those inside of quotes, comments and dollar-quoted strings.
+
+    Empty statements are left out.
+    """
+
+    statements: typing.List[str] = []
+    start = index = 0
+    length = len(script)
+
+    while index < length:
+        char = script[index]
+
+        if char in '\'"`':
+            index += 1
+
+            # Skip to the closing quote, stepping over backslash escapes
+            while index < length and script[index] != char:
+                index += 2 if script[index] == '\\' else 1
+
+            index += 1
+            continue
+
+        if script.startswith('--', index):
+            end = script.find('\n', index)
+            index = length if end == -1 else end + 1
+            continue
+
+        if script.startswith('/*', index):
+            end = script.find('*/', index + 2)
+            index = length if end == -1 else end + 2
+            continue
+
+        if char == '$':
+            match = DOLLAR_QUOTE_REGEX.match(script, index)
+
+            if match:
+                end = script.find(match.group(0), match.end())
+                index = length if end == -1 else end + len(match.group(0))
+                continue
+
+        if char == ';':
+            statements.append(script[start:index])
+            start = index + 1
+
+        index += 1
+
+    statements.append(script[start:])
+
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+class Exporter:
+    """
+    Base class for writing the rows of a query into a file in memory, a batch at a time.
+    """
+
+    extension: str = ''
+
+    def size(self) -> int:
+        """
+        The current size of the written file.
+        """
+        raise NotImplementedError()
+
+    def write(self, columns: typing.Sequence[str], rows: typing.Sequence[typing.Sequence[typing.Any]]):
+        """
+        Writes a batch of rows to the file.
+
+        This may be called from another thread, but never from more than one at a time.
+        """
+        raise NotImplementedError()
+
+    def finish(self) -> io.BytesIO:
+        """
+        Finishes writing the file, returning it ready to be read.
+        """
+        raise NotImplementedError()
+
+
+KNOWN_EXPORTERS: typing.Dict[str, typing.Type[Exporter]] = {}
+
+
+def exporter(*names: str):
+    """
+    Wraps an exporter class, adding it to the globally known export formats under the given names and then returning it.
+    """
+
+    def wrapper(klass: typing.Type[Exporter]):
+        for name in names:
+            KNOWN_EXPORTERS[name] = klass
+        return klass
+
+    return wrapper
+
+
+class GzipTextExporter(Exporter):
+    """
+    Base class for exporters of gzip compressed text.
+    """
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.stream = io.TextIOWrapper(
+            gzip.GzipFile(fileobj=self.buffer, mode='wb'),  # type: ignore
+            encoding='utf-8',
+            newline=''
+        )
+
+    def size(self) -> int:
+        # Text and compressed data are buffered before reaching the buffer, so push them through first
+        self.stream.flush()
+        return self.buffer.tell()
+
+    def finish(self) -> io.BytesIO:
+        # Closing the gzip stream doesn't close the buffer it writes to
+        self.stream.close()
+        self.buffer.seek(0)
+        return self.buffer
+
+
+@exporter('csv')
+class CSVExporter(GzipTextExporter):
+    """
+    Exports rows as gzip compressed CSV, with a header row.
+    """
+
+    extension = 'csv.gz'
+
+    def __init__(self):
+        super().__init__()
+        self.writer = csv.writer(self.stream)
+        self.columns: typing.Optional[typing.Sequence[str]] = None
+
+    def write(self, columns: typing.Sequence[str], rows: typing.Sequence[typing.Sequence[typing.Any]]):
+        if self.columns is None:
+            self.columns = columns
+            self.writer.writerow(columns)
+
+        self.writer.writerows(rows)
+
+
+@exporter('jsonl', 'ndjson', 'json')
+class JSONLinesExporter(GzipTextExporter):
+    """
+    Exports rows as gzip compressed JSON Lines, with one object of {column: value} per row.
+    """
+
+    extension = 'jsonl.gz'
+
+    def write(self, columns: typing.Sequence[str], rows: typing.Sequence[typing.Sequence[typing.Any]]):
+        self.stream.writelines(
+            json.dumps(dict(zip(columns, row)), default=str) + '\n'
+            for row in rows
+        )
+
+
+try:
+    import pyarrow  # type: ignore
+    import pyarrow.ipc  # type: ignore
+    import pyarrow.parquet  # type: ignore
+except ImportError:
+    pass
+else:
+    class ArrowExporter(Exporter):
+        """
+        Base class for exporters of Arrow data. The schema is inferred from the first batch of rows.
+
+        Columns that are entirely NULL in the first batch can't be typed, so they are exported as strings.
+        """
+
+        def __init__(self):
+            self.sink = pyarrow.BufferOutputStream()
+            self.schema: typing.Optional[pyarrow.Schema] = None
+            self.writer: typing.Any = None
+
+        def size(self) -> int:
+            return self.sink.tell()
+
+        def batch_table(self, columns: typing.Sequence[str], rows: typing.Sequence[typing.Sequence[typing.Any]]) -> 'pyarrow.Table':
+            data = {column: list(values) for column, values in zip(columns, zip(*rows))}
+
+            table = pyarrow.Table.from_pydict(data)
+
+            if self.schema is None:
+                self.schema = pyarrow.schema([
+                    field.with_type(pyarrow.string()) if pyarrow.types.is_null(field.type) else field
+                    for field in table.schema
+                ])
+                self.writer = self.open(self.schema)
+
+            # Later batches may infer differently, e.g. a column that was NULL now has values
+            if table.schema != self.schema:
+                table = table.cast(self.schema)
+
+            return table
+
+        def open(self, schema: 'pyarrow.Schema') -> typing.Any:
+            """
+            Creates the writer for this format once the schema is known.
+            """
+            raise NotImplementedError()
+
+        def write(self, columns: typing.Sequence[str], rows: typing.Sequence[typing.Sequence[typing.Any]]):
+            table = self.batch_table(columns, rows)
+            self.writer.write_table(table)
+
+        def finish(self) -> io.BytesIO:
+            if self.writer is not None:
+                self.writer.close()
+
+            return io.BytesIO(self.sink.getvalue().to_pybytes())
+
+    @exporter('parquet')
+    class ParquetExporter(ArrowExporter):
+        """
+        Exports rows as zstd compressed Parquet, writing a row group per batch.
+        """
+
+        extension = 'parquet'
+
+        def open(self, schema: 'pyarrow.Schema') -> typing.Any:
+            return pyarrow.parquet.ParquetWriter(self.sink, schema, compression='zstd')
+
+    @exporter('arrow', 'ipc')
+    class ArrowIPCExporter(ArrowExporter):
+        """
+        Exports rows as a zstd compressed Arrow IPC stream.
+        """
+
+        extension = 'arrows'
+
+        def open(self, schema: 'pyarrow.Schema') -> typing.Any:
+            return pyarrow.ipc.new_stream(self.sink, schema, options=pyarrow.ipc.IpcWriteOptions(compression='zstd'))
+
+
+# Statements that can change the shape of tables, and so make cached table summaries stale
+DDL_REGEX = re.compile(r'\b(?:CREATE|ALTER|DROP|RENAME)\b', re.IGNORECASE)
+
+
+class SchemaCache:
+    """
+    Keeps the table summary of every table for each connector, so the catalogue is only queried once per `ttl` seconds.
+
+    If `ttl` is None, the value of the SQL_SCHEMA_CACHE_TTL flag at the time of each lookup is used.
+    """
+
+    def __init__(self, ttl: typing.Optional[float] = None):
+        self._ttl = ttl
+        self.entries: typing.Dict[int, typing.Tuple[typing.Any, float, typing.Dict[str, typing.Dict[str, str]]]] = {}
+
+    @property
+    def ttl(self) -> float:
+        """
+        How long in seconds a summary is reused for.
+        """
+
+        return Flags.SQL_SCHEMA_CACHE_TTL if self._ttl is None else self._ttl
+
+    def get(self, connector: typing.Any) -> typing.Optional[typing.Dict[str, typing.Dict[str, str]]]:
+        """
+        Returns the summary stored for a connector, or None if there isn't one or it has expired.
+        """
+
+        now = time.monotonic()
+
+        # Expired entries are dropped here so connectors that are no longer used aren't kept alive
+        for key, (_, stored, _) in list(self.entries.items()):
+            if now - stored >= self.ttl:
+                del self.entries[key]
+
+        entry = self.entries.get(id(connector))
+
+        if entry is None or entry[0] is not connector:
+            return None
+
+        return entry[2]
+
+    def set(self, connector: typing.Any, summary: typing.Dict[str, typing.Dict[str, str]]):
+        """
+        Stores the summary of every table for a connector.
+        """
+
+        self.entries[id(connector)] = (connector, time.monotonic(), summary)
+
+    def invalidate(self, connector: typing.Any = None):
+        """
+        Forgets the summary stored for a connector, or for every connector if none is given.
+        """
+
+        if connector is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(id(connector), None)
+
+    @staticmethod
+    def filter(summary: typing.Dict[str, typing.Dict[str, str]], table_query: typing.Optional[str]) -> typing.Dict[str, typing.Dict[str, str]]:
+        """
+        Narrows a summary of every table down to the tables with a given name, with or without their qualifying schema.
+        """
+
+        if not table_query:
+            return summary
+
+        return {
+            table: structure for table, structure in summary.items()
+            if table == table_query or table.endswith(f".{table_query}")
+        }
+
+
+class QueryTimer:
+    """
+    Measures a query from the client side: the time to its first row, the total time, and how many rows and bytes it produced.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_row: typing.Optional[float] = None
+        self.end: typing.Optional[float] = None
+        self.rows = 0
+        self.size = 0
+
+    def record(self, rows: int, size: int = 0):
+        """
+        Records that a batch of rows was received.
+        """
+
+        if rows and self.first_row is None:
+            self.first_row = time.perf_counter()
+
+        self.rows += rows
+        self.size += size
+
+    def stop(self):
+        """
+        Records that the query has finished.
+        """
+
+        self.end = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        """
+        The total time taken by the query so far.
+        """
+
+        return (self.end or time.perf_counter()) - self.start
+
+    def __str__(self) -> str:
+        parts = [f"Took {natural_time(self.duration).strip()}"]
+
+        if self.first_row is not None:
+            parts.append(f"first row after {natural_time(self.first_row - self.start).strip()}")
+
+        if self.rows:
+            parts.append(f"{self.rows} rows")
+
+            if self.duration > 0:
+                parts.append(f"{self.rows / self.duration:,.0f} rows/s")
+
+        if self.size:
+            parts.append(natural_size(self.size))
+
+        return ", ".join(parts)
+
+
+class BatchResult(typing.NamedTuple):
+    """
+    The outcome of one statement run by `jsk sql batch`.
+    """
+
+    statement: str
+    timer: QueryTimer
+    table: typing.Optional[ColumnarTable] = None
+    limit: typing.Optional[str] = None
+    error: typing.Optional[BaseException] = None
+
+
 class SQLFeature(Feature):
     """
     Feature containing SQL-related commands
@@ -330,23 +889,141 @@ class SQLFeature(Feature):
 
     JSK_TRY_ATTRIBUTES = ('database_pool', 'database', 'db_pool', 'db', 'pool')
 
+    def __init__(self, *args: typing.Any, **kwargs: typing.Any):
+        super().__init__(*args, **kwargs)
+        self.jsk_adapter_location: typing.Optional[typing.Tuple[str, str]] = None
+        self.jsk_schema_cache = SchemaCache()
+
+    def jsk_find_connector(
+        self,
+        ctx: ContextA
+    ) -> typing.Union[typing.Tuple[typing.Any, typing.Type[Adapter[typing.Any]], str], typing.Tuple[None, None, None]]:
+        """
+        Attempts to search for a connector with a known adapter, returning (connector, adapter class, location) if one is found.
+
+        The location of the last connector found is checked first, so the search is usually only a single lookup.
+        """
+
+        sources = {'ctx': ctx, 'bot': ctx.bot}
+        locations = [(name_a, attribute) for name_a in sources for attribute in self.JSK_TRY_ATTRIBUTES]
+
+        if self.jsk_adapter_location is not None:
+            locations.insert(0, self.jsk_adapter_location)
+
+        for name_a, attribute in locations:
+            maybe_adapter = getattr(sources[name_a], attribute, None)
+
+            if maybe_adapter is None:
+                continue
+
+            adapter_shim = resolve_adapter(maybe_adapter)
+
+            if adapter_shim is not None:
+                self.jsk_adapter_location = (name_a, attribute)
+                return maybe_adapter, adapter_shim, f"{name_a}.{attribute}"
+
+        return None, None, None
+
     def jsk_find_adapter(self, ctx: ContextA) -> typing.Union[typing.Tuple[Adapter[typing.Any], str], typing.Tuple[None, None]]:
         """
         Attempts to search for a working database adapter, returning (Adapter, location) if one is found.
+
+        A new adapter is made each time, as adapters hold the connection they acquire while in use.
+        """
+
+        connector, adapter_shim, location = self.jsk_find_connector(ctx)
+
+        if adapter_shim is None:
+            return None, None
+
+        return adapter_shim(connector), location  # type: ignore
+
+    STREAM_BATCH_SIZE = 500
+    # The number of table rows rendered into a paginator at a time
+    RENDER_BATCH_SIZE = 200
+    # The default and maximum number of statements jsk sql batch runs at once
+    BATCH_CONCURRENCY = 4
+    MAX_BATCH_CONCURRENCY = 32
+    # The number of rows of each result shown by jsk sql batch
+    BATCH_PREVIEW_ROWS = 20
+
+    async def jsk_sql_collect(
+        self,
+        adapter_shim: Adapter[typing.Any],
+        query: str,
+        timer: typing.Optional[QueryTimer] = None
+    ) -> typing.Tuple[ColumnarTable, typing.Optional[str], QueryTimer]:
         """
+        Streams the result of a query into a table, stopping at the row and byte limits.
+
+        Returns the table, the name of the limit that was reached (if any), and the timing of the query.
+        A timer can be passed in to include time spent before the query, or to keep the timing if the query fails.
+        """
+
+        table = ColumnarTable()
+        timer = timer or QueryTimer()
+        limit = None
 
-        for name_a, source in (('ctx', ctx), ('bot', ctx.bot)):
-            for attribute in self.JSK_TRY_ATTRIBUTES:
-                maybe_adapter = getattr(source, attribute, None)
+        batches = adapter_shim.stream(query, self.STREAM_BATCH_SIZE)
 
-                if maybe_adapter is None:
-                    continue
+        try:
+            async for columns, rows in batches:
+                if len(table) + len(rows) > Flags.SQL_ROW_LIMIT:
+                    rows = rows[:Flags.SQL_ROW_LIMIT - len(table)]
+                    limit = "row"
 
-                for adapter_class, adapter_shim in KNOWN_ADAPTERS.items():
-                    if isinstance(maybe_adapter, adapter_class):
-                        return adapter_shim(maybe_adapter), f"{name_a}.{attribute}"
+                timer.record(len(rows))
+                timer.size += table.extend(columns, rows)
+
+                if not limit and timer.size >= Flags.SQL_BYTE_LIMIT:
+                    limit = "size"
+
+                if limit:
+                    break
+        finally:
+            # Close the cursor now, rather than whenever the generator is garbage collected
+            await batches.aclose()  # type: ignore
+
+        timer.stop()
+
+        return table, limit, timer
+
+    async def jsk_sql_send_table(self, ctx: ContextA, table: ColumnarTable, notice: typing.Optional[str] = None):
+        """
+        Sends a table as a file if it is small enough, otherwise renders it progressively into a paginator.
+        """
+
+        layout = table.measure()
+
+        if use_file_check(ctx, table.rendered_size(layout)):
+            await ctx.reply(content=notice, file=discord_mod.File(
+                filename="response.txt",
+                fp=io.BytesIO('\n'.join(table.render_lines(layout=layout)).encode('utf-8'))
+            ))
+            return
 
-        return None, None
+        lines = table.render_lines(layout=layout)
+
+        paginator = WrappedPaginator(max_size=1980)
+
+        for line in itertools.islice(lines, self.RENDER_BATCH_SIZE):
+            paginator.add_line(line)
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        await interface.send_to(ctx)
+
+        # The rest of the table is rendered a batch at a time, yielding to the event loop in between
+        while not interface.closed:
+            batch = list(itertools.islice(lines, self.RENDER_BATCH_SIZE))
+
+            if not batch:
+                break
+
+            await interface.add_lines(batch, follow=False)
+            await asyncio.sleep(0)
+
+        if notice and not interface.closed:
+            await interface.add_lines([notice], follow=False)
 
     @Feature.Command(parent="jsk", name="sql", invoke_without_command=True, ignore_extra=False)
     async def jsk_sql(self, ctx: ContextA):
@@ -374,35 +1051,32 @@ class SQLFeature(Feature):
             return await ctx.send("No SQL adapter could be found on this bot.")
 
         output = None
+        timer = QueryTimer()
         async with adapter_shim.use():
             async with ReplResponseReactor(ctx.message):
                 with self.submit(ctx):
                     output = await adapter_shim.fetchrow(query)
+                    timer.record(1 if output else 0)
+                    timer.stop()
 
         if output is None:
             return
 
         if not output:
-            return await ctx.reply("No results produced.")
+            return await ctx.reply(f"No results produced. {timer}")
 
-        text = tabulate({key: [value] for key, value in output.items()}, headers='keys', tablefmt='psql')
+        table = ColumnarTable()
+        # The row was already counted when it arrived, this only adds its size
+        timer.record(0, table.add_records([output]))
 
-        if use_file_check(ctx, len(text)):
-            await ctx.reply(file=discord_mod.File(
-                filename="response.txt",
-                fp=io.BytesIO(text.encode('utf-8'))
-            ))
-        else:
-            paginator = WrappedPaginator(max_size=1980)
-            paginator.add_line(text)
-
-            interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
-            await interface.send_to(ctx)
+        await self.jsk_sql_send_table(ctx, table, str(timer))
 
     @Feature.Command(parent="jsk_sql", name="fetch")
     async def jsk_sql_fetch(self, ctx: ContextA, *, query: str):
         """
         Fetch multiple rows from the SQL database.
+
+        Rows are read in batches, stopping once JISHAKU_SQL_ROW_LIMIT rows or JISHAKU_SQL_BYTE_LIMIT bytes have been read.
         """
 
         adapter_shim, _ = self.jsk_find_adapter(ctx)
@@ -414,33 +1088,86 @@ class SQLFeature(Feature):
         async with adapter_shim.use():
             async with ReplResponseReactor(ctx.message):
                 with self.submit(ctx):
-                    output = await adapter_shim.fetch(query)
+                    output = await self.jsk_sql_collect(adapter_shim, query)
 
         if output is None:
             return
 
-        if not output:
-            return await ctx.reply("No results produced.")
+        table, limit, timer = output
 
-        aggregator: typing.Dict[str, typing.List[typing.Any]] = collections.defaultdict(list)
+        if not table:
+            return await ctx.reply(f"No results produced. {timer}")
 
-        for record in output:
-            for key, value in record.items():
-                aggregator[key].append(value)
+        notice = f"{timer}. Stopped early, as the {limit} limit was reached." if limit else str(timer)
 
-        text = tabulate(aggregator, headers='keys', tablefmt='psql')
+        await self.jsk_sql_send_table(ctx, table, notice)
 
-        if use_file_check(ctx, len(text)):
-            await ctx.reply(file=discord_mod.File(
-                filename="response.txt",
-                fp=io.BytesIO(text.encode('utf-8'))
-            ))
-        else:
-            paginator = WrappedPaginator(max_size=1980)
-            paginator.add_line(text)
+    @Feature.Command(parent="jsk_sql", name="export")
+    async def jsk_sql_export(self, ctx: ContextA, export_format: str, *, query: str):
+        """
+        Export the rows of a query to a file in the given format.
+
+        CSV and JSON Lines are always available, Parquet and Arrow IPC are available if pyarrow is installed.
+        Rows are written as they are read, stopping before the file gets too large to upload.
+        """
 
-            interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
-            await interface.send_to(ctx)
+        exporter_class = KNOWN_EXPORTERS.get(export_format.lower())
+
+        if exporter_class is None:
+            raise commands.BadArgument(
+                f"Unknown export format {export_format!r}, the available formats are: {', '.join(sorted(KNOWN_EXPORTERS))}"
+            )
+
+        adapter_shim, _ = self.jsk_find_adapter(ctx)
+
+        if adapter_shim is None:
+            return await ctx.send("No SQL adapter could be found on this bot.")
+
+        # Stop with some room to spare for the last batch and whatever is flushed when the file is finished
+        size_limit = ctx.guild.filesize_limit if ctx.guild else 10 * 1024 * 1024
+        target_size = size_limit - size_limit // 8
+
+        loop = asyncio.get_running_loop()
+        export = exporter_class()
+        timer = QueryTimer()
+        truncated = False
+        output = None
+
+        async with adapter_shim.use():
+            async with ReplResponseReactor(ctx.message):
+                with self.submit(ctx):
+                    batches = adapter_shim.stream(query, self.STREAM_BATCH_SIZE)
+
+                    try:
+                        async for columns, rows in batches:
+                            if export.size() >= target_size:
+                                truncated = True
+                                break
+
+                            timer.record(len(rows))
+
+                            # Encoding and compression are done off the event loop
+                            await loop.run_in_executor(None, export.write, columns, rows)
+                    finally:
+                        await batches.aclose()  # type: ignore
+
+                    output = await loop.run_in_executor(None, export.finish)
+                    timer.stop()
+                    timer.size = output.getbuffer().nbytes
+
+        if output is None:
+            return
+
+        if not timer.rows:
+            return await ctx.reply(f"No results produced. {timer}")
+
+        if timer.size > size_limit:
+            return await ctx.reply(f"The exported file is too large to upload. {timer}")
+
+        await ctx.reply(
+            content=f"{timer}" + (". Stopped early, as the file size limit was reached." if truncated else ""),
+            file=discord_mod.File(filename=f"export.{exporter_class.extension}", fp=output)
+        )
 
     @Feature.Command(parent="jsk_sql", name="select")
     async def jsk_sql_select(self, ctx: ContextA, *, query: str):
@@ -462,20 +1189,24 @@ class SQLFeature(Feature):
             return await ctx.send("No SQL adapter could be found on this bot.")
 
         output = None
+        timer = QueryTimer()
         async with adapter_shim.use():
             async with ReplResponseReactor(ctx.message):
                 with self.submit(ctx):
                     output = await adapter_shim.execute(query)
+                    timer.stop()
+
+        if DDL_REGEX.search(query):
+            self.jsk_schema_cache.invalidate(adapter_shim.connector)
 
         if output is None:
             return
 
-        await ctx.reply(content=output)
+        await ctx.reply(content=f"{output}\n{timer}")
 
-    @Feature.Command(parent="jsk_sql", name="schema")
-    async def jsk_sql_schema(self, ctx: ContextA, *, query: typing.Optional[str] = None):
+    async def jsk_sql_plan(self, ctx: ContextA, query: str, analyze: bool):
         """
-        Queries for the current schema and shows located table structures.
+        Shows the plan for a query, optionally analyzing it.
         """
 
         adapter_shim, _ = self.jsk_find_adapter(ctx)
@@ -483,15 +1214,176 @@ class SQLFeature(Feature):
         if adapter_shim is None:
             return await ctx.send("No SQL adapter could be found on this bot.")
 
+        if type(adapter_shim).explain is Adapter.explain:
+            return await ctx.send("This SQL adapter can't explain queries.")
+
         output = None
+        timer = QueryTimer()
         async with adapter_shim.use():
             async with ReplResponseReactor(ctx.message):
                 with self.submit(ctx):
-                    output = await adapter_shim.table_summary(query)
+                    output = await adapter_shim.explain(query, analyze=analyze)
+                    timer.stop()
 
         if output is None:
             return
 
+        paginator = WrappedPaginator(prefix='```', max_size=1980)
+
+        for line in output.split('\n'):
+            paginator.add_line(line)
+
+        paginator.add_line(f"\n{timer}")
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        await interface.send_to(ctx)
+
+    async def jsk_sql_batch_run(
+        self,
+        connector: typing.Any,
+        adapter_class: typing.Type[Adapter[typing.Any]],
+        semaphore: asyncio.Semaphore,
+        statement: str
+    ) -> BatchResult:
+        """
+        Runs one statement of a batch on its own adapter, once the semaphore allows it.
+        """
+
+        async with semaphore:
+            # Each statement needs its own adapter, as the adapter holds the connection it acquires
+            adapter_shim = adapter_class(connector)
+            # The timer includes acquiring the connection, so failed statements are timed the same way as successful ones
+            timer = QueryTimer()
+
+            try:
+                async with adapter_shim.use():
+                    table, limit, timer = await self.jsk_sql_collect(adapter_shim, statement, timer)
+            except Exception as exception:  # pylint: disable=broad-except
+                timer.stop()
+                return BatchResult(statement, timer, error=exception)
+
+        return BatchResult(statement, timer, table, limit)
+
+    @Feature.Command(parent="jsk_sql", name="batch")
+    async def jsk_sql_batch(self, ctx: ContextA, concurrency: typing.Optional[int] = None, *, argument: codeblock_converter):  # type: ignore
+        """
+        Runs several independent statements at once, each on its own connection, and reports how long each took.
+
+        Statements are separated by semicolons. Up to `concurrency` statements run at a time, if the database is a pool.
+        """
+
+        if typing.TYPE_CHECKING:
+            argument: Codeblock = argument  # type: ignore
+
+        connector, adapter_class, _ = self.jsk_find_connector(ctx)
+
+        if adapter_class is None:
+            return await ctx.send("No SQL adapter could be found on this bot.")
+
+        concurrency = self.BATCH_CONCURRENCY if concurrency is None else concurrency
+
+        if not 1 <= concurrency <= self.MAX_BATCH_CONCURRENCY:
+            raise commands.BadArgument(f"Concurrency must be between 1 and {self.MAX_BATCH_CONCURRENCY}.")
+
+        statements = split_statements(argument.content)
+
+        if not statements:
+            raise commands.BadArgument("No statements were given.")
+
+        # A single connection can only run one statement at a time
+        if not adapter_class(connector).pooled:
+            concurrency = 1
+
+        results: typing.Optional[typing.List[BatchResult]] = None
+        timer = QueryTimer()
+
+        async with ReplResponseReactor(ctx.message):
+            with self.submit(ctx):
+                semaphore = asyncio.Semaphore(concurrency)
+                results = await asyncio.gather(*(
+                    self.jsk_sql_batch_run(connector, adapter_class, semaphore, statement)  # type: ignore
+                    for statement in statements
+                ))
+                timer.stop()
+
+        if results is None:
+            return
+
+        if any(DDL_REGEX.search(statement) for statement in statements):
+            self.jsk_schema_cache.invalidate(connector)
+
+        paginator = WrappedPaginator(prefix='```', max_size=1980)
+        paginator.add_line(
+            f"Ran {len(statements)} statements {concurrency} at a time in {natural_time(timer.duration).strip()}, "
+            f"against {natural_time(sum(result.timer.duration for result in results)).strip()} if run one after another."
+        )
+
+        for index, result in enumerate(results, start=1):
+            paginator.add_line()
+            paginator.add_line(f"[{index}] {result.statement.splitlines()[0][:100]}")
+
+            if result.error is not None:
+                paginator.add_line(f"{type(result.error).__name__}: {result.error}")
+                paginator.add_line(f"Failed after {natural_time(result.timer.duration).strip()}")
+            elif not result.table:
+                paginator.add_line(f"No results produced. {result.timer}")
+            else:
+                paginator.add_line(str(result.timer) + (f". Stopped early, as the {result.limit} limit was reached." if result.limit else ""))
+
+                for line in result.table.render_lines(stop=self.BATCH_PREVIEW_ROWS):
+                    paginator.add_line(line)
+
+                if len(result.table) > self.BATCH_PREVIEW_ROWS:
+                    paginator.add_line(f"({len(result.table) - self.BATCH_PREVIEW_ROWS} more rows not shown)")
+
+        interface = PaginatorInterface(ctx.bot, paginator, owner=ctx.author)
+        await interface.send_to(ctx)
+
+    @Feature.Command(parent="jsk_sql", name="explain")
+    async def jsk_sql_explain(self, ctx: ContextA, *, query: str):
+        """
+        Shows the plan the database would use to run a query, without running it.
+        """
+
+        await self.jsk_sql_plan(ctx, query, analyze=False)
+
+    @Feature.Command(parent="jsk_sql", name="analyze", aliases=["explain_analyze"])
+    async def jsk_sql_analyze(self, ctx: ContextA, *, query: str):
+        """
+        Runs a query and shows the plan the database used, along with what each step cost.
+
+        Changes made by the query are rolled back where the database supports it. For sqlite, this is the same as explain.
+        """
+
+        await self.jsk_sql_plan(ctx, query, analyze=True)
+
+    @Feature.Command(parent="jsk_sql", name="schema")
+    async def jsk_sql_schema(self, ctx: ContextA, *, query: typing.Optional[str] = None):
+        """
+        Queries for the current schema and shows located table structures.
+
+        The schema is cached for a while, and forgotten when `jsk sql execute` runs a statement that could change it.
+        """
+
+        adapter_shim, _ = self.jsk_find_adapter(ctx)
+
+        if adapter_shim is None:
+            return await ctx.send("No SQL adapter could be found on this bot.")
+
+        output = self.jsk_schema_cache.get(adapter_shim.connector)
+
+        if output is None:
+            async with adapter_shim.use():
+                async with ReplResponseReactor(ctx.message):
+                    with self.submit(ctx):
+                        output = await adapter_shim.table_summary(None)
+                        self.jsk_schema_cache.set(adapter_shim.connector, output)
+
+            if output is None:
+                return
+
+        output = SchemaCache.filter(output, query)
+
         if not output:
             return await ctx.reply("No results produced.")
 
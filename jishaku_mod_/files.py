@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.files
+~~~~~~~~~~~~~
+
+Tools for reading parts of large files without loading them into memory.
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import bisect
+import mmap
+import typing
+
+__all__ = ('MappedFile',)
+
+
+class MappedFile:
+    """
+    A read-only memory mapping of a file that can look up lines by number.
+
+    Lines are found using a sparse index of how many newlines precede each chunk of the file.
+    The index is only built as far into the file as the lines that have been asked for,
+    so reading a span of lines touches only the chunks before it once, and the bytes of the span itself.
+
+    Lines are numbered from 1 and split on ``\\n`` only, matching ``str.split('\\n')``.
+
+    Example
+    -------
+
+    .. code:: python3
+
+        with open('huge.log', 'rb') as fp, MappedFile(fp) as mapped:
+            print(mapped.read_lines(900000, 900050).decode('utf-8'))
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, fp: typing.BinaryIO):
+        self.mapping = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self.mapping)
+
+        # The number of newlines before the start of each indexed chunk
+        self.newlines_before: typing.List[int] = [0]
+
+    @classmethod
+    def open(cls, fp: typing.BinaryIO) -> typing.Optional['MappedFile']:
+        """
+        Maps a file-like if it is backed by a real file, returning None otherwise.
+
+        Files with no size (such as empty files, pipes or sockets) can't be mapped.
+        """
+
+        try:
+            return cls(fp)
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def close(self):
+        """
+        Closes the underlying mapping.
+        """
+
+        self.mapping.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def indexed(self) -> bool:
+        """
+        Has the index reached the end of the file?
+        """
+
+        return (len(self.newlines_before) - 1) * self.CHUNK_SIZE >= self.size
+
+    def index_until(self, newlines: int):
+        """
+        Extends the index until it covers at least `newlines` newlines, or the whole file.
+        """
+
+        while not self.indexed and self.newlines_before[-1] < newlines:
+            start = (len(self.newlines_before) - 1) * self.CHUNK_SIZE
+            self.newlines_before.append(
+                self.newlines_before[-1] + self.mapping[start:start + self.CHUNK_SIZE].count(b'\n')
+            )
+
+    @property
+    def line_count(self) -> int:
+        """
+        The number of lines in the file. This indexes the whole file.
+        """
+
+        self.index_until(self.size + 1)
+        return self.newlines_before[-1] + 1
+
+    def find_newline(self, number: int) -> int:
+        """
+        Returns the offset of the `number`-th newline in the file, counting from 1.
+
+        Raises IndexError if the file doesn't have this many newlines.
+        """
+
+        self.index_until(number)
+
+        if number < 1 or number > self.newlines_before[-1]:
+            raise IndexError('newline out of range')
+
+        # Find the chunk this newline is in, then walk the newlines inside of it
+        chunk = bisect.bisect_left(self.newlines_before, number) - 1
+        position = chunk * self.CHUNK_SIZE - 1
+
+        for _ in range(number - self.newlines_before[chunk]):
+            position = self.mapping.find(b'\n', position + 1)
+
+        return position
+
+    def line_start(self, line: int) -> int:
+        """
+        Returns the offset of the start of a line.
+        """
+
+        return 0 if line == 1 else self.find_newline(line - 1) + 1
+
+    def line_end(self, line: int) -> int:
+        """
+        Returns the offset of the end of a line, excluding its newline.
+        """
+
+        try:
+            return self.find_newline(line)
+        except IndexError:
+            # The last line has no newline after it
+            if line == self.newlines_before[-1] + 1:
+                return self.size
+            raise
+
+    def read_lines(self, first: int, last: int) -> bytes:
+        """
+        Returns the bytes of lines `first` to `last` inclusive, without the trailing newline.
+
+        Raises ValueError if the span goes out of bounds.
+        """
+
+        if first < 1 or last < first:
+            raise ValueError("Linespan goes out of bounds.")
+
+        try:
+            return self.mapping[self.line_start(first):self.line_end(last)]
+        except IndexError as exc:
+            raise ValueError("Linespan goes out of bounds.") from exc
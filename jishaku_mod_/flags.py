@@ -160,6 +160,16 @@ class Flags(metaclass=FlagMeta):  # pylint: disable=too-few-public-methods
     # Flag to indicate whether to always use paginators over relying on Discord's file preview
     FORCE_PAGINATOR: bool
 
+    # The size in characters above which REPL code is compiled in an executor rather than on the event loop.
+    COMPILE_OFFLOAD_THRESHOLD: int = 4096
+
+    # The maximum number of rows and (approximate) bytes of data that SQL commands will read from a single query.
+    SQL_ROW_LIMIT: int = 10_000
+    SQL_BYTE_LIMIT: int = 8 * 1024 * 1024
+
+    # How long in seconds the table summary of each SQL connection is reused for before the catalogue is queried again.
+    SQL_SCHEMA_CACHE_TTL: float = 300.0
+
     # Flag to indicate verbose error tracebacks should be sent to the invoking channel as opposed to via direct message.
     # ALWAYS_DM_TRACEBACK takes precedence over this
     NO_DM_TRACEBACK: bool
@@ -12,6 +12,8 @@ Advanced formatting constructs
 """
 
 import dataclasses
+import decimal
+import sys
 import typing
 
 # List of block characters:
@@ -265,3 +267,232 @@ class MultilineFormatter:
             lines.append(formatter.output(use_complex, use_ansi))
 
         return "\n".join(lines)
+
+
+# Characters that would break the layout of a table cell, and what to show instead
+TABLE_CELL_ESCAPES = str.maketrans({'\n': '\\n', '\r': '\\r', '\t': '    '})
+
+TABLE_NUMERIC_TYPES = (int, float, decimal.Decimal)
+
+
+class TableLayout(typing.NamedTuple):
+    """
+    The widths of the columns of a table, and whether they are aligned to the right.
+    """
+
+    widths: typing.List[int]
+    alignments: typing.List[bool]
+
+
+def format_table_cell(value: typing.Any) -> str:
+    """
+    Formats a single value for display in a table cell.
+    """
+
+    if value is None:
+        return ''
+
+    return str(value).translate(TABLE_CELL_ESCAPES)
+
+
+class ColumnarTable:
+    """
+    A table of values stored column by column, that can render itself in the style of psql:
+
+    +------+-------+
+    |   id | name  |
+    |------+-------|
+    |    1 | one   |
+    |    2 | two   |
+    +------+-------+
+
+    Rows are added a batch at a time, with the values of each row in column order.
+    Column widths are measured in a single pass over the values, and rows can be rendered in any range,
+    so a table can be rendered a page at a time without producing the whole text.
+
+    Each value is only formatted once, and the text is kept for measuring and rendering it again.
+    """
+
+    def __init__(self, columns: typing.Sequence[str] = ()):
+        self.columns: typing.List[str] = []
+        self.data: typing.List[typing.List[typing.Any]] = []
+        self.cells: typing.List[typing.List[str]] = []
+        self.row_count: int = 0
+
+        for column in columns:
+            self.add_column(column)
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def add_column(self, name: str) -> int:
+        """
+        Adds a column to the table, with no value for the rows already in it.
+
+        Returns the index of the new column.
+        """
+
+        self.columns.append(name)
+        self.data.append([None] * self.row_count)
+        self.cells.append([])
+
+        return len(self.columns) - 1
+
+    def formatted(self, index: int) -> typing.List[str]:
+        """
+        Returns the text of every cell in a column, formatting only the values added since it was last called.
+        """
+
+        values, cells = self.data[index], self.cells[index]
+
+        # Values are only ever appended, so any cells already formatted are still correct
+        if len(cells) < len(values):
+            cells.extend(map(format_table_cell, values[len(cells):]))
+
+        return cells
+
+    def extend(self, columns: typing.Sequence[str], rows: typing.Sequence[typing.Sequence[typing.Any]]) -> int:
+        """
+        Adds a batch of rows to the table, where `columns` names the values in each row.
+
+        Columns that the table doesn't have yet are added.
+        Returns the approximate size in memory of the added values.
+        """
+
+        if not rows:
+            return 0
+
+        if list(columns) == self.columns:
+            indices: typing.Sequence[int] = range(len(columns))
+        else:
+            indices = []
+
+            for column in columns:
+                # Queries can produce the same column name more than once, so each occurrence gets its own column
+                existing = [index for index, name in enumerate(self.columns) if name == column and index not in indices]
+                indices.append(existing[0] if existing else self.add_column(column))
+
+        size = 0
+
+        for index, values in zip(indices, zip(*rows)):
+            self.data[index].extend(values)
+            size += sum(map(sys.getsizeof, values))
+
+        self.row_count += len(rows)
+
+        # Pad any columns these rows didn't have a value for
+        for values in self.data:
+            if len(values) < self.row_count:
+                values.extend([None] * (self.row_count - len(values)))
+
+        return size
+
+    def add_records(self, records: typing.Iterable[typing.Mapping[str, typing.Any]]) -> int:
+        """
+        Adds rows given as mappings of {column: value}.
+
+        Returns the approximate size in memory of the added values.
+        """
+
+        size = 0
+
+        for record in records:
+            size += self.extend(tuple(record.keys()), [tuple(record.values())])
+
+        return size
+
+    def measure(self) -> TableLayout:
+        """
+        Works out the width and alignment of every column.
+
+        Pass the result to the other methods when using them on the same table many times, to avoid measuring it again.
+        """
+
+        widths: typing.List[int] = []
+        alignments: typing.List[bool] = []
+
+        for index, (column, values) in enumerate(zip(self.columns, self.data)):
+            width = max(len(column), max(map(len, self.formatted(index)), default=0))
+            numeric = False
+            other = False
+
+            for value in values:
+                if value is None:
+                    continue
+
+                if isinstance(value, TABLE_NUMERIC_TYPES) and not isinstance(value, bool):
+                    numeric = True
+                else:
+                    other = True
+
+            widths.append(width)
+            alignments.append(numeric and not other)
+
+        return TableLayout(widths, alignments)
+
+    def line_width(self, layout: typing.Optional[TableLayout] = None) -> int:
+        """
+        Returns the width of every line of the rendered table.
+        """
+
+        widths = (layout or self.measure()).widths
+        return sum(widths) + 3 * len(widths) + 1
+
+    def rendered_size(self, layout: typing.Optional[TableLayout] = None) -> int:
+        """
+        Returns the size of the text that `render` would produce, without rendering it.
+        """
+
+        return (self.line_width(layout) + 1) * (self.row_count + 4) - 1
+
+    def render_lines(
+        self,
+        start: int = 0,
+        stop: typing.Optional[int] = None,
+        layout: typing.Optional[TableLayout] = None,
+        borders: bool = True,
+        batch_size: int = 1000,
+    ) -> typing.Iterator[str]:
+        """
+        Renders rows `start` to `stop` of the table, line by line.
+
+        If `borders` is True, the header and the surrounding borders are included.
+        """
+
+        widths, alignments = layout or self.measure()
+        stop = self.row_count if stop is None else min(stop, self.row_count)
+
+        border = '+' + '+'.join('-' * (width + 2) for width in widths) + '+'
+
+        if borders:
+            yield border
+            yield '| ' + ' | '.join(
+                column.rjust(width) if right else column.ljust(width)
+                for column, width, right in zip(self.columns, widths, alignments)
+            ) + ' |'
+            yield '|' + border[1:-1] + '|'
+
+        for batch_start in range(start, stop, batch_size):
+            batch_stop = min(batch_start + batch_size, stop)
+
+            # Each column of the batch is padded in turn, then the columns are zipped into rows
+            padded_columns = [
+                [
+                    cell.rjust(width) if right else cell.ljust(width)
+                    for cell in self.formatted(index)[batch_start:batch_stop]
+                ]
+                for index, (width, right) in enumerate(zip(widths, alignments))
+            ]
+
+            for cells in zip(*padded_columns):
+                yield '| ' + ' | '.join(cells) + ' |'
+
+        if borders:
+            yield border
+
+    def render(self) -> str:
+        """
+        Renders the whole table as text.
+        """
+
+        return '\n'.join(self.render_lines())
@@ -11,12 +11,15 @@ Constants and functions related to syntax highlighting with highlight.js
 
 """
 
+import codecs
 import re
 import typing
 
 __all__ = (
     'get_language',
     'guess_file_traits',
+    'sniff_language',
+    'stream_file_traits',
     'LANGUAGES'
 )
 
@@ -340,30 +343,124 @@ LANGUAGES = sorted([
 ], key=len, reverse=True)
 
 
+def build_suffix_trie(languages: typing.Iterable[str]) -> typing.Dict[str, typing.Any]:
+    """
+    Builds a trie of the given languages, keyed on their characters in reverse.
+
+    Nodes that complete a language hold it under the empty string key.
+    """
+
+    trie: typing.Dict[str, typing.Any] = {}
+
+    for language in languages:
+        node = trie
+
+        for char in reversed(language):
+            node = node.setdefault(char, {})
+
+        node[''] = language
+
+    return trie
+
+
+LANGUAGE_TRIE = build_suffix_trie(LANGUAGES)
+LONGEST_LANGUAGE = len(LANGUAGES[0])
+
+
 def get_language(query: str) -> str:
     """Tries to work out the highlight.js language of a given file name or
     shebang. Returns an empty string if none match.
+
+    The longest language the query ends with is used.
     """
-    query = query.lower()
-    for language in LANGUAGES:
-        if query.endswith(language):
-            return language
-    return ''
+    node = LANGUAGE_TRIE
+    language = ''
+
+    # Only the end of the query can match, so there's no need to lower the rest
+    for char in reversed(query[-LONGEST_LANGUAGE:].lower()):
+        node = node.get(char)
+
+        if node is None:
+            break
+
+        language = node.get('', language)
+
+    return language
 
 
 ENCODING_REGEX = re.compile(br'coding[=:]\s*([-\w.]+)')
 
+# How much of the start of a file is inspected when sniffing its language
+SNIFF_SIZE = 1024
 
-def guess_file_traits(data: bytes) -> typing.Tuple[str, str, typing.Optional[str]]:
+# Modelines as used by vim (vim: set ft=python :) and Emacs (-*- mode: python -*-, or -*- python -*-)
+MODELINE_REGEXES = (
+    re.compile(br'\b(?:vi|vim|ex):.*?\b(?:ft|filetype|syntax)=([-\w+.]+)'),
+    re.compile(br'-\*-.*?\bmode:\s*([-\w+.]+).*?-\*-'),
+    re.compile(br'-\*-\s*([-\w+.]+)\s*-\*-'),
+)
+
+# Signatures at the start of files that identify their language
+MAGIC_LANGUAGES = (
+    (b'<?xml', 'xml'),
+    (b'<?php', 'php'),
+    (b'<!doctype html', 'html'),
+    (b'<html', 'html'),
+)
+
+
+def sniff_language(head: bytes) -> typing.Optional[str]:
+    """
+    Attempts to work out the language of a file from its start,
+    using its shebang, a modeline or a known signature.
+
+    Only the first `SNIFF_SIZE` bytes are inspected. Returns None if nothing matches.
+    """
+
+    head = head[:SNIFF_SIZE]
+
+    if head.startswith(b'#!') and b'\n' in head:
+        language = get_language(head[:head.find(b'\n')].decode('ascii', errors='replace'))
+
+        if language:
+            return language
+
+    # Modelines are only looked for in the first few lines
+    for line in head.split(b'\n', 5)[:5]:
+        for regex in MODELINE_REGEXES:
+            match = regex.search(line)
+
+            if match:
+                language = get_language(match.group(1).decode('ascii', errors='replace'))
+
+                if language:
+                    return language
+
+    start = head.lstrip()[:16].lower()
+
+    for magic, language in MAGIC_LANGUAGES:
+        if start.startswith(magic):
+            return language
+
+    return None
+
+
+def guess_file_traits(data: bytes, head: typing.Optional[bytes] = None) -> typing.Tuple[str, str, typing.Optional[str]]:
     """
     Given the content of a file, attempts to guess its encoding and language.
 
+    If `data` is only part of a file, `head` should be the start of the file,
+    which is where encoding hints and shebangs are looked for.
+
     Returns as a tuple of (content, encoding, language),
     where language may be None.
 
     Raises UnicodeDecodeError if the encoding cannot be guessed.
     """
 
+    if head is None:
+        head = data[:SNIFF_SIZE]
+
     try:
         content = data.decode('utf-8')
         encoding = 'utf-8'
@@ -374,7 +471,7 @@ def guess_file_traits(data: bytes) -> typing.Tuple[str, str, typing.Optional[str
         # there may be a hint as to what the actual encoding is
         # near the start of the file.
 
-        encoding_match = ENCODING_REGEX.search(data[:128])
+        encoding_match = ENCODING_REGEX.search(head[:128])
 
         if encoding_match:
             encoding = encoding_match.group(1)
@@ -387,9 +484,80 @@ def guess_file_traits(data: bytes) -> typing.Tuple[str, str, typing.Optional[str
         except UnicodeDecodeError as exc2:
             raise exc2 from exc
 
-    language = None
+    return content, encoding, sniff_language(head)
+
+
+def stream_file_traits(
+    chunks: typing.Iterable[bytes]
+) -> typing.Tuple[typing.Iterator[str], str, typing.Optional[str]]:
+    """
+    Like `guess_file_traits`, but decodes the data incrementally from an iterable of byte chunks.
+
+    The encoding and language are guessed from the first `SNIFF_SIZE` bytes,
+    and the content is returned as an iterator of lines, which decodes the data as it is consumed.
+    The lines are the same as those from ``content.split('\\n')``.
+
+    Returns as a tuple of (lines, encoding, language),
+    where language may be None.
+
+    Raises UnicodeDecodeError if the encoding cannot be guessed.
+    If UTF-8 was guessed but later data is not valid UTF-8, the rest of the data is decoded using the encoding hint,
+    if there is one. Otherwise, UnicodeDecodeError is raised while consuming the lines.
+    """
+
+    chunk_iterator = iter(chunks)
+    head_chunks: typing.List[bytes] = []
+    head_size = 0
+
+    for chunk in chunk_iterator:
+        head_chunks.append(chunk)
+        head_size += len(chunk)
+
+        if head_size >= SNIFF_SIZE:
+            break
+
+    head = b''.join(head_chunks)
+
+    encoding_match = ENCODING_REGEX.search(head[:128])
+    hinted_encoding = encoding_match.group(1).decode('utf-8') if encoding_match else None
+
+    encoding = 'utf-8'
+    decoder = codecs.getincrementaldecoder(encoding)()
+
+    try:
+        head_content = decoder.decode(head)
+    except UnicodeDecodeError as exc:
+        if hinted_encoding is None:
+            raise
+
+        encoding = hinted_encoding
+        decoder = codecs.getincrementaldecoder(encoding)()
+
+        try:
+            head_content = decoder.decode(head)
+        except UnicodeDecodeError as exc2:
+            raise exc2 from exc
+
+    def decode_lines() -> typing.Iterator[str]:
+        nonlocal decoder
+
+        pending = head_content
+
+        for chunk in chunk_iterator:
+            try:
+                content = decoder.decode(chunk)
+            except UnicodeDecodeError:
+                if encoding != 'utf-8' or hinted_encoding is None:
+                    raise
+
+                # Bytes held back from the last chunk (as part of a character) are decoded again with the hint
+                buffered, _ = decoder.getstate()
+                decoder = codecs.getincrementaldecoder(hinted_encoding)()
+                content = decoder.decode(buffered + chunk)
+
+            *lines, pending = (pending + content).split('\n')
+            yield from lines
 
-    if content.startswith('#!') and '\n' in content:
-        language = get_language(content[:content.find('\n')]) or language
+        yield from (pending + decoder.decode(b'', final=True)).split('\n')
 
-    return content, encoding, language
+    return decode_lines(), encoding, sniff_language(head)
@@ -80,6 +80,34 @@ def format_stddev(collection: typing.Collection[float]) -> str:
     return natural_time(sum(collection) / len(collection))
 
 
+def next_batch_size(batch_size: int, batch_time: float, target: float) -> int:
+    """
+    Adapts a batch size so each batch takes between `target` and twice `target` seconds, similar to timeit's autorange.
+    """
+
+    if batch_time < target:
+        return batch_size * 2
+
+    if batch_time > target * 2 and batch_size > 1:
+        return batch_size // 2
+
+    return batch_size
+
+
+def subtract_overhead(timings: typing.Collection[float], overhead_timings: typing.Collection[float]) -> float:
+    """
+    Estimates the mean of some timings without the mean of a separately measured overhead, never going below 0.
+    """
+
+    if not timings:
+        return 0.0
+
+    if not overhead_timings:
+        return mean_stddev(timings)[0]
+
+    return max(0.0, mean_stddev(timings)[0] - mean_stddev(overhead_timings)[0])
+
+
 BARGRAPH_BLOCKS = (
     (0 / 8, "\N{LEFT ONE EIGHTH BLOCK}"),
     (1 / 8, "\N{LEFT ONE QUARTER BLOCK}"),
@@ -115,3 +143,32 @@ def format_bargraph(value: float, blocks: int) -> str:
     fill = ("\N{FULL BLOCK}" * int(filled_blocks)) + (get_single_bargraph_block(percentage) if percentage > 0.0 else "")
 
     return fill + (" " * (blocks - len(fill)))
+
+
+def percentile(collection: typing.Sequence[float], fraction: float) -> float:
+    """
+    Takes a sorted sequence of floats and returns the value at the given fraction (0 to 1) of it,
+    linearly interpolating between the closest readings.
+    """
+
+    if not collection:
+        raise ValueError("Cannot take the percentile of an empty collection")
+
+    position = (len(collection) - 1) * max(min(fraction, 1.0), 0.0)
+    lower = math.floor(position)
+    upper = math.ceil(position)
+
+    return collection[lower] + (collection[upper] - collection[lower]) * (position - lower)
+
+
+def format_percentiles(collection: typing.Collection[float], fractions: typing.Sequence[float] = (0.5, 0.95, 0.99)) -> str:
+    """
+    Takes a collection of timings and produces a string of the given percentiles and the maximum.
+    """
+
+    ordered = sorted(collection)
+
+    return ", ".join([
+        *(f"p{fraction * 100:g} {natural_time(percentile(ordered, fraction)).strip()}" for fraction in fractions),
+        f"max {natural_time(ordered[-1]).strip()}"
+    ])
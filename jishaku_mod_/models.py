@@ -15,6 +15,8 @@ import copy
 import typing
 
 import discord_mod
+from discord_mod.ext import commands
+from discord_mod.ext.commands.view import StringView
 
 from jishaku_mod_.types import ContextT
 
@@ -28,6 +30,8 @@ async def copy_context_with(
 ) -> ContextT:
     """
     Makes a new :class:`Context` with changed message properties.
+
+    If the author and channel are unchanged, the prefix of the original context is reused instead of being resolved again.
     """
 
     # copy the message and update the attributes
@@ -39,5 +43,70 @@ async def copy_context_with(
     if channel is not None:
         alt_message.channel = channel
 
+    if author is None and channel is None:
+        alt_ctx = reparse_context(ctx, alt_message)
+
+        if alt_ctx is not None:
+            return alt_ctx
+
     # obtain and return a context of the same type
     return await ctx.bot.get_context(alt_message, cls=type(ctx))
+
+
+def reparse_context(ctx: ContextT, message: discord_mod.Message) -> typing.Optional[ContextT]:
+    """
+    Makes a new :class:`Context` for a message from the same author and channel as an existing one, reusing its prefix.
+
+    This skips :meth:`Bot.get_prefix`, which can be slow (e.g. when prefixes are stored in a database),
+    and otherwise does the same as the stock :meth:`Bot.get_context`.
+
+    Returns None if this can't be done, such as when the bot customizes get_context, or the message doesn't start with the prefix.
+    """
+
+    bot = ctx.bot
+
+    # The author and channel decide what the prefix is, so if they change, it must be resolved again
+    if message.author != ctx.message.author or message.channel != ctx.message.channel:
+        return None
+
+    # Bots that override get_context may do more than parse the message
+    if getattr(type(bot), 'get_context', None) is not commands.bot.BotBase.get_context:
+        return None
+
+    if not isinstance(ctx.prefix, str) or not ctx.prefix or not isinstance(message.content, str):
+        return None
+
+    view = StringView(message.content)
+
+    if not view.skip_string(ctx.prefix):
+        return None
+
+    if getattr(bot, 'strip_after_prefix', False):
+        view.skip_ws()
+
+    invoker = view.get_word()
+
+    alt_ctx = type(ctx)(prefix=ctx.prefix, view=view, bot=bot, message=message)
+    alt_ctx.invoked_with = invoker
+    alt_ctx.command = bot.all_commands.get(invoker)
+
+    return alt_ctx
+
+
+def clone_context(ctx: ContextT) -> ContextT:
+    """
+    Makes a shallow copy of a :class:`Context` that can be invoked independently of the original.
+
+    Unlike :func:`copy_context_with`, this doesn't build the context again from its message,
+    so the command is not looked up or parsed again until it is invoked.
+    """
+
+    alt_ctx = copy.copy(ctx)
+
+    # Invoking a context consumes its view and fills in its arguments, so these can't be shared
+    alt_ctx.view = copy.copy(ctx.view)
+    alt_ctx.args = list(ctx.args)
+    alt_ctx.kwargs = dict(ctx.kwargs)
+    alt_ctx.invoked_parents = list(ctx.invoked_parents)
+
+    return alt_ctx
@@ -11,8 +11,19 @@ Functions for managing and searching modules.
 
 """
 
+import asyncio
+import concurrent.futures
+import copy
+import dis
+import importlib.abc
+import importlib.machinery
 import importlib.metadata
+import importlib.util
+import logging
 import pathlib
+import sys
+import time
+import types
 import typing
 
 from braceexpand import braceexpand
@@ -20,7 +31,7 @@ from discord_mod.ext import commands
 
 from jishaku_mod_.types import BotT, ContextA
 
-__all__ = ('find_extensions_in', 'resolve_extensions', 'package_version', 'ExtensionConverter')
+__all__ = ('find_extensions_in', 'resolve_extensions', 'package_version', 'ExtensionConverter', 'find_imports', 'ExtensionPreloader')
 
 
 if typing.TYPE_CHECKING:
@@ -28,6 +39,8 @@ if typing.TYPE_CHECKING:
 else:
     from braceexpand import UnbalancedBracesError
 
+LOGGER = logging.getLogger('jishaku.modules')
+
 _ExtensionConverterBase = commands.Converter[typing.List[str]]
 
 
@@ -112,3 +125,220 @@ class ExtensionConverter(_ExtensionConverterBase):  # pylint: disable=too-few-pu
             return resolve_extensions(ctx.bot, argument)
         except UnbalancedBracesError as exc:
             raise commands.BadArgument(str(exc))
+
+
+def find_imports(code: types.CodeType, package: typing.Optional[str] = None, nested: bool = True) -> typing.Set[str]:
+    """
+    Finds the names of every module that some code may import, including imports inside of functions unless `nested` is False.
+
+    Relative imports are resolved against `package`. Names imported with ``from`` are included as possible submodules,
+    so ``from foo import bar`` yields both ``foo`` and ``foo.bar``.
+    """
+
+    names: typing.Set[str] = set()
+    stack = [code]
+
+    while stack:
+        current = stack.pop()
+        instructions = list(dis.get_instructions(current))
+
+        for index, instruction in enumerate(instructions):
+            if instruction.opname != 'IMPORT_NAME':
+                continue
+
+            # Imports are compiled as LOAD_CONST level, LOAD_CONST fromlist, IMPORT_NAME name
+            level = 0
+            fromlist: typing.Tuple[str, ...] = ()
+
+            if index >= 2 and instructions[index - 2].opname in ('LOAD_CONST', 'LOAD_SMALL_INT'):
+                level = instructions[index - 2].argval or 0
+            if index >= 1 and instructions[index - 1].opname == 'LOAD_CONST':
+                fromlist = instructions[index - 1].argval or ()
+
+            name = instruction.argval
+
+            if level:
+                try:
+                    name = importlib.util.resolve_name('.' * level + name, package)
+                except (ImportError, ValueError):
+                    continue
+
+            names.add(name)
+            names.update(f"{name}.{item}" for item in fromlist if item != '*')
+
+        if nested:
+            stack.extend(const for const in current.co_consts if isinstance(const, types.CodeType))
+
+    return names
+
+
+class PrecompiledLoader(importlib.abc.Loader):
+    """
+    A loader that executes code compiled ahead of time, deferring everything else to the loader that found the module.
+    """
+
+    def __init__(self, loader: importlib.abc.Loader, code: types.CodeType):
+        self.loader = loader
+        self.code = code
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> typing.Optional[types.ModuleType]:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: types.ModuleType) -> None:
+        exec(self.code, module.__dict__)  # pylint: disable=exec-used
+
+    def __getattr__(self, name: str) -> typing.Any:
+        return getattr(self.loader, name)
+
+
+class PreparedExtension(typing.NamedTuple):
+    """
+    An extension that has been found and compiled by an ExtensionPreloader.
+    """
+
+    name: str
+    spec: typing.Optional[importlib.machinery.ModuleSpec]
+    code: typing.Optional[types.CodeType]
+    dependencies: typing.Tuple[str, ...]
+    duration: float
+
+
+class ExtensionPreloader(importlib.abc.MetaPathFinder):
+    """
+    Prepares a set of extensions to be loaded, doing the work of importing them on a thread pool.
+
+    For each extension, this finds and compiles its module, and imports the modules it depends on that aren't imported yet.
+    While active as a context manager, the compiled code is handed to the import system, so loading the extension
+    only has to execute it.
+
+    Dependencies between the extensions are found from their imports, and `waves` orders the extensions so
+    each is only loaded after the extensions it imports.
+
+    Only imports made at the top level of an extension are done ahead of time, as imports inside of functions may be deliberately lazy.
+    Importing a module off of the main thread can fail where it wouldn't otherwise, so errors while preparing are logged,
+    and the import is simply done again when the extension is loaded.
+    """
+
+    def __init__(self, names: typing.Iterable[str]):
+        self.names = list(dict.fromkeys(names))
+        self.prepared: typing.Dict[str, PreparedExtension] = {}
+
+    def owns(self, module: str) -> bool:
+        """
+        Is this module one of the extensions, or part of one of them?
+        """
+
+        return any(module == name or module.startswith(f"{name}.") for name in self.names)
+
+    def prepare(self, name: str) -> PreparedExtension:
+        """
+        Finds and compiles an extension, and imports its dependencies. This is run on the thread pool.
+        """
+
+        start = time.perf_counter()
+        spec = code = None
+        dependencies: typing.Tuple[str, ...] = ()
+
+        try:
+            spec = importlib.util.find_spec(name)
+            loader = spec and spec.loader
+
+            # Extensions loaded by an earlier preloader keep its loader in their spec
+            if isinstance(loader, PrecompiledLoader):
+                spec = copy.copy(spec)
+                spec.loader = loader = loader.loader  # type: ignore
+
+            if loader is not None and hasattr(loader, 'get_code'):
+                code = loader.get_code(name)  # type: ignore
+
+            if spec is not None and code is not None:
+                imports = find_imports(code, spec.parent)
+                dependencies = tuple(sorted(imports.intersection(self.names) - {name}))
+
+                for module in sorted(find_imports(code, spec.parent, nested=False)):
+                    # Modules within extensions are removed from sys.modules when they are reloaded anyway
+                    if module in sys.modules or self.owns(module):
+                        continue
+
+                    # Names imported with `from` may be attributes rather than submodules
+                    parent = module.rpartition('.')[0]
+
+                    if parent and not hasattr(sys.modules.get(parent), '__path__'):
+                        continue
+
+                    try:
+                        if importlib.util.find_spec(module) is None:
+                            continue
+
+                        importlib.import_module(module)
+                    except ImportError:
+                        # Optional dependencies are often imported in a try block, so this isn't necessarily a problem
+                        LOGGER.debug("Could not import %s while preparing extension %s", module, name, exc_info=True)
+                    except Exception:  # pylint: disable=broad-except
+                        LOGGER.warning("Failed to import %s while preparing extension %s", module, name, exc_info=True)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.warning("Failed to prepare extension %s, it will be loaded normally", name, exc_info=True)
+            spec = code = None
+
+        return PreparedExtension(name, spec, code, dependencies, time.perf_counter() - start)
+
+    async def prepare_all(self, max_workers: typing.Optional[int] = None):
+        """
+        Prepares every extension, up to `max_workers` at a time.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix='jishaku-preloader') as executor:
+            for prepared in await asyncio.gather(*(
+                loop.run_in_executor(executor, self.prepare, name) for name in self.names
+            )):
+                self.prepared[prepared.name] = prepared
+
+    def waves(self) -> typing.List[typing.List[str]]:
+        """
+        Groups the extensions into waves, where every extension only depends on extensions in earlier waves.
+
+        Extensions that depend on each other in a cycle are put together in a final wave.
+        """
+
+        pending = {
+            name: set(self.prepared[name].dependencies) if name in self.prepared else set()
+            for name in self.names
+        }
+        waves: typing.List[typing.List[str]] = []
+
+        while pending:
+            wave = [name for name, dependencies in pending.items() if not dependencies.intersection(pending)]
+
+            if not wave:
+                wave = list(pending)
+
+            waves.append(wave)
+
+            for name in wave:
+                del pending[name]
+
+        return waves
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: typing.Optional[typing.Sequence[str]] = None,
+        target: typing.Optional[types.ModuleType] = None
+    ) -> typing.Optional[importlib.machinery.ModuleSpec]:
+        prepared = self.prepared.get(fullname)
+
+        if prepared is None or prepared.spec is None or prepared.code is None:
+            return None
+
+        spec = copy.copy(prepared.spec)
+        spec.loader = PrecompiledLoader(prepared.spec.loader, prepared.code)  # type: ignore
+        return spec
+
+    def __enter__(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, *_):
+        sys.meta_path.remove(self)
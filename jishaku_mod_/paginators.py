@@ -14,14 +14,17 @@ Paginator-related tools and interfaces for Jishaku.
 from __future__ import annotations
 
 import asyncio
+import functools
+import itertools
 import typing
 
 import discord_mod
 from discord_mod import ui
 from discord_mod.ext import commands
 
+from jishaku_mod_.files import MappedFile
 from jishaku_mod_.flags import Flags
-from jishaku_mod_.hljs import get_language, guess_file_traits
+from jishaku_mod_.hljs import get_language, guess_file_traits, stream_file_traits
 from jishaku_mod_.types import BotT, ContextA
 
 if typing.TYPE_CHECKING:
@@ -66,41 +69,39 @@ class WrappedPaginator(commands.Paginator):
 
     def add_line(self, line: str = '', *, empty: bool = False):
         true_max_size = self.max_size - self._prefix_len - self._suffix_len - 2 * self._linesep_len
+        # Delimiters are matched against single characters
+        delimiters = [delimiter for delimiter in self.wrap_on if len(delimiter) == 1]
+        wrap_on_space = ' ' not in delimiters
         start = 0
-        needle = 0
-        last_delimiter = -1
-        last_space = -1
-
-        while needle < len(line):
-            if needle - start >= true_max_size:
-                if last_delimiter != -1:
-                    if self.include_wrapped and line[last_delimiter] != '\n':
-                        super().add_line(line[start:last_delimiter + 1])
-                        needle = last_delimiter + 1
-                        start = last_delimiter + 1
-                    else:
-                        super().add_line(line[start:last_delimiter])
-                        needle = last_delimiter + 1
-                        start = last_delimiter + 1
-                elif last_space != -1:
-                    super().add_line(line[start:last_space])
-                    needle = last_space + 1
-                    start = last_space
+        # When a line is wrapped on a space, the next line starts with it, so it must not be wrapped on again
+        space_offset = 0
+
+        while len(line) - start > true_max_size:
+            end = start + true_max_size
+            last_delimiter = max((line.rfind(delimiter, start, end) for delimiter in delimiters), default=-1)
+
+            if last_delimiter != -1:
+                if self.include_wrapped and line[last_delimiter] != '\n':
+                    super().add_line(line[start:last_delimiter + 1])
                 else:
-                    super().add_line(line[start:needle])
-                    start = needle
+                    super().add_line(line[start:last_delimiter])
 
-                last_delimiter = -1
-                last_space = -1
+                start = last_delimiter + 1
+                space_offset = 0
+                continue
 
-            if line[needle] in self.wrap_on:
-                last_delimiter = needle
-            elif line[needle] == ' ':
-                last_space = needle
+            last_space = line.rfind(' ', start + space_offset, end) if wrap_on_space else -1
 
-            needle += 1
+            if last_space != -1:
+                super().add_line(line[start:last_space])
+                start = last_space
+                space_offset = 1
+            else:
+                super().add_line(line[start:end])
+                start = end
+                space_offset = 0
 
-        last_line = line[start:needle]
+        last_line = line[start:]
         if last_line:
             super().add_line(last_line)
 
@@ -117,14 +118,23 @@ class FilePaginator(commands.Paginator):
     -----------
     fp
         A file-like (implements ``fp.read``) to read the data for this paginator from.
+        It is read and decoded in chunks, so the whole content is never held in memory at once.
     line_span: Optional[Tuple[int, int]]
         A linespan to read from the file. If None, reads the whole file.
     language_hints: Tuple[str, ...]
         A tuple of strings that may hint to the language of this file.
         This could include filenames, MIME types, or shebangs.
         A shebang present in the actual file will always be prioritized over this.
+
+    When a linespan is given and `fp` is a real file, the file is memory mapped,
+    so only the requested lines and the start of the file are read.
     """
 
+    # How much of the start of a file is inspected for encoding hints and shebangs when only part of it is read
+    head_size = 4096
+    # How much of a file is read and decoded at a time when reading through it
+    chunk_size = 64 * 1024
+
     def __init__(
         self,
         fp: typing.BinaryIO,
@@ -146,24 +156,44 @@ class FilePaginator(commands.Paginator):
             except AttributeError:
                 pass
 
-        content, _, file_language = guess_file_traits(fp.read())
-
-        language = file_language or language
-        lines = content.split('\n')
-
-        super().__init__(prefix=f'```{language}', suffix='```', **kwargs)
-
         if line_span:
             if line_span[1] < line_span[0]:
                 line_span = (line_span[1], line_span[0])
 
-            if line_span[0] < 1 or line_span[1] > len(lines):
+            if line_span[0] < 1:
                 raise ValueError("Linespan goes out of bounds.")
 
-            lines = lines[line_span[0] - 1:line_span[1]]
+        mapped = MappedFile.open(fp) if line_span else None
+        lines: typing.Iterable[str]
+
+        if mapped is not None:
+            # Only the requested lines and the start of the file need to be read
+            with mapped:
+                content, _, file_language = guess_file_traits(
+                    mapped.read_lines(*line_span),  # type: ignore
+                    head=mapped.mapping[:self.head_size]
+                )
+
+            lines = content.split('\n')
+        else:
+            # The file is decoded as its lines are added, so it's never held in memory as a whole
+            lines, _, file_language = stream_file_traits(iter(functools.partial(fp.read, self.chunk_size), b''))
+
+            if line_span:
+                lines = itertools.islice(lines, line_span[0] - 1, line_span[1])
+
+        language = file_language or language
+
+        super().__init__(prefix=f'```{language}', suffix='```', **kwargs)
+
+        line_count = 0
 
         for line in lines:
             self.add_line(line)
+            line_count += 1
+
+        if line_span and line_count != line_span[1] - line_span[0] + 1:
+            raise ValueError("Linespan goes out of bounds.")
 
 
 class WrappedFilePaginator(FilePaginator, WrappedPaginator):
@@ -381,22 +411,49 @@ class PaginatorInterface(ui.View):  # pylint: disable=too-many-instance-attribut
         # pylint: disable=protected-access
         paginator_pages = list(self.paginator._pages)  # type: ignore
         if len(self.paginator._current_page) > 1:  # type: ignore
-            paginator_pages.append(
-                '\n'.join(self.paginator._current_page)  # type: ignore
-                + '\n'
-                + (self.paginator.suffix or '')
-            )
+            paginator_pages.append(self.render_current_page())
         # pylint: enable=protected-access
 
         return paginator_pages
 
+    def render_current_page(self) -> str:
+        """
+        Renders the paginator's active page without closing it.
+        """
+
+        # pylint: disable=protected-access
+        return (
+            '\n'.join(self.paginator._current_page)  # type: ignore
+            + '\n'
+            + (self.paginator.suffix or '')
+        )
+        # pylint: enable=protected-access
+
+    def get_page(self, index: int) -> str:
+        """
+        Returns a single page of the paginator.
+
+        Unlike indexing `pages`, this only renders the page being asked for.
+        """
+
+        # pylint: disable=protected-access
+        closed_pages: typing.List[str] = self.paginator._pages  # type: ignore
+        # pylint: enable=protected-access
+
+        if index < len(closed_pages):
+            return closed_pages[index]
+
+        return self.render_current_page()
+
     @property
     def page_count(self):
         """
         Returns the page count of the internal paginator.
         """
 
-        return len(self.pages)
+        # pylint: disable=protected-access
+        return len(self.paginator._pages) + (1 if len(self.paginator._current_page) > 1 else 0)  # type: ignore
+        # pylint: enable=protected-access
 
     @property
     def display_page(self):
@@ -436,7 +493,7 @@ class PaginatorInterface(ui.View):  # pylint: disable=too-many-instance-attribut
         it should be a dict containing 'content', 'embed' or both.
         """
 
-        content = self.pages[self.display_page]
+        content = self.get_page(self.display_page)
         return {'content': content, 'view': self}
 
     async def add_line(self, *args: typing.Any, **kwargs: typing.Any):
@@ -459,6 +516,27 @@ class PaginatorInterface(ui.View):  # pylint: disable=too-many-instance-attribut
         # Unconditionally set send lock to try and guarantee page updates on unfocused pages
         self.send_lock.set()
 
+    async def add_lines(self, lines: typing.Iterable[str], *, follow: bool = True, **kwargs: typing.Any):
+        """
+        Like `add_line`, but adds many lines at once, triggering only a single update.
+
+        If `follow` is False, the interface stays on its current page even if it was on the last one.
+        Other keyword arguments are passed to the paginator's `add_line` for each line.
+        """
+
+        display_page = self.display_page
+        page_count = self.page_count
+
+        for line in lines:
+            self.paginator.add_line(line, **kwargs)
+
+        # An empty paginator counts as being on its last page, so the first batch is followed too
+        if follow and display_page >= page_count - 1:
+            # To keep position fixed on the end, update position to new last page and update message.
+            self._display_page = self.page_count
+
+        self.send_lock.set()
+
     async def send_to(self, destination: discord_mod.abc.Messageable):
         """
         Sends a message to the given destination with this interface.
@@ -489,15 +567,60 @@ class PaginatorInterface(ui.View):  # pylint: disable=too-many-instance-attribut
             return False
         return self.task.done()
 
+    # The bounds on how long to wait after an update before editing the message, so further updates can be coalesced
+    min_update_delay = 0.1
+    max_update_delay = 5.0
+    # The delay used when the ratelimit for editing the message isn't known yet
+    default_update_delay = 1.0
+
+    def update_delay(self) -> float:
+        """
+        Works out how long to wait before editing the message, based on the state of its ratelimit bucket.
+
+        The remaining edits in the current ratelimit window are spread evenly over it,
+        so fast updates are coalesced instead of queueing up behind the ratelimit.
+        """
+
+        if not self.message:
+            return self.default_update_delay
+
+        try:
+            # pylint: disable=protected-access
+            http = self.bot.http
+            route = discord_mod.http.Route(
+                'PATCH', '/channels/{channel_id}/messages/{message_id}',
+                channel_id=self.message.channel.id, message_id=self.message.id
+            )
+            bucket_hash = http._bucket_hashes.get(route.key)  # type: ignore
+            ratelimit = http._buckets.get(f'{bucket_hash or route.key}:{route.major_parameters}')  # type: ignore
+            # pylint: enable=protected-access
+        except AttributeError:
+            # Not all forks implement ratelimits the same way
+            ratelimit = None
+
+        if ratelimit is None or ratelimit.expires is None:  # type: ignore
+            return self.default_update_delay
+
+        window = ratelimit.expires - self.bot.loop.time()  # type: ignore
+
+        if window <= 0:
+            delay = self.min_update_delay
+        elif ratelimit.remaining <= 0:  # type: ignore
+            delay = window
+        else:
+            delay = window / ratelimit.remaining  # type: ignore
+
+        return max(self.min_update_delay, min(self.max_update_delay, delay))
+
     async def send_lock_delayed(self):
         """
-        A coroutine that returns 1 second after the send lock has been released
-        This helps reduce release spam that hits rate limits quickly
+        A coroutine that returns a short time after the send lock has been released.
+        The delay is derived from the message's edit ratelimit, which coalesces bursts of updates into one edit.
         """
 
         gathered = await self.send_lock.wait()
         self.send_lock.clear()
-        await asyncio.sleep(1)
+        await asyncio.sleep(self.update_delay())
         return gathered
 
     async def wait_loop(self):
@@ -654,7 +777,7 @@ class PaginatorEmbedInterface(PaginatorInterface):
 
     @property
     def send_kwargs(self) -> typing.Dict[str, typing.Any]:
-        self._embed.description = self.pages[self.display_page]
+        self._embed.description = self.get_page(self.display_page)
         return {'embed': self._embed, 'view': self}
 
     max_page_size = 2048
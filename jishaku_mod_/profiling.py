@@ -0,0 +1,1025 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.profiling
+~~~~~~~~~~~~~~~~~
+
+Tools for profiling a running bot.
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import copy
+import cProfile
+import importlib.abc
+import importlib.machinery
+import inspect
+import io
+import logging
+import marshal
+import pstats
+import sys
+import threading
+import time
+import types
+import typing
+
+import aiohttp
+
+from jishaku_mod_.math import natural_time
+
+__all__ = ('StackSampler', 'LoopLagMonitor', 'SlowCallback', 'ImportProfiler', 'ImportTiming', 'InvocationProfile', 'RequestTiming',
+           'RequestTracer', 'RequestTrace', 'HeartbeatMonitor')
+
+
+TRUNCATED_KEY = '[truncated]'
+
+
+class StackSampler:
+    """
+    A sampling profiler that periodically records the stacks of every thread from a background thread.
+
+    Samples are aggregated into collapsed stacks (compatible with flamegraph tools),
+    as well as per-function self and cumulative sample counts.
+    Each aggregation table is capped at ``max_entries`` distinct keys, with further keys counted under ``[truncated]``.
+
+    Example
+    -------
+
+    .. code:: python3
+
+        with StackSampler(interval=0.005) as sampler:
+            await asyncio.sleep(10)
+
+        print(sampler.collapsed())
+    """
+
+    def __init__(self, interval: float = 0.005, max_entries: int = 10_000, max_depth: int = 128):
+        self.interval = interval
+        self.max_entries = max_entries
+        self.max_depth = max_depth
+
+        self.stacks: typing.Counter[str] = collections.Counter()
+        self.self_counts: typing.Counter[str] = collections.Counter()
+        self.cumulative_counts: typing.Counter[str] = collections.Counter()
+        self.sample_count: int = 0
+        self.duration: float = 0.0
+
+        self._labels: typing.Dict[types.CodeType, str] = {}
+        self._stop_event = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @staticmethod
+    def _increment(counter: typing.Counter[str], key: str, limit: int):
+        if key in counter or len(counter) < limit:
+            counter[key] += 1
+        else:
+            counter[TRUNCATED_KEY] += 1
+
+    def label(self, code: types.CodeType) -> str:
+        """
+        Returns a human-readable label for a code object, in the form ``name (file:line)``.
+        """
+
+        try:
+            return self._labels[code]
+        except KeyError:
+            if len(self._labels) >= self.max_entries:
+                self._labels.clear()
+
+            label = self._labels[code] = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            return label
+
+    def sample(self):
+        """
+        Takes a single sample of the stacks of every thread other than the sampler itself.
+        """
+
+        own_ident = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():  # pylint: disable=protected-access
+            if ident == own_ident:
+                continue
+
+            labels: typing.List[str] = []
+            current: typing.Optional[types.FrameType] = frame
+
+            while current is not None and len(labels) < self.max_depth:
+                labels.append(self.label(current.f_code))
+                current = current.f_back
+
+            if not labels:
+                continue
+
+            labels.append(thread_names.get(ident, f"Thread-{ident}"))
+            labels.reverse()
+
+            self._increment(self.stacks, ';'.join(labels), self.max_entries)
+            self._increment(self.self_counts, labels[-1], self.max_entries)
+
+            # Recursive functions only count once per sample
+            for label in set(labels[1:]):
+                self._increment(self.cumulative_counts, label, self.max_entries)
+
+        self.sample_count += 1
+
+    def run(self):
+        """
+        The sampling loop. This is run on a background thread by `start`.
+        """
+
+        start = time.perf_counter()
+
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+        self.duration += time.perf_counter() - start
+
+    def start(self):
+        """
+        Starts sampling on a background thread.
+        """
+
+        if self._thread is not None:
+            raise RuntimeError("This sampler has already been started")
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, name="jishaku-stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops sampling and waits for the background thread to finish.
+        """
+
+        self._stop_event.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def collapsed(self) -> str:
+        """
+        Returns the sampled stacks in collapsed stack format, one ``frame;frame;frame count`` per line.
+
+        This can be given directly to tools like flamegraph.pl, inferno or speedscope.
+        """
+
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top(self, count: int = 25) -> typing.List[typing.Tuple[str, int, int]]:
+        """
+        Returns the functions with the most samples as a list of (label, self samples, cumulative samples).
+
+        Functions are sorted by self samples, then cumulative samples.
+        """
+
+        labels = set(self.self_counts) | set(self.cumulative_counts)
+
+        ranked = sorted(
+            ((label, self.self_counts[label], self.cumulative_counts[label]) for label in labels),
+            key=lambda entry: (entry[1], entry[2]),
+            reverse=True
+        )
+
+        return ranked[:count]
+
+
+class SlowCallback(typing.NamedTuple):
+    """
+    A callback that was reported by asyncio debug mode as having blocked the event loop.
+    """
+
+    timestamp: float
+    duration: float
+    description: str
+
+
+class SlowCallbackHandler(logging.Handler):
+    """
+    A logging handler that captures asyncio's slow callback warnings into a ring buffer.
+    """
+
+    def __init__(self, buffer: 'collections.deque[SlowCallback]'):
+        super().__init__(logging.WARNING)
+        self.buffer = buffer
+
+    def emit(self, record: logging.LogRecord):
+        # asyncio logs these as 'Executing %s took %.3f seconds'
+        if not isinstance(record.msg, str) or not record.msg.startswith('Executing ') or not isinstance(record.args, tuple) or len(record.args) != 2:
+            return
+
+        description, duration = record.args
+        self.buffer.append(SlowCallback(record.created, float(duration), str(description)))  # type: ignore
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag by repeatedly sleeping and recording how late each wakeup is.
+
+    Lag samples are kept in a bounded window for percentiles, and counted into power-of-two millisecond buckets for a histogram.
+
+    Optionally, asyncio debug mode can be enabled, in which case callbacks that block the loop for longer than
+    ``slow_callback_duration`` are captured into a ring buffer along with their source location.
+    """
+
+    # Upper bounds in seconds of the histogram buckets, with a final bucket catching anything longer
+    BUCKETS: typing.Tuple[float, ...] = tuple(2 ** power / 1000 for power in range(0, 12))
+
+    def __init__(self, interval: float = 0.1, window: int = 6000, slow_callback_buffer: int = 50):
+        self.interval = interval
+        self.samples: 'collections.deque[float]' = collections.deque(maxlen=window)
+        self.histogram: typing.List[int] = [0] * (len(self.BUCKETS) + 1)
+        self.slow_callbacks: 'collections.deque[SlowCallback]' = collections.deque(maxlen=slow_callback_buffer)
+
+        self.task: typing.Optional['asyncio.Task[None]'] = None
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._handler: typing.Optional[SlowCallbackHandler] = None
+        self._previous_debug: typing.Optional[typing.Tuple[bool, float]] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Is the lag sampler currently running?
+        """
+
+        return self.task is not None and not self.task.done()
+
+    @property
+    def debugging(self) -> bool:
+        """
+        Is slow callback capture currently enabled?
+        """
+
+        return self._handler is not None
+
+    def record(self, lag: float):
+        """
+        Records a single lag sample.
+        """
+
+        self.samples.append(lag)
+
+        for index, bound in enumerate(self.BUCKETS):
+            if lag <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def reset(self):
+        """
+        Clears all recorded samples and slow callbacks.
+        """
+
+        self.samples.clear()
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+        self.slow_callbacks.clear()
+
+    async def run(self):
+        """
+        The sampling loop. This is run as a task by `start`.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - expected))
+
+    def start(self, loop: typing.Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Starts the lag sampler on the given (or running) loop.
+        """
+
+        if self.running:
+            return
+
+        self._loop = loop or asyncio.get_running_loop()
+        self.task = self._loop.create_task(self.run())
+
+    def stop(self):
+        """
+        Stops the lag sampler and disables slow callback capture.
+        """
+
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+        self.disable_debug()
+
+    def enable_debug(self, threshold: float = 0.1, loop: typing.Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Enables asyncio debug mode, capturing callbacks that take longer than `threshold` seconds.
+
+        Debug mode adds overhead to every callback, so it should not be left on indefinitely.
+        """
+
+        self._loop = loop or self._loop or asyncio.get_running_loop()
+
+        if self._previous_debug is None:
+            self._previous_debug = (self._loop.get_debug(), self._loop.slow_callback_duration)  # type: ignore
+
+        self._loop.set_debug(True)
+        self._loop.slow_callback_duration = threshold  # type: ignore
+
+        if self._handler is None:
+            self._handler = SlowCallbackHandler(self.slow_callbacks)
+            logging.getLogger('asyncio').addHandler(self._handler)
+
+    def disable_debug(self):
+        """
+        Disables slow callback capture, restoring the previous asyncio debug settings.
+        """
+
+        if self._handler is not None:
+            logging.getLogger('asyncio').removeHandler(self._handler)
+            self._handler = None
+
+        if self._loop is not None and self._previous_debug is not None:
+            self._loop.set_debug(self._previous_debug[0])
+            self._loop.slow_callback_duration = self._previous_debug[1]  # type: ignore
+            self._previous_debug = None
+
+
+class ImportTiming:
+    """
+    The time taken to import a single module, as part of a tree of the modules imported while it was executing.
+    """
+
+    def __init__(self, name: str, parent: typing.Optional['ImportTiming'] = None):
+        self.name = name
+        self.parent = parent
+        self.children: typing.List['ImportTiming'] = []
+        self.cumulative: float = 0.0
+
+    @property
+    def self_time(self) -> float:
+        """
+        The time spent executing this module, excluding the modules it imported.
+        """
+
+        return self.cumulative - sum(child.cumulative for child in self.children)
+
+    @property
+    def depth(self) -> int:
+        """
+        How many modules deep in the tree this module was imported.
+        """
+
+        return 0 if self.parent is None else self.parent.depth + 1
+
+
+class TimedLoader(importlib.abc.Loader):
+    """
+    A loader that times executing a module for an ImportProfiler, deferring everything else to the loader that found the module.
+    """
+
+    def __init__(self, profiler: 'ImportProfiler', loader: importlib.abc.Loader):
+        self.profiler = profiler
+        self.loader = loader
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> typing.Optional[types.ModuleType]:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: types.ModuleType) -> None:
+        # The module should only ever see its real loader
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+
+        with self.profiler.timing(module.__name__):
+            self.loader.exec_module(module)
+
+    def __getattr__(self, name: str) -> typing.Any:
+        return getattr(self.loader, name)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """
+    Records how long each module imported while it is active takes to execute, similar to ``python -X importtime``.
+
+    This sits at the front of ``sys.meta_path``, timing the loaders that the other finders return.
+    This includes extensions loaded by the bot, as they are executed through the loader of the spec they are found with.
+    Time spent finding a module counts towards the module that imported it.
+    Modules imported on other threads form their own trees.
+
+    Example
+    -------
+
+    .. code:: python3
+
+        with ImportProfiler() as profiler:
+            await bot.load_extension('cogs.music')
+
+        print('\\n'.join(profiler.format()))
+    """
+
+    def __init__(self):
+        self.roots: typing.List[ImportTiming] = []
+        self.timings: typing.List[ImportTiming] = []
+        self._local = threading.local()
+
+    @property
+    def _stack(self) -> typing.List[ImportTiming]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+            return stack
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: typing.Optional[typing.Sequence[str]] = None,
+        target: typing.Optional[types.ModuleType] = None
+    ) -> typing.Optional[importlib.machinery.ModuleSpec]:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)  # type: ignore
+
+            if spec is None:
+                continue
+
+            if spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+                return spec
+
+            spec = copy.copy(spec)
+            spec.loader = TimedLoader(self, spec.loader)  # type: ignore
+            return spec
+
+        return None
+
+    @contextlib.contextmanager
+    def timing(self, name: str) -> typing.Iterator[ImportTiming]:
+        """
+        A context manager that times the execution of a module, nesting it under the module being executed.
+        """
+
+        stack = self._stack
+        parent = stack[-1] if stack else None
+
+        timing = ImportTiming(name, parent)
+        (parent.children if parent else self.roots).append(timing)
+        self.timings.append(timing)
+
+        stack.append(timing)
+        start = time.perf_counter()
+
+        try:
+            yield timing
+        finally:
+            timing.cumulative = time.perf_counter() - start
+            stack.pop()
+
+    def start(self):
+        """
+        Starts timing imports.
+
+        If the profiler is already running, it is moved back to the front of ``sys.meta_path``,
+        so it can time modules found by finders that were added after it.
+        """
+
+        self.stop()
+        sys.meta_path.insert(0, self)
+
+    def stop(self):
+        """
+        Stops timing imports. Timings already recorded are kept.
+        """
+
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def slowest(self, count: int = 25) -> typing.List[ImportTiming]:
+        """
+        Returns the modules that took the longest to import, including the modules they imported.
+        """
+
+        return sorted(self.timings, key=lambda timing: timing.cumulative, reverse=True)[:count]
+
+    def format(self, count: int = 25) -> typing.List[str]:
+        """
+        Renders the `count` slowest imports as a tree of self and cumulative times, slowest first.
+
+        The modules that imported each of these are always shown, so the tree stays connected.
+        """
+
+        shown: typing.Set[int] = set()
+
+        for timing in self.slowest(count):
+            current: typing.Optional[ImportTiming] = timing
+
+            while current is not None and id(current) not in shown:
+                shown.add(id(current))
+                current = current.parent
+
+        lines = [f"{'self':>9} {'cumulative':>10}  module"]
+        stack = sorted(self.roots, key=lambda timing: timing.cumulative)
+
+        while stack:
+            timing = stack.pop()
+
+            if id(timing) not in shown:
+                continue
+
+            lines.append(f"{natural_time(timing.self_time)} {natural_time(timing.cumulative):>10}  {'  ' * timing.depth}{timing.name}")
+            stack.extend(sorted(timing.children, key=lambda child: child.cumulative))
+
+        return lines
+
+
+CURRENT_PROFILE: 'contextvars.ContextVar[typing.Optional[InvocationProfile]]' = contextvars.ContextVar('jishaku_invocation_profile', default=None)
+CURRENT_REQUEST: 'contextvars.ContextVar[typing.Optional[RequestTiming]]' = contextvars.ContextVar('jishaku_request_timing', default=None)
+
+# (id of target, attribute name) -> (target, original value, whether the target defined it itself, number of users)
+_HOOKS: typing.Dict[typing.Tuple[int, str], typing.Tuple[typing.Any, typing.Any, bool, int]] = {}
+
+
+def install_hook(target: typing.Any, name: str, make_wrapper: typing.Callable[[typing.Any], typing.Any]):
+    """
+    Replaces an attribute with a wrapper of it, or shares the wrapper already installed there.
+
+    Hooks are reference counted, so overlapping profiles don't restore each other's hooks out of order.
+    """
+
+    key = (id(target), name)
+
+    if key in _HOOKS:
+        target, original, owned, users = _HOOKS[key]
+        _HOOKS[key] = (target, original, owned, users + 1)
+        return
+
+    original = getattr(target, name)
+    _HOOKS[key] = (target, original, name in vars(target), 1)
+    setattr(target, name, make_wrapper(original))
+
+
+def uninstall_hook(target: typing.Any, name: str):
+    """
+    Releases a hook installed with install_hook, restoring the original attribute once nothing uses it.
+    """
+
+    key = (id(target), name)
+    target, original, owned, users = _HOOKS[key]
+
+    if users > 1:
+        _HOOKS[key] = (target, original, owned, users - 1)
+        return
+
+    del _HOOKS[key]
+
+    if owned:
+        setattr(target, name, original)
+    else:
+        delattr(target, name)
+
+
+class RequestTiming:
+    """
+    The timing of a single HTTP request made during a profiled invocation.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.start = time.perf_counter()
+        self.acquired: typing.Optional[float] = None
+        self.end: typing.Optional[float] = None
+
+    @property
+    def waiting(self) -> float:
+        """
+        The time spent waiting for the ratelimit before the request was sent.
+        """
+
+        return (self.acquired or self.start) - self.start
+
+    @property
+    def wire(self) -> float:
+        """
+        The time spent from sending the request to receiving the response, including any retries.
+        """
+
+        return (self.end or self.start) - (self.acquired or self.start)
+
+
+class InvocationProfile:
+    """
+    Tallies where the time of a single command invocation goes.
+
+    While active, this records:
+        - a cProfile of the event loop thread (other tasks running at the same time are included)
+        - each HTTP request made through the HTTP client, split into time waiting on ratelimits and time on the wire
+        - time spent in the checks and converters of the command
+
+    The hooks used for this only record calls made from the task that activated the profile, and tasks it creates.
+    """
+
+    def __init__(self):
+        self.requests: typing.List[RequestTiming] = []
+        self.stage_times: typing.DefaultDict[str, float] = collections.defaultdict(float)
+        self.stage_counts: typing.Counter[str] = collections.Counter()
+        self.profile: typing.Optional[cProfile.Profile] = None
+        self.duration: float = 0.0
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> typing.Iterator[None]:
+        """
+        Adds the time spent inside of this context manager to a named stage.
+        """
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.stage_times[name] += time.perf_counter() - start
+            self.stage_counts[name] += 1
+
+    @staticmethod
+    def wrap_stage(name: str) -> typing.Callable[[typing.Any], typing.Any]:
+        """
+        Makes a hook that times calls to a function as a stage of the current profile.
+        """
+
+        def make_wrapper(original: typing.Any) -> typing.Any:
+            async def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+                profile = CURRENT_PROFILE.get()
+
+                if profile is None:
+                    result = original(*args, **kwargs)
+                    return await result if inspect.isawaitable(result) else result
+
+                with profile.stage(name):
+                    result = original(*args, **kwargs)
+                    return await result if inspect.isawaitable(result) else result
+
+            return wrapper
+
+        return make_wrapper
+
+    @staticmethod
+    def wrap_request(original: typing.Any) -> typing.Any:
+        """
+        Makes a hook for an HTTP client's request method, recording a RequestTiming for each request.
+        """
+
+        async def request(route: typing.Any, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            profile = CURRENT_PROFILE.get()
+
+            if profile is None:
+                return await original(route, *args, **kwargs)
+
+            timing = RequestTiming(f"{getattr(route, 'method', '?')} {getattr(route, 'path', route)}")
+            token = CURRENT_REQUEST.set(timing)
+
+            try:
+                return await original(route, *args, **kwargs)
+            finally:
+                timing.end = time.perf_counter()
+                CURRENT_REQUEST.reset(token)
+                profile.requests.append(timing)
+
+        return request
+
+    @staticmethod
+    def wrap_acquire(original: typing.Any) -> typing.Any:
+        """
+        Makes a hook for a ratelimit's ``__aenter__``, recording when the current request was allowed through.
+        """
+
+        async def __aenter__(self: typing.Any) -> typing.Any:
+            result = await original(self)
+            timing = CURRENT_REQUEST.get()
+
+            if timing is not None:
+                timing.acquired = time.perf_counter()
+
+            return result
+
+        return __aenter__
+
+    @contextlib.contextmanager
+    def activate(
+        self,
+        http: typing.Any = None,
+        command: typing.Any = None,
+        ratelimit_class: typing.Optional[type] = None,
+        use_cprofile: bool = True
+    ) -> typing.Iterator['InvocationProfile']:
+        """
+        Profiles the code inside of this context manager.
+
+        `http` is the HTTP client whose requests are counted, `command` is the command whose checks and converters are timed,
+        and `ratelimit_class` is the class whose ``__aenter__`` waits for ratelimits. Any of these can be left out.
+        """
+
+        hooks: typing.List[typing.Tuple[typing.Any, str]] = []
+
+        try:
+            if http is not None:
+                install_hook(http, 'request', self.wrap_request)
+                hooks.append((http, 'request'))
+
+            if ratelimit_class is not None:
+                install_hook(ratelimit_class, '__aenter__', self.wrap_acquire)
+                hooks.append((ratelimit_class, '__aenter__'))
+
+            if command is not None:
+                for name, stage in (('can_run', 'checks'), ('transform', 'converters')):
+                    if hasattr(command, name):
+                        install_hook(command, name, self.wrap_stage(stage))
+                        hooks.append((command, name))
+
+            if use_cprofile:
+                self.profile = cProfile.Profile()
+
+                try:
+                    self.profile.enable()
+                except ValueError:
+                    # Only one profiler can be active at a time
+                    self.profile = None
+
+            token = CURRENT_PROFILE.set(self)
+            start = time.perf_counter()
+
+            try:
+                yield self
+            finally:
+                self.duration = time.perf_counter() - start
+                CURRENT_PROFILE.reset(token)
+
+                if self.profile is not None:
+                    self.profile.disable()
+        finally:
+            for target, name in reversed(hooks):
+                uninstall_hook(target, name)
+
+    def summary(self) -> typing.List[str]:
+        """
+        Returns lines summarizing the requests and stages that were recorded.
+        """
+
+        lines = [f"Took {natural_time(self.duration).strip()} in total."]
+
+        if self.requests:
+            lines.append(
+                f"{len(self.requests)} HTTP requests: {natural_time(sum(timing.waiting for timing in self.requests)).strip()} "
+                f"waiting on ratelimits, {natural_time(sum(timing.wire for timing in self.requests)).strip()} on the wire."
+            )
+
+            routes: typing.DefaultDict[str, typing.List[RequestTiming]] = collections.defaultdict(list)
+
+            for timing in self.requests:
+                routes[timing.label].append(timing)
+
+            for label, timings in sorted(routes.items(), key=lambda item: -sum(timing.wire + timing.waiting for timing in item[1])):
+                lines.append(
+                    f"  {len(timings):>3} \N{MULTIPLICATION SIGN} {label}: "
+                    f"{natural_time(sum(timing.waiting for timing in timings)).strip()} waiting, "
+                    f"{natural_time(sum(timing.wire for timing in timings)).strip()} on the wire"
+                )
+        else:
+            lines.append("No HTTP requests were made.")
+
+        for stage in ('checks', 'converters'):
+            if self.stage_counts[stage]:
+                lines.append(f"{stage.capitalize()}: {natural_time(self.stage_times[stage]).strip()} over {self.stage_counts[stage]} calls.")
+
+        return lines
+
+    def stats(self, count: int = 30) -> typing.Optional[str]:
+        """
+        Returns the `count` functions with the most cumulative time from the cProfile, as formatted by pstats.
+        """
+
+        if self.profile is None:
+            return None
+
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).strip_dirs().sort_stats('cumulative').print_stats(count)
+        return stream.getvalue()
+
+    def dump(self) -> typing.Optional[bytes]:
+        """
+        Returns the cProfile in the format written by ``pstats.Stats.dump_stats``, usable with tools like snakeviz.
+        """
+
+        if self.profile is None:
+            return None
+
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats)  # type: ignore
+
+
+CURRENT_TRACER: 'contextvars.ContextVar[typing.Optional[RequestTracer]]' = contextvars.ContextVar('jishaku_request_tracer', default=None)
+
+
+class RequestTrace:
+    """
+    The breakdown of a single request made through an aiohttp session traced by a RequestTracer.
+    """
+
+    def __init__(self, method: str, url: str):
+        self.method = method
+        self.url = url
+        self.start = time.perf_counter()
+        self.end: typing.Optional[float] = None
+        self.dns: typing.Optional[float] = None
+        self.connect: typing.Optional[float] = None
+        self.reused = False
+
+    @property
+    def request(self) -> float:
+        """
+        The time taken by the request itself, excluding setting up a new connection.
+        """
+
+        return (self.end or self.start) - self.start - (self.connect or 0.0)
+
+
+class RequestTracer:
+    """
+    Uses aiohttp trace hooks to split requests into DNS resolution, connection setup (including TLS), and the request itself,
+    and to count how often connections are reused.
+
+    Only requests made from the task that attached the tracer, and tasks it creates, are recorded.
+    """
+
+    def __init__(self):
+        self.traces: typing.List[RequestTrace] = []
+        self.trace_config = aiohttp.TraceConfig()
+
+        self.trace_config.on_request_start.append(self.on_request_start)
+        self.trace_config.on_dns_resolvehost_start.append(self.on_dns_start)
+        self.trace_config.on_dns_resolvehost_end.append(self.on_dns_end)
+        self.trace_config.on_connection_create_start.append(self.on_connect_start)
+        self.trace_config.on_connection_create_end.append(self.on_connect_end)
+        self.trace_config.on_connection_reuseconn.append(self.on_reuse)
+        self.trace_config.on_request_end.append(self.on_request_end)
+        self.trace_config.on_request_exception.append(self.on_request_end)
+        self.trace_config.freeze()
+
+    def current(self, context: typing.Any) -> typing.Optional[RequestTrace]:
+        """
+        Returns the trace for a request, if it is being recorded.
+        """
+
+        if CURRENT_TRACER.get() is not self:
+            return None
+
+        return getattr(context, 'jishaku_trace', None)
+
+    async def on_request_start(self, _: aiohttp.ClientSession, context: typing.Any, params: typing.Any):
+        if CURRENT_TRACER.get() is self:
+            context.jishaku_trace = RequestTrace(params.method, str(params.url))
+
+    async def on_dns_start(self, _: aiohttp.ClientSession, context: typing.Any, __: typing.Any):
+        trace = self.current(context)
+
+        if trace is not None:
+            trace.dns = time.perf_counter()
+
+    async def on_dns_end(self, _: aiohttp.ClientSession, context: typing.Any, __: typing.Any):
+        trace = self.current(context)
+
+        if trace is not None and trace.dns is not None:
+            trace.dns = time.perf_counter() - trace.dns
+
+    async def on_connect_start(self, _: aiohttp.ClientSession, context: typing.Any, __: typing.Any):
+        trace = self.current(context)
+
+        if trace is not None:
+            trace.connect = time.perf_counter()
+
+    async def on_connect_end(self, _: aiohttp.ClientSession, context: typing.Any, __: typing.Any):
+        trace = self.current(context)
+
+        if trace is not None and trace.connect is not None:
+            trace.connect = time.perf_counter() - trace.connect
+
+    async def on_reuse(self, _: aiohttp.ClientSession, context: typing.Any, __: typing.Any):
+        trace = self.current(context)
+
+        if trace is not None:
+            trace.reused = True
+
+    async def on_request_end(self, _: aiohttp.ClientSession, context: typing.Any, __: typing.Any):
+        trace = self.current(context)
+
+        if trace is not None and trace.end is None:
+            trace.end = time.perf_counter()
+            self.traces.append(trace)
+
+    @contextlib.contextmanager
+    def attach(self, session: aiohttp.ClientSession) -> typing.Iterator['RequestTracer']:
+        """
+        Traces requests made through a session from the current task while inside of this context manager.
+        """
+
+        session.trace_configs.append(self.trace_config)
+        token = CURRENT_TRACER.set(self)
+
+        try:
+            yield self
+        finally:
+            CURRENT_TRACER.reset(token)
+            session.trace_configs.remove(self.trace_config)
+
+
+class HeartbeatMonitor:
+    """
+    Keeps a history of gateway heartbeat latency for each shard, by periodically reading the current latencies.
+
+    Latency only changes when a heartbeat is acknowledged, so a reading is only kept when it differs from the last one for its shard.
+    """
+
+    def __init__(
+        self,
+        latencies: typing.Callable[[], typing.Iterable[typing.Tuple[typing.Optional[int], float]]],
+        interval: float = 5.0,
+        window: int = 500
+    ):
+        self.latencies = latencies
+        self.interval = interval
+        self.window = window
+        self.history: typing.Dict[typing.Optional[int], 'collections.deque[typing.Tuple[float, float]]'] = {}
+        self.task: typing.Optional['asyncio.Task[None]'] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Is the monitor currently running?
+        """
+
+        return self.task is not None and not self.task.done()
+
+    def sample(self):
+        """
+        Reads the current latency of every shard, keeping it if it has changed.
+        """
+
+        now = time.time()
+
+        for shard_id, latency in self.latencies():
+            # Infinite or non-positive latencies mean there hasn't been a heartbeat yet
+            if not 0.0 < latency < float('inf'):
+                continue
+
+            history = self.history.setdefault(shard_id, collections.deque(maxlen=self.window))
+
+            if not history or history[-1][1] != latency:
+                history.append((now, latency))
+
+    async def run(self):
+        """
+        The sampling loop. This is run as a task by `start`.
+        """
+
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self, loop: typing.Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Starts the monitor on the given (or running) loop.
+        """
+
+        if self.running:
+            return
+
+        self.task = (loop or asyncio.get_running_loop()).create_task(self.run())
+
+    def stop(self):
+        """
+        Stops the monitor. The history is kept.
+        """
+
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
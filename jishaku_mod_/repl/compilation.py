@@ -13,8 +13,14 @@ Constants, functions and classes related to classifying, compiling and executing
 
 import ast
 import asyncio
+import collections
+import copy
+import functools
 import inspect
 import linecache
+import marshal
+import threading
+import types
 import typing
 
 import import_expression  # type: ignore
@@ -43,6 +49,26 @@ async def _repl_coroutine({0}):
 """
 
 
+@functools.lru_cache(maxsize=32)
+def wrap_template(args: str = '') -> ast.Module:
+    """
+    Parses the CORO_CODE template for a given argument signature.
+
+    The result is cached and shared between calls, so it must never be modified.
+    Use :func:`wrap_code` to produce a module containing user code.
+    """
+
+    mod: ast.Module = import_expression.parse(CORO_CODE.format(args), mode='exec')  # type: ignore
+
+    for node in ast.walk(mod):
+        node.lineno = -100_000
+        node.end_lineno = -100_000
+
+    ast.fix_missing_locations(mod)
+
+    return mod
+
+
 def wrap_code(code: str, args: str = '', auto_return: bool = True) -> ast.Module:
     """
     Compiles Python code into an async function or generator,
@@ -51,23 +77,27 @@ def wrap_code(code: str, args: str = '', auto_return: bool = True) -> ast.Module
     """
 
     user_code: ast.Module = import_expression.parse(code, mode='exec')  # type: ignore
-    mod: ast.Module = import_expression.parse(CORO_CODE.format(args), mode='exec')  # type: ignore
+    template = wrap_template(args)
 
-    for node in ast.walk(mod):
-        node.lineno = -100_000
-        node.end_lineno = -100_000
+    template_definition = template.body[-1]  # async def ...:
+    assert isinstance(template_definition, ast.AsyncFunctionDef)
 
-    definition = mod.body[-1]  # async def ...:
-    assert isinstance(definition, ast.AsyncFunctionDef)
+    template_try_block = template_definition.body[-1]  # try:
+    assert isinstance(template_try_block, ast.Try)
 
-    try_block = definition.body[-1]  # try:
-    assert isinstance(try_block, ast.Try)
+    ast.fix_missing_locations(user_code)
 
-    try_block.body.extend(user_code.body)
+    KeywordTransformer().generic_visit(user_code)
 
-    ast.fix_missing_locations(mod)
+    # The template is shared, so only the nodes on the path to the try body are copied.
+    # Everything else is reused as-is, as compilation doesn't modify the tree.
+    try_block = copy.copy(template_try_block)
+    try_block.body = [*template_try_block.body, *user_code.body]
+
+    definition = copy.copy(template_definition)
+    definition.body = [*template_definition.body[:-1], try_block]
 
-    KeywordTransformer().generic_visit(try_block)
+    mod = ast.Module(body=[*template.body[:-1], definition], type_ignores=[])
 
     # if auto return is disabled, we're done here
     if not auto_return:
@@ -94,6 +124,104 @@ def wrap_code(code: str, args: str = '', auto_return: bool = True) -> ast.Module
     return mod
 
 
+CodeCacheKey = typing.Tuple[str, typing.Tuple[str, ...], bool]
+
+
+class CodeCache:
+    """
+    A least-recently-used cache of compiled REPL code objects.
+
+    Entries are keyed on the source, the argument names of the wrapping function and whether auto return was used,
+    so identical evaluations (such as those from ``jsk repeat``) skip parsing, transformation and compilation entirely.
+
+    The cache evicts the least recently used entries when either ``max_entries`` or ``max_bytes`` is exceeded.
+    The size of an entry is estimated from the marshalled size of its code object.
+    """
+
+    __slots__ = ('max_entries', 'max_bytes', 'hits', 'misses', 'evictions', 'size', '_entries', '_lock')
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.size: int = 0
+        self._entries: 'collections.OrderedDict[CodeCacheKey, typing.Tuple[types.CodeType, int]]' = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CodeCacheKey) -> typing.Optional[types.CodeType]:
+        """
+        Retrieves a code object from the cache, marking it as recently used.
+        Returns None if there is no entry for this key.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: CodeCacheKey, code: types.CodeType):
+        """
+        Stores a code object in the cache, evicting old entries if the cache has grown too large.
+        """
+
+        entry_size = len(marshal.dumps(code))
+
+        # Don't bother storing entries that would immediately evict everything else
+        if entry_size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+
+            if old_entry is not None:
+                self.size -= old_entry[1]
+
+            self._entries[key] = (code, entry_size)
+            self.size += entry_size
+
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all entries from the cache. Statistics are retained.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def compile(self, code: str, arg_names: typing.Sequence[str], auto_return: bool = True) -> types.CodeType:
+        """
+        Returns the compiled code object for this code, wrapping and compiling it only if it is not in the cache.
+        """
+
+        key: CodeCacheKey = (code, tuple(arg_names), auto_return)
+        compiled = self.get(key)
+
+        if compiled is None:
+            compiled = compile(wrap_code(code, args=', '.join(arg_names), auto_return=auto_return), '<repl>', 'exec')
+            self.put(key, compiled)
+
+        return compiled
+
+
+CODE_CACHE = CodeCache()
+
+
 class AsyncCodeExecutor:  # pylint: disable=too-few-public-methods
     """
     Executes/evaluates Python code inside of an async function or generator.
@@ -116,6 +244,9 @@ class AsyncCodeExecutor:  # pylint: disable=too-few-public-methods
 
     __slots__ = ('args', 'arg_names', 'code', 'loop', 'scope', 'source', '_function')
 
+    # Sources at least this many characters long are compiled in an executor by `create`
+    OFFLOAD_THRESHOLD: int = 4096
+
     def __init__(
         self,
         code: str,
@@ -124,6 +255,8 @@ class AsyncCodeExecutor:  # pylint: disable=too-few-public-methods
         convertables: typing.Optional[typing.Dict[str, str]] = None,
         loop: typing.Optional[asyncio.BaseEventLoop] = None,
         auto_return: bool = True,
+        *,
+        code_object: typing.Optional[types.CodeType] = None,
     ):
         self.args = [self]
         self.arg_names = ['_async_executor']
@@ -134,9 +267,27 @@ class AsyncCodeExecutor:  # pylint: disable=too-few-public-methods
                 self.args.append(value)
 
         self.source = code
+        self.code = code_object or self.compile_source(code, self.arg_names, convertables, auto_return)
+
+        self.scope = scope or Scope()
+        self.loop = loop or asyncio.get_event_loop()
+        self._function = None
+
+    @staticmethod
+    def compile_source(
+        code: str,
+        arg_names: typing.Sequence[str],
+        convertables: typing.Optional[typing.Dict[str, str]] = None,
+        auto_return: bool = True,
+    ) -> types.CodeType:
+        """
+        Wraps and compiles source code into a code object, attempting convertables if the code fails to parse.
+
+        This does not touch the event loop, so it is safe to call from another thread.
+        """
 
         try:
-            self.code = wrap_code(code, args=', '.join(self.arg_names), auto_return=auto_return)
+            return CODE_CACHE.compile(code, arg_names, auto_return=auto_return)
         except (SyntaxError, IndentationError) as first_error:
             if not convertables:
                 raise
@@ -144,13 +295,43 @@ class AsyncCodeExecutor:  # pylint: disable=too-few-public-methods
             try:
                 for key, value in convertables.items():
                     code = code.replace(key, value)
-                self.code = wrap_code(code, args=', '.join(self.arg_names))
+                return CODE_CACHE.compile(code, arg_names)
             except (SyntaxError, IndentationError) as second_error:
                 raise second_error from first_error
 
-        self.scope = scope or Scope()
-        self.loop = loop or asyncio.get_event_loop()
-        self._function = None
+    @classmethod
+    async def create(
+        cls,
+        code: str,
+        scope: typing.Optional[Scope] = None,
+        arg_dict: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        convertables: typing.Optional[typing.Dict[str, str]] = None,
+        loop: typing.Optional[asyncio.BaseEventLoop] = None,
+        auto_return: bool = True,
+        offload_threshold: typing.Optional[int] = None,
+    ) -> 'AsyncCodeExecutor':
+        """
+        Creates an executor, compiling the code in an executor if it is large enough to noticeably block the event loop.
+
+        Takes the same arguments as the constructor, plus `offload_threshold`, which defaults to `OFFLOAD_THRESHOLD`.
+
+        .. code:: python3
+
+            executor = await AsyncCodeExecutor.create(very_long_script)
+        """
+
+        if offload_threshold is None:
+            offload_threshold = cls.OFFLOAD_THRESHOLD
+
+        arg_names = ['_async_executor', *(arg_dict or {})]
+        compiled = None
+
+        if len(code) >= offload_threshold:
+            compiled = await (loop or asyncio.get_running_loop()).run_in_executor(
+                None, cls.compile_source, code, arg_names, convertables, auto_return
+            )
+
+        return cls(code, scope, arg_dict=arg_dict, convertables=convertables, loop=loop, auto_return=auto_return, code_object=compiled)
 
     @property
     def function(self) -> typing.Callable[..., typing.Union[
@@ -158,14 +339,14 @@ class AsyncCodeExecutor:  # pylint: disable=too-few-public-methods
         typing.AsyncGenerator[typing.Any, typing.Any]
     ]]:
         """
-        The function object produced from compiling the code.
-        If the code has not been compiled yet, it will be done upon first access.
+        The function object produced from executing the compiled code.
+        If the function has not been created yet, it will be done upon first access.
         """
 
         if self._function is not None:
             return self._function
 
-        exec(compile(self.code, '<repl>', 'exec'), self.scope.globals, self.scope.locals)  # pylint: disable=exec-used
+        exec(self.code, self.scope.globals, self.scope.locals)  # pylint: disable=exec-used
         self._function = self.scope.locals.get('_repl_coroutine') or self.scope.globals['_repl_coroutine']
 
         return self._function
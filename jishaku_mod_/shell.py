@@ -12,6 +12,7 @@ Tools related to interacting directly with the shell.
 """
 
 import asyncio
+import collections
 import os
 import pathlib
 import re
@@ -20,29 +21,73 @@ import sys
 import time
 import typing
 
-from typing_extensions import ParamSpec
+SHELL = os.getenv("SHELL") or "/bin/bash"
+WINDOWS = sys.platform == "win32"
 
-T = typing.TypeVar('T')
-P = ParamSpec('P')
 
+class ShellStream:
+    """
+    Tracks the state of one output stream of a shell process being read by a :class:`ShellReader`.
+    """
 
-SHELL = os.getenv("SHELL") or "/bin/bash"
-WINDOWS = sys.platform == "win32"
+    __slots__ = ('stream', 'prefix', 'buffer', 'paused', 'throttle', 'done')
+
+    def __init__(self, stream: typing.IO[bytes], prefix: bytes = b''):
+        self.stream = stream
+        self.prefix = prefix
+        self.buffer = bytearray()
+        self.paused = False
+        self.throttle: typing.Optional[asyncio.TimerHandle] = None
+        self.done = False
+
+    def feed(self, chunk: bytes) -> typing.List[bytes]:
+        """
+        Feeds a chunk of data read from the stream, returning any lines it completes.
+        An empty chunk indicates EOF, which flushes any incomplete line.
+        """
+
+        if not chunk:
+            self.done = True
+            remainder = bytes(self.buffer)
+            self.buffer.clear()
+            return [self.prefix + remainder] if remainder else []
 
+        self.buffer.extend(chunk)
+        end = self.buffer.rfind(b'\n')
 
-def background_reader(stream: typing.IO[bytes], loop: asyncio.AbstractEventLoop, callback: typing.Callable[[bytes], typing.Any]):
+        if end == -1:
+            return []
+
+        lines = [self.prefix + line for line in self.buffer[:end].split(b'\n')]
+        del self.buffer[:end + 1]
+        return lines
+
+
+def background_reader(stream: ShellStream, loop: asyncio.AbstractEventLoop, callback: typing.Callable[[ShellStream, bytes], typing.Any]):
     """
-    Reads a stream and forwards each line to an async callback.
+    Reads a stream in chunks, forwarding each to an async callback and waiting for it to be accepted.
+
+    This is only used on event loops that do not support :meth:`asyncio.AbstractEventLoop.add_reader`.
     """
 
-    for line in iter(stream.readline, b''):
-        loop.call_soon_threadsafe(loop.create_task, callback(line))
+    read = getattr(stream.stream, 'read1', stream.stream.read)
+
+    while True:
+        chunk = read(ShellReader.CHUNK_SIZE)
+        asyncio.run_coroutine_threadsafe(callback(stream, chunk), loop).result()
+
+        if not chunk:
+            break
 
 
 class ShellReader:
     """
     A class that passively reads from a shell and buffers results for read.
 
+    Output is read in chunks without blocking the event loop and delivered as batches of lines.
+    When the buffer is full, reading is paused until the consumer catches up,
+    and reading is also paused for the rest of a second once `READS_PER_SECOND` reads have been made in it.
+
     Example
     -------
 
@@ -55,6 +100,11 @@ class ShellReader:
                 print(x)
     """
 
+    # The most bytes read from a stream in a single loop callback
+    CHUNK_SIZE: int = 65536
+    # The most loop callbacks that read from this shell's streams in a second, so a chatty process can't monopolize the loop
+    READS_PER_SECOND: int = 100
+
     def __init__(
         self,
         code: str,
@@ -103,94 +153,223 @@ class ShellReader:
         self.loop = loop or asyncio.get_event_loop()
         self.timeout = timeout
 
-        self.stdout_task = self.make_reader_task(self.stdout, self.stdout_handler) if self.process.stdout else None
-        self.stderr_task = self.make_reader_task(self.process.stderr, self.stderr_handler) if self.process.stderr else None
+        self.queue: 'asyncio.Queue[typing.List[str]]' = asyncio.Queue(maxsize=250)
+        self.pending: typing.Deque[str] = collections.deque()
+
+        self.window_start: float = self.loop.time()
+        self.window_reads: int = 0
+
+        self.streams: typing.List[ShellStream] = []
+        self.reader_tasks: typing.List['asyncio.Future[None]'] = []
 
-        self.queue: 'asyncio.Queue[str]' = asyncio.Queue(maxsize=250)
+        if self.stdout:
+            self.attach(ShellStream(self.stdout))
+        if self.process.stderr:
+            self.attach(ShellStream(self.process.stderr, b'[stderr] '))
 
     @property
     def closed(self) -> bool:
         """
-        Are both tasks done, indicating there is no more to read?
+        Have all streams reached EOF, indicating there is no more to read?
         """
 
-        return (not self.stdout_task or self.stdout_task.done()) and (not self.stderr_task or self.stderr_task.done())
+        return all(stream.done for stream in self.streams)
 
-    async def executor_wrapper(self, func: typing.Callable[P, T], *args: P.args, **kwargs: P.kwargs) -> T:
+    def attach(self, stream: ShellStream):
         """
-        Call wrapper for stream reader.
+        Starts reading from a stream.
+
+        Where the loop supports it, the stream is read directly on the loop when it becomes readable.
+        Otherwise, it falls back to reading from a thread.
         """
 
-        return await self.loop.run_in_executor(None, func, *args, **kwargs)
+        self.streams.append(stream)
 
-    def make_reader_task(self, stream: typing.IO[bytes], callback: typing.Callable[[bytes], typing.Any]):
+        try:
+            self.loop.add_reader(stream.stream.fileno(), self.read_ready, stream)
+        except NotImplementedError:
+            self.reader_tasks.append(self.loop.run_in_executor(None, background_reader, stream, self.loop, self.feed_async))
+        else:
+            os.set_blocking(stream.stream.fileno(), False)
+
+    def read_ready(self, stream: ShellStream):
         """
-        Create a reader executor task for a stream.
+        Callback for when a stream has data available to read.
         """
 
-        return self.loop.create_task(self.executor_wrapper(background_reader, stream, self.loop, callback))
+        if self.queue.full():
+            # Apply backpressure by not reading again until the consumer has caught up
+            self.loop.remove_reader(stream.stream.fileno())
+            stream.paused = True
+            return
 
-    ANSI_ESCAPE_CODE = re.compile(r'\x1b\[\??(\d*)(?:([ABCDEFGJKSThilmnsu])|;(\d+)([fH]))')
+        try:
+            chunk = os.read(stream.stream.fileno(), self.CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''
+
+        if not chunk:
+            self.loop.remove_reader(stream.stream.fileno())
+        else:
+            now = self.loop.time()
 
-    def clean_bytes(self, line: bytes) -> str:
+            if now - self.window_start >= 1.0:
+                self.window_start = now
+                self.window_reads = 0
+
+            self.window_reads += 1
+
+            if self.window_reads >= self.READS_PER_SECOND:
+                # Out of reads for this second, so wait until the next one
+                self.loop.remove_reader(stream.stream.fileno())
+                stream.throttle = self.loop.call_later(self.window_start + 1.0 - now, self.unthrottle, stream)
+
+        self.feed(stream, chunk)
+
+    def unthrottle(self, stream: ShellStream):
         """
-        Cleans a byte sequence of shell directives and decodes it.
+        Resumes reading from a stream that ran out of reads, unless it is also paused for backpressure.
         """
 
-        text = line.decode('utf-8').replace('\r', '').strip('\n')
+        stream.throttle = None
 
-        def sub(group: typing.Match[str]):
-            return group.group(0) if group.group(2) == 'm' and not self.escape_ansi else ''
+        if not stream.paused and not stream.done:
+            self.loop.add_reader(stream.stream.fileno(), self.read_ready, stream)
 
-        return self.ANSI_ESCAPE_CODE.sub(sub, text).replace("``", "`\u200b`").strip('\n')
+    def resume(self):
+        """
+        Resumes reading from any streams that were paused for backpressure, unless they are also out of reads.
+        """
+
+        for stream in self.streams:
+            if stream.paused and not stream.done:
+                stream.paused = False
+
+                if stream.throttle is None:
+                    self.loop.add_reader(stream.stream.fileno(), self.read_ready, stream)
 
-    async def stdout_handler(self, line: bytes):
+    def detach(self):
         """
-        Handler for this class for stdout.
+        Stops reading from all streams.
         """
 
-        await self.queue.put(self.clean_bytes(line))
+        for stream in self.streams:
+            if stream.throttle is not None:
+                stream.throttle.cancel()
+                stream.throttle = None
+            elif not stream.done and not stream.paused:
+                try:
+                    self.loop.remove_reader(stream.stream.fileno())
+                except (NotImplementedError, ValueError):
+                    pass
+
+    def feed(self, stream: ShellStream, chunk: bytes):
+        """
+        Splits a chunk from a stream into lines, and places them into the queue as a single batch.
+        """
+
+        lines = [self.clean_bytes(line) for line in stream.feed(chunk)]
+
+        if lines:
+            self.queue.put_nowait(lines)
+        elif self.closed and not self.queue.full():
+            # Wake up the consumer so it notices there is nothing left to read
+            self.queue.put_nowait([])
+
+    async def feed_async(self, stream: ShellStream, chunk: bytes):
+        """
+        Like `feed`, but waits for space in the queue. Used by threaded readers.
+        """
+
+        lines = [self.clean_bytes(line) for line in stream.feed(chunk)]
+        await self.queue.put(lines)
+
+    ANSI_ESCAPE_CODE = re.compile(r'\x1b\[\??(\d*)(?:([ABCDEFGJKSThilmnsu])|;(\d+)([fH]))')
 
-    async def stderr_handler(self, line: bytes):
+    def clean_bytes(self, line: bytes) -> str:
         """
-        Handler for this class for stderr.
+        Cleans a byte sequence of shell directives and decodes it.
         """
 
-        await self.queue.put(self.clean_bytes(b'[stderr] ' + line))
+        text = line.decode('utf-8', errors='replace').replace('\r', '').strip('\n')
+
+        def sub(group: typing.Match[str]):
+            return group.group(0) if group.group(2) == 'm' and not self.escape_ansi else ''
+
+        return self.ANSI_ESCAPE_CODE.sub(sub, text).replace("``", "`\u200b`").strip('\n')
 
     def __enter__(self):
         return self
 
     def __exit__(self, *_):
+        self.detach()
         self.process.kill()
         self.process.terminate()
         self.close_code = self.process.wait(timeout=0.5)
 
-    def __aiter__(self):
-        return self
+    async def next_batch(self) -> typing.List[str]:
+        """
+        Waits for the next batch of lines from the shell.
+
+        Raises StopAsyncIteration when there is no more output,
+        or asyncio.TimeoutError if no output is produced for `timeout` seconds.
+        """
 
-    async def __anext__(self):
         last_output = time.perf_counter()
 
         while not self.closed or not self.queue.empty():
             try:
-                item = await asyncio.wait_for(self.queue.get(), timeout=1)
+                batch = await asyncio.wait_for(self.queue.get(), timeout=1)
             except asyncio.TimeoutError as exception:
                 if time.perf_counter() - last_output >= self.timeout:
                     raise exception
             else:
-                last_output = time.perf_counter()
-                return item
+                self.resume()
+
+                if batch:
+                    return batch
 
         raise StopAsyncIteration()
 
+    async def batches(self) -> typing.AsyncGenerator[typing.List[str], None]:
+        """
+        Iterates over the output of the shell in batches of lines, as they were read.
+
+        This is cheaper than iterating line by line when there is a lot of output.
+        """
+
+        if self.pending:
+            batch = list(self.pending)
+            self.pending.clear()
+            yield batch
+
+        while True:
+            try:
+                batch = await self.next_batch()
+            except StopAsyncIteration:
+                return
+
+            yield batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.pending:
+            self.pending.extend(await self.next_batch())
+
+        return self.pending.popleft()
+
     def __iter__(self):
         return self
 
     def __next__(self):
-        try:
-            item = self.queue.get_nowait()
-        except asyncio.QueueEmpty as exception:
-            raise StopIteration() from exception
+        while not self.pending:
+            try:
+                self.pending.extend(self.queue.get_nowait())
+            except asyncio.QueueEmpty as exception:
+                raise StopIteration() from exception
 
-        return item
+        return self.pending.popleft()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku file mapping test
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import io
+
+import pytest
+
+from jishaku_mod_.files import MappedFile
+from jishaku_mod_.paginators import FilePaginator
+
+
+@pytest.mark.parametrize("trailing_newline", [False, True])
+def test_mapped_file(tmp_path, trailing_newline):
+    lines = [f"line {index}" * (index % 7) for index in range(1, 50_001)]
+    text = '\n'.join(lines) + ('\n' if trailing_newline else '')
+    path = tmp_path / "test.log"
+    path.write_bytes(text.encode('utf-8'))
+
+    split = text.split('\n')
+
+    with open(path, 'rb') as fp, MappedFile(fp) as mapped:
+        mapped.CHUNK_SIZE = 4096
+
+        # Reading an early span only indexes the start of the file
+        assert mapped.read_lines(3, 5) == '\n'.join(split[2:5]).encode('utf-8')
+        assert not mapped.indexed
+
+        for first, last in [(1, 1), (1, 2), (40_000, 40_010), (49_999, len(split)), (len(split), len(split))]:
+            assert mapped.read_lines(first, last) == '\n'.join(split[first - 1:last]).encode('utf-8')
+
+        assert mapped.line_count == len(split)
+        assert mapped.indexed
+
+        for first, last in [(0, 1), (5, 4), (1, len(split) + 1)]:
+            with pytest.raises(ValueError):
+                mapped.read_lines(first, last)
+
+
+def test_mapped_file_unmappable():
+    assert MappedFile.open(io.BytesIO(b"not a real file")) is None
+
+
+def test_file_paginator_mapped(tmp_path):
+    path = tmp_path / "test.py"
+    path.write_bytes("#!/usr/bin/env python\n# -*- coding: cp932 -*-\n".encode('cp932') + "pass  # よろしく\n".encode('cp932') * 1000)
+
+    with open(path, 'rb') as fp:
+        pages = FilePaginator(fp, line_span=(500, 502)).pages
+
+    assert pages == ["```python\n" + "pass  # よろしく\n" * 3 + "```"]
+
+    with open(path, 'rb') as fp:
+        with pytest.raises(ValueError):
+            FilePaginator(fp, line_span=(1000, 1010))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku formatting test
+~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import inspect
+import time
+import typing
+from decimal import Decimal
+
+import pytest
+
+from jishaku_mod_ import formatting
+from jishaku_mod_.formatting import ColumnarTable
+
+
+def test_columnar_table():
+    table = ColumnarTable()
+    table.extend(('id', 'name', 'price'), [(1, 'one', Decimal('1.50')), (20, 'two', None)])
+    table.extend(('id', 'name', 'price'), [(300, 'three\nlines', 12.25)])
+
+    assert len(table) == 3
+
+    text = table.render()
+
+    assert text == inspect.cleandoc("""
+    +-----+--------------+-------+
+    |  id | name         | price |
+    |-----+--------------+-------|
+    |   1 | one          |  1.50 |
+    |  20 | two          |       |
+    | 300 | three\\nlines | 12.25 |
+    +-----+--------------+-------+
+    """)
+
+    assert table.rendered_size() == len(text)
+
+    # Rendering a range of rows without borders gives just those lines
+    assert list(table.render_lines(1, 2, borders=False)) == [text.split('\n')[4]]
+
+    # New and missing columns are padded
+    table.add_records([{'id': 4, 'extra': True}])
+
+    assert table.columns == ['id', 'name', 'price', 'extra']
+    assert table.data[1] == ['one', 'two', 'three\nlines', None]
+    assert table.data[3] == [None, None, None, True]
+
+    # Repeated column names get their own columns
+    table = ColumnarTable()
+    table.extend(('a', 'a'), [(1, 2)])
+
+    assert table.data == [[1], [2]]
+
+
+def test_columnar_table_formats_once(monkeypatch):  # type: ignore
+    calls: typing.List[typing.Any] = []
+
+    def format_table_cell(value: typing.Any) -> str:
+        calls.append(value)
+        return '' if value is None else str(value)
+
+    monkeypatch.setattr(formatting, 'format_table_cell', format_table_cell)
+
+    table = ColumnarTable()
+    table.extend(('id', 'name'), [(1, 'one'), (2, 'two')])
+    table.render()
+
+    assert len(calls) == 4
+
+    # Only rows added since the last render are formatted
+    table.extend(('id', 'name'), [(3, 'three')])
+    text = table.render()
+
+    assert len(calls) == 6
+    assert '| three |' in text
+
+
+@pytest.mark.parametrize("row_count", [10_000, 100_000])
+def test_columnar_table_benchmark(row_count: int):
+    tabulate = pytest.importorskip("tabulate").tabulate
+
+    columns = ('id', 'name', 'score', 'active')
+    rows = [(index, f"user {index}", index / 7, index % 2 == 0) for index in range(row_count)]
+
+    start = time.perf_counter()
+    table = ColumnarTable()
+    table.extend(columns, rows)
+    native_text = table.render()
+    native_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aggregator = {column: list(values) for column, values in zip(columns, zip(*rows))}
+    tabulate_text = tabulate(aggregator, headers='keys', tablefmt='psql')
+    tabulate_time = time.perf_counter() - start
+
+    assert native_text.count('\n') == tabulate_text.count('\n')
+    assert native_time < tabulate_time, f"Native rendering ({native_time:.3f}s) was not faster than tabulate ({tabulate_time:.3f}s)"
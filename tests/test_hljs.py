@@ -11,7 +11,7 @@ jishaku.hljs test
 
 import pytest
 
-from jishaku_mod_.hljs import get_language
+from jishaku_mod_.hljs import LANGUAGES, get_language, guess_file_traits, sniff_language, stream_file_traits
 
 
 @pytest.mark.parametrize(
@@ -26,3 +26,78 @@ from jishaku_mod_.hljs import get_language
 )
 def test_hljs(filename: str, language: str):
     assert get_language(filename) == language
+
+
+def test_hljs_linear():
+    # The trie should agree with trying every language in order
+    def linear_get_language(query: str) -> str:
+        query = query.lower()
+        for language in LANGUAGES:
+            if query.endswith(language):
+                return language
+        return ''
+
+    for language in LANGUAGES:
+        for query in (language, f"file.{language}", f"FILE.{language.upper()}", f"{language}x", f"x{language[1:]}"):
+            assert get_language(query) == linear_get_language(query)
+
+
+@pytest.mark.parametrize(
+    ("data", "language"),
+    [
+        (b'#!/usr/bin/env python\nprint(1)', 'python'),
+        (b'#!/bin/bash\n', 'bash'),
+        (b'# vim: set ft=ruby :\nputs 1', 'ruby'),
+        (b'// -*- mode: javascript; coding: utf-8 -*-\n', 'javascript'),
+        (b'# -*- python -*-\n', 'python'),
+        (b'# -*- coding: utf-8 -*-\n', None),
+        (b'  <?xml version="1.0"?>\n<root/>', 'xml'),
+        (b'<!DOCTYPE html>\n<html></html>', 'html'),
+        (b'hello world', None),
+        # Sniffing only looks at the start of the data
+        (b'\n' * 2048 + b'# vim: ft=ruby', None),
+    ]
+)
+def test_sniff_language(data: bytes, language: str):
+    assert sniff_language(data) == language
+    assert guess_file_traits(data)[2] == language
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize(
+    "data",
+    [
+        b'',
+        b'one\ntwo\n',
+        b'#!/usr/bin/env python\n' + '\u3088\u308d\u3057\u304f\n'.encode('utf-8') * 2000,
+        b'# -*- coding: cp932 -*-\n' + '\u3088\u308d\u3057\u304f\n'.encode('cp932') * 2000,
+    ]
+)
+def test_stream_file_traits(data: bytes, chunk_size: int):
+    content, encoding, language = guess_file_traits(data)
+
+    lines, streamed_encoding, streamed_language = stream_file_traits(
+        data[index:index + chunk_size] for index in range(0, len(data), chunk_size)
+    )
+
+    assert (streamed_encoding, streamed_language) == (encoding, language)
+    assert list(lines) == content.split('\n')
+
+
+def test_stream_file_traits_errors():
+    # Undecodable without a hint
+    with pytest.raises(UnicodeDecodeError):
+        stream_file_traits([b'\x88\x82\xeb'])
+
+    # UTF-8 at the start, falling back to the hint later on
+    data = b'# -*- coding: cp932 -*-\n' + b'\n' * 8192 + '\u3088\u308d\u3057\u304f'.encode('cp932')
+    lines, encoding, _ = stream_file_traits([data[:4096], data[4096:]])
+
+    assert encoding == 'utf-8'
+    assert list(lines) == data.decode('cp932').split('\n')
+
+    # UTF-8 at the start, with no hint to fall back to
+    lines, _, _ = stream_file_traits([b'\n' * 8192, '\u3088'.encode('cp932')])
+
+    with pytest.raises(UnicodeDecodeError):
+        list(lines)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku math test
+~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import pytest
+
+from jishaku_mod_.math import next_batch_size, subtract_overhead
+
+
+@pytest.mark.parametrize(
+    ("batch_size", "batch_time", "expected"),
+    [
+        (1, 0.001, 2),  # too fast, grow
+        (64, 0.01, 128),
+        (8, 0.07, 8),  # within the target range, keep
+        (8, 0.5, 4),  # too slow, shrink
+        (1, 0.5, 1),  # never shrink below a single iteration
+    ]
+)
+def test_next_batch_size(batch_size: int, batch_time: float, expected: int):
+    assert next_batch_size(batch_size, batch_time, 0.05) == expected
+
+
+def test_subtract_overhead():
+    assert subtract_overhead([3.0, 5.0], [1.0, 1.0]) == pytest.approx(3.0)
+    # Overhead larger than the timings doesn't produce a negative estimate
+    assert subtract_overhead([1.0], [2.0, 4.0]) == 0.0
+    # Missing readings on either side are handled
+    assert subtract_overhead([2.0, 4.0], []) == pytest.approx(3.0)
+    assert subtract_overhead([], [1.0]) == 0.0
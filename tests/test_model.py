@@ -9,9 +9,14 @@ jishaku.models tests
 
 """
 
+import copy
+import types
+
 import pytest
 
-from jishaku_mod_.models import copy_context_with
+from discord_mod.ext import commands
+
+from jishaku_mod_.models import clone_context, copy_context_with, reparse_context
 from tests import utils
 
 
@@ -25,3 +30,67 @@ async def test_context_copy():
 
         alt_message._update.assert_called_once()
         assert alt_message._update.call_args[0] == ({"content": 3},)
+
+
+class ReparseBot:
+    get_context = commands.bot.BotBase.get_context
+    strip_after_prefix = True
+
+    def __init__(self):
+        self.all_commands = {'ping': utils.sentinel()}
+
+
+class ReparseContext(types.SimpleNamespace):
+    invoked_with = None
+    command = None
+
+
+@pytest.mark.asyncio
+async def test_context_reparse():
+    bot = ReparseBot()
+    message = types.SimpleNamespace(author=1, channel=2, content='!jsk repeat 3 ping')
+    ctx = ReparseContext(prefix='!', bot=bot, message=message)
+
+    alt_message = types.SimpleNamespace(author=1, channel=2, content='! ping 42')
+    alt_ctx = reparse_context(ctx, alt_message)  # type: ignore
+
+    assert isinstance(alt_ctx, ReparseContext)
+    assert alt_ctx.prefix == '!'
+    assert alt_ctx.message is alt_message
+    assert alt_ctx.invoked_with == 'ping'
+    assert alt_ctx.command is bot.all_commands['ping']
+    assert alt_ctx.view.read_rest().strip() == '42'
+
+    # Changing where or who the message is from, or leaving out the prefix, needs the prefix to be resolved again
+    assert reparse_context(ctx, types.SimpleNamespace(author=5, channel=2, content='!ping')) is None  # type: ignore
+    assert reparse_context(ctx, types.SimpleNamespace(author=1, channel=6, content='!ping')) is None  # type: ignore
+    assert reparse_context(ctx, types.SimpleNamespace(author=1, channel=2, content='?ping')) is None  # type: ignore
+
+    # Bots with their own get_context are always asked
+    class CustomBot(ReparseBot):
+        async def get_context(self, *args, **kwargs):  # type: ignore
+            pass
+
+    ctx.bot = CustomBot()
+    assert reparse_context(ctx, alt_message) is None  # type: ignore
+
+
+def test_context_clone():
+    view = types.SimpleNamespace(buffer="!jsk ping", index=5)
+    ctx = types.SimpleNamespace(view=view, args=[], kwargs={}, invoked_parents=['jsk'], prefix='!')
+
+    clone = clone_context(ctx)
+
+    assert clone is not ctx
+    assert clone.prefix == '!'
+    assert clone.view is not view and clone.view.index == 5
+
+    clone.view.index = 9
+    clone.args.append(ctx)
+    clone.kwargs['key'] = 'value'
+    clone.invoked_parents.append('ping')
+
+    assert view.index == 5
+    assert ctx.args == [] and ctx.kwargs == {} and ctx.invoked_parents == ['jsk']
+
+    assert clone_context(copy.copy(ctx)).view.buffer == view.buffer
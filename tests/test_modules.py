@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku modules test
+~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import importlib
+import inspect
+import sys
+
+import pytest
+
+from jishaku_mod_.modules import ExtensionPreloader, PrecompiledLoader, find_imports
+
+
+def test_find_imports():
+    code = compile(inspect.cleandoc("""
+    import os.path
+    from . import sibling
+    from ..parent import thing
+
+    def setup():
+        import json
+    """), '<test>', 'exec')
+
+    imports = find_imports(code, 'cogs.sub')
+
+    assert {'os.path', 'cogs.sub', 'cogs.sub.sibling', 'cogs.parent', 'cogs.parent.thing', 'json'} <= imports
+    assert 'json' not in find_imports(code, 'cogs.sub', nested=False)
+
+
+@pytest.fixture
+def extension_package(tmp_path, monkeypatch):  # type: ignore
+    package = tmp_path / 'preload_cogs'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'base.py').write_text('VALUE = 1\n')
+    (package / 'uses_base.py').write_text(
+        'from preload_cogs.base import VALUE\nfrom colorsys import rgb_to_hsv\nRESULT = VALUE + 1\n'
+        'def lazy():\n    import wave\n'
+    )
+    (package / 'broken.py').write_text('import preload_missing_module\nimport preload_failing_module\n')
+    (tmp_path / 'preload_failing_module.py').write_text('raise RuntimeError("side effect")\n')
+    (package / 'first.py').write_text('from . import second\n')
+    (package / 'second.py').write_text('from . import first\n')
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'colorsys', raising=False)
+    monkeypatch.delitem(sys.modules, 'wave', raising=False)
+
+    yield 'preload_cogs'
+
+    for name in list(sys.modules):
+        if name.startswith('preload_cogs'):
+            del sys.modules[name]
+
+
+@pytest.mark.asyncio
+async def test_extension_preloader(extension_package: str, caplog):  # type: ignore
+    names = [f'{extension_package}.{name}' for name in ('uses_base', 'base', 'first', 'second', 'missing', 'broken')]
+
+    preloader = ExtensionPreloader(names)
+    await preloader.prepare_all()
+
+    assert preloader.prepared[names[0]].dependencies == (names[1],)
+    assert preloader.prepared[names[4]].code is None
+
+    # Third party dependencies are imported while preparing, but not ones imported lazily inside of functions
+    assert 'colorsys' in sys.modules
+    assert 'wave' not in sys.modules
+
+    # Failures are logged rather than raised
+    assert any('preload_failing_module' in record.getMessage() for record in caplog.records)
+
+    waves = preloader.waves()
+    assert waves[0] == [names[1], names[4], names[5]]
+    assert waves[1] == [names[0]]
+    assert sorted(waves[2]) == sorted(names[2:4])
+
+    with preloader:
+        module = importlib.import_module(names[0])
+
+    assert preloader not in sys.meta_path
+    assert isinstance(module.__spec__.loader, PrecompiledLoader)
+    assert module.RESULT == 2
@@ -10,11 +10,12 @@ jishaku converter test
 """
 
 import inspect
+import time
 from io import BytesIO
 
 import pytest
 
-from jishaku_mod_.paginators import FilePaginator, WrappedPaginator
+from jishaku_mod_.paginators import FilePaginator, PaginatorInterface, WrappedPaginator
 
 
 def test_file_paginator():
@@ -71,4 +72,53 @@ def test_wrapped_paginator():
     paginator.add_line("abcde " * 50)
     assert len(paginator.pages) == 2
 
+
+def wrap_benchmark(size: int) -> float:
+    text = ("abcde " * 20 + "\n") * (size // 121)
+    paginator = WrappedPaginator(prefix='', suffix='', max_size=1985, wrap_on=(' ',))
+
+    start = time.perf_counter()
+    paginator.add_line(text)
+    end = time.perf_counter()
+
+    pages = paginator.pages
+
+    assert all(len(page) <= 1985 for page in pages)
+    # With include_wrapped, wrapping only inserts line separators
+    assert ''.join(page.replace('\n', '') for page in pages) == text.replace('\n', '')
+
+    return end - start
+
+
+def test_wrapped_paginator_benchmark():
+    small = min(wrap_benchmark(1_000_000) for _ in range(3))
+    large = wrap_benchmark(10_000_000)
+
+    # Wrapping should scale linearly, allowing plenty of room for noise
+    assert large < small * 30, f"10 MB took {large:.3f}s, 1 MB took {small:.3f}s"
+
 # TODO: Write test for interactions-based paginator interface
+
+
+@pytest.mark.asyncio
+async def test_paginator_interface_pages():
+    paginator = WrappedPaginator(max_size=200)
+    interface = PaginatorInterface(None, paginator)  # type: ignore
+
+    await interface.add_lines(f"Line {index}" for index in range(100))
+
+    pages = interface.pages
+
+    assert interface.page_count == len(pages) > 1
+    assert [interface.get_page(index) for index in range(interface.page_count)] == pages
+
+    # Interfaces on the last page follow new output
+    assert interface.display_page == interface.page_count - 1
+
+    await interface.add_lines(f"Line {index}" for index in range(100, 200))
+
+    assert interface.display_page == interface.page_count - 1
+    assert interface.get_page(interface.display_page).endswith("Line 199\n```")
+
+    # Without a sent message, there is no ratelimit to inspect
+    assert interface.update_delay() == interface.default_update_delay
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku.profiling test
+~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import asyncio
+import importlib
+import sys
+import threading
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from jishaku_mod_.math import percentile
+from jishaku_mod_.profiling import HeartbeatMonitor, ImportProfiler, InvocationProfile, LoopLagMonitor, RequestTracer, StackSampler
+
+
+def busy_function(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_stack_sampler():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_function, args=(stop,), name="busy-thread")
+    thread.start()
+
+    try:
+        with StackSampler(interval=0.001) as sampler:
+            time.sleep(0.2)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert sampler.sample_count > 0
+    assert any(stack.startswith("busy-thread;") for stack in sampler.stacks)
+    assert any(label.startswith("busy_function ") for label, _, _ in sampler.top(10))
+
+    for line in sampler.collapsed().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert stack
+        assert int(count) > 0
+
+
+def test_stack_sampler_bounded():
+    sampler = StackSampler(max_entries=1)
+
+    for _ in range(5):
+        sampler.sample()
+
+    assert len(sampler.stacks) <= 2
+    assert len(sampler.self_counts) <= 2
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor():
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    monitor.enable_debug(0.02)
+
+    try:
+        await asyncio.sleep(0.05)
+        time.sleep(0.05)  # deliberately block the loop
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    assert not monitor.running
+    assert not monitor.debugging
+    assert monitor.samples
+    assert sum(monitor.histogram) == len(monitor.samples)
+    assert max(monitor.samples) >= 0.04
+    assert monitor.slow_callbacks
+    assert monitor.slow_callbacks[-1].duration >= 0.04
+
+
+def test_percentile():
+    assert percentile([1.0], 0.99) == 1.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 1.0) == 4.0
+
+    with pytest.raises(ValueError):
+        percentile([], 0.5)
+
+
+def test_import_profiler(tmp_path, monkeypatch):  # type: ignore
+    package = tmp_path / 'profiled_package'
+    package.mkdir()
+    (package / '__init__.py').write_text('from profiled_package import slow, fast\n')
+    (package / 'slow.py').write_text('import time\ntime.sleep(0.05)\n')
+    (package / 'fast.py').write_text('VALUE = 1\n')
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    try:
+        with ImportProfiler() as profiler:
+            module = importlib.import_module('profiled_package')
+
+        assert profiler not in sys.meta_path
+        assert module.fast.VALUE == 1
+        assert type(module.__loader__).__name__ != 'TimedLoader'
+
+        root = profiler.roots[0]
+        assert root.name == 'profiled_package'
+        assert [child.name for child in root.children] == ['profiled_package.slow', 'profiled_package.fast']
+        assert root.cumulative >= 0.05
+        assert root.self_time < root.cumulative
+
+        assert profiler.slowest(1) == [root]
+
+        lines = profiler.format()
+        assert lines[1].endswith(' profiled_package')
+        assert lines[2].endswith('   profiled_package.slow')
+    finally:
+        for name in list(sys.modules):
+            if name.startswith('profiled_package'):
+                del sys.modules[name]
+
+
+class FakeRatelimit:
+    async def __aenter__(self):
+        await asyncio.sleep(0.02)
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+
+class FakeHTTP:
+    async def request(self, route: str):
+        async with FakeRatelimit():
+            await asyncio.sleep(0.01)
+        return route
+
+
+class FakeCommand:
+    async def can_run(self, ctx):
+        return True
+
+    async def transform(self, ctx, param):
+        await asyncio.sleep(0.01)
+        return param
+
+
+@pytest.mark.asyncio
+async def test_invocation_profile():
+    http = FakeHTTP()
+    command = FakeCommand()
+    profile = InvocationProfile()
+
+    with profile.activate(http=http, command=command, ratelimit_class=FakeRatelimit):
+        assert await command.can_run(None)
+        assert await command.transform(None, 'argument') == 'argument'
+        assert await http.request('GET /users/@me') == 'GET /users/@me'
+
+        # Requests from other tasks aren't counted
+        await asyncio.get_running_loop().run_in_executor(None, lambda: None)
+
+    other_profile = InvocationProfile()
+    with other_profile.activate(http=http, use_cprofile=False):
+        await asyncio.create_task(http.request('GET /gateway'))
+
+    assert 'request' not in vars(http)
+    assert 'can_run' not in vars(command)
+    assert FakeRatelimit.__aenter__.__name__ == '__aenter__' and FakeRatelimit.__aenter__.__qualname__.startswith('FakeRatelimit')
+
+    assert len(profile.requests) == 1
+    request = profile.requests[0]
+    assert request.waiting >= 0.02
+    assert request.wire >= 0.01
+
+    assert profile.stage_counts == {'checks': 1, 'converters': 1}
+    assert profile.stage_times['converters'] >= 0.01
+
+    summary = '\n'.join(profile.summary())
+    assert '1 HTTP requests' in summary
+    assert 'Converters' in summary
+
+    assert profile.stats() is not None
+    assert profile.dump()
+
+    assert len(other_profile.requests) == 1
+    assert other_profile.stats() is None
+
+
+def test_heartbeat_monitor():
+    readings = [[(0, float('inf')), (1, 0.05)], [(0, 0.04), (1, 0.05)], [(0, 0.06), (1, 0.07)]]
+    monitor = HeartbeatMonitor(lambda: readings.pop(0))
+
+    for _ in range(3):
+        monitor.sample()
+
+    # Missing heartbeats and unchanged latencies are not recorded
+    assert [latency for _, latency in monitor.history[0]] == [0.04, 0.06]
+    assert [latency for _, latency in monitor.history[1]] == [0.05, 0.07]
+
+
+@pytest.mark.asyncio
+async def test_request_tracer(unused_tcp_port: int):
+    async def handler(_: web.Request) -> web.Response:
+        return web.Response(text='ok')
+
+    app = web.Application()
+    app.router.add_get('/', handler)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', unused_tcp_port)
+    await site.start()
+
+    tracer = RequestTracer()
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            url = f'http://127.0.0.1:{unused_tcp_port}/'
+
+            with tracer.attach(session):
+                for _ in range(3):
+                    async with session.get(url) as response:
+                        await response.read()
+
+            # Requests made once detached are not traced
+            async with session.get(url) as response:
+                await response.read()
+    finally:
+        await runner.cleanup()
+
+    assert len(tracer.traces) == 3
+    assert not tracer.traces[0].reused
+    assert tracer.traces[0].connect is not None
+    assert all(trace.reused for trace in tracer.traces[1:])
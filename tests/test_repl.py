@@ -9,13 +9,17 @@ jishaku.repl internal test
 
 """
 
+import ast
 import inspect
 import random
+import timeit
 import typing
 
+import import_expression  # type: ignore
 import pytest
 
-from jishaku_mod_.repl import AsyncCodeExecutor, Scope, get_parent_var, get_var_dict_from_ctx
+from jishaku_mod_.repl import (CORO_CODE, AsyncCodeExecutor, CodeCache, Scope, get_parent_var, get_var_dict_from_ctx, wrap_code,
+                               wrap_template)
 from tests.utils import mock_ctx
 
 
@@ -170,3 +174,110 @@ async def test_var_dict(scope: Scope):
         assert scope.globals['_ctx'] is ctx
         assert scope.globals['_bot'] is ctx.bot
         assert scope.globals['_message'] is ctx.message
+
+
+def test_code_cache():
+    cache = CodeCache(max_entries=2)
+
+    first = cache.compile("3 + 4", ["_async_executor"])
+    assert cache.misses == 1 and cache.hits == 0
+
+    assert cache.compile("3 + 4", ["_async_executor"]) is first
+    assert cache.hits == 1
+
+    # differing argument names or auto return produce separate entries
+    assert cache.compile("3 + 4", ["_async_executor", "_ctx"]) is not first
+    assert cache.compile("3 + 4", ["_async_executor"], auto_return=False) is not first
+    assert len(cache) == 2
+    assert cache.evictions == 1
+
+    # the least recently used entry should have been evicted
+    assert cache.get(("3 + 4", ("_async_executor",), True)) is None
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+    cache = CodeCache(max_bytes=1)
+    cache.compile("3 + 4", ["_async_executor"])
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_executor_cached():
+    code = "yield 1; yield 2"
+
+    first = AsyncCodeExecutor(code)
+    second = AsyncCodeExecutor(code)
+
+    assert first.code is second.code
+
+    return_data: list[int] = []
+    async for result in second:
+        return_data.append(result)
+
+    assert return_data == [1, 2]
+
+
+def reparse_wrap_code(code: str, args: str = '') -> ast.Module:
+    """
+    Reference implementation of wrap_code that reparses the template on every call
+    """
+
+    user_code: ast.Module = import_expression.parse(code, mode='exec')  # type: ignore
+    mod: ast.Module = import_expression.parse(CORO_CODE.format(args), mode='exec')  # type: ignore
+
+    for node in ast.walk(mod):
+        node.lineno = -100_000
+        node.end_lineno = -100_000
+
+    try_block = mod.body[-1].body[-1]  # type: ignore
+    try_block.body.extend(user_code.body)  # type: ignore
+
+    ast.fix_missing_locations(mod)
+
+    return mod
+
+
+def test_wrap_code_template():
+    args = '_async_executor, _ctx'
+
+    first = wrap_code("a = 1", args=args)
+    second = wrap_code("b = 2", args=args)
+
+    # the template should be shared, but the spliced bodies should not
+    assert wrap_template(args) is wrap_template(args)
+    assert first.body[-1] is not second.body[-1]
+    assert first.body[-1].args is second.body[-1].args  # type: ignore
+
+    template_try = wrap_template(args).body[-1].body[-1]  # type: ignore
+    assert len(template_try.body) == 1, "Checking the template was not modified"
+
+    assert ast.dump(wrap_code("a = 1", args=args, auto_return=False)) == ast.dump(reparse_wrap_code("a = 1", args=args))
+
+
+def test_wrap_code_benchmark():
+    code = "x = 1\ny = x + 2"
+    args = '_async_executor, _ctx, _bot, _message'
+
+    wrap_code(code, args=args)
+
+    reparse_time = min(timeit.repeat(lambda: reparse_wrap_code(code, args=args), number=200, repeat=5))
+    template_time = min(timeit.repeat(lambda: wrap_code(code, args=args, auto_return=False), number=200, repeat=5))
+
+    assert template_time < reparse_time, f"Template reuse ({template_time:.4f}s) was not faster than reparsing ({reparse_time:.4f}s)"
+
+
+@pytest.mark.asyncio
+async def test_executor_create():
+    code = "x = 40\nx + 2"
+
+    for threshold in (0, len(code) + 1):
+        return_data: list[int] = []
+        async for result in await AsyncCodeExecutor.create(code, offload_threshold=threshold):
+            return_data.append(result)
+
+        assert return_data == [42]
+
+    with pytest.raises(SyntaxError):
+        await AsyncCodeExecutor.create("1 +", offload_threshold=0)
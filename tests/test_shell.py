@@ -11,6 +11,7 @@ jishaku.shell test
 
 import asyncio
 import sys
+import time
 
 import pytest
 
@@ -33,8 +34,6 @@ async def test_reader_basic():
             async for result in reader:
                 pass
 
-    await asyncio.sleep(0.5)  # Ensure ShellReader.executor_wrapper completes
-
 
 @pytest.mark.skipif(
     sys.platform == "win32",
@@ -62,6 +61,53 @@ async def test_linux():
     assert return_data[1] == "two"
 
 
+@pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="Tests with Linux-only sh syntax"
+)
+@pytest.mark.asyncio
+async def test_linux_batches():
+    line_count = 0
+    batch_count = 0
+
+    with ShellReader("seq 1 100000") as reader:
+        async for batch in reader.batches():
+            line_count += len(batch)
+            batch_count += 1
+
+    assert line_count == 100000
+    assert batch_count < line_count
+
+    return_data: list[str] = []
+
+    # output without a trailing newline should still be delivered
+    with ShellReader("printf 'one\\ntwo'") as reader:
+        async for result in reader:
+            return_data.append(result)
+
+    assert return_data == ["one", "two"]
+
+
+@pytest.mark.skipif(
+    sys.platform == "win32",
+    reason="Tests with Linux-only sh syntax"
+)
+@pytest.mark.asyncio
+async def test_linux_read_budget():
+    line_count = 0
+
+    with ShellReader("seq 1 30000") as reader:
+        # Reading ~170 KB in 64 KiB chunks takes at least 3 reads, so this has to wait for at least one more second
+        reader.READS_PER_SECOND = 2
+        start = time.perf_counter()
+
+        async for batch in reader.batches():
+            line_count += len(batch)
+
+    assert line_count == 30000
+    assert time.perf_counter() - start >= 1.0
+
+
 @pytest.mark.skipif(
     sys.platform != "win32",
     reason="Tests with Windows-only cmd syntax"
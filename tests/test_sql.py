@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku SQL export test
+~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import csv
+import gzip
+import io
+import json
+import types
+import typing
+
+import pytest
+
+from jishaku_mod_.features.sql import DDL_REGEX, KNOWN_EXPORTERS, Adapter, QueryTimer, SchemaCache, SQLFeature, split_statements
+
+COLUMNS = ('id', 'name', 'score')
+ROWS = [(index, f"user {index}", None if index % 3 else index / 4) for index in range(1000)]
+
+
+def export(name: str) -> io.BytesIO:
+    exporter = KNOWN_EXPORTERS[name]()
+
+    for index in range(0, len(ROWS), 300):
+        exporter.write(COLUMNS, ROWS[index:index + 300])
+
+    return exporter.finish()
+
+
+def test_csv_export():
+    with gzip.open(export('csv'), 'rt', encoding='utf-8', newline='') as file:
+        rows = list(csv.reader(file))
+
+    assert rows[0] == list(COLUMNS)
+    assert rows[1:] == [[str(value) if value is not None else '' for value in row] for row in ROWS]
+
+
+def test_jsonl_export():
+    with gzip.open(export('jsonl'), 'rt', encoding='utf-8') as file:
+        rows = [json.loads(line) for line in file]
+
+    assert rows == [dict(zip(COLUMNS, row)) for row in ROWS]
+
+
+@pytest.mark.parametrize("name", ["parquet", "arrow"])
+def test_arrow_export(name: str):
+    pyarrow = pytest.importorskip("pyarrow")
+
+    if name == 'parquet':
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+        table = pyarrow.parquet.read_table(export(name))
+    else:
+        import pyarrow.ipc  # pylint: disable=import-outside-toplevel
+        table = pyarrow.ipc.open_stream(export(name)).read_all()
+
+    assert table.column_names == list(COLUMNS)
+    assert [tuple(row.values()) for row in table.to_pylist()] == ROWS
+
+
+@pytest.mark.parametrize("name", ["parquet", "arrow"])
+def test_arrow_export_null_first_batch(name: str):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc  # pylint: disable=import-outside-toplevel
+    import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+
+    exporter = KNOWN_EXPORTERS[name]()
+    exporter.write(('id', 'note'), [(1, None), (2, None)])
+    exporter.write(('id', 'note'), [(3, 42), (4, None)])
+
+    output = exporter.finish()
+    table = pyarrow.parquet.read_table(output) if name == 'parquet' else pyarrow.ipc.open_stream(output).read_all()
+
+    # The column couldn't be typed from the first batch, so it falls back to strings
+    assert table.column('note').to_pylist() == [None, None, '42', None]
+
+
+def test_gzip_export_size():
+    exporter = KNOWN_EXPORTERS['csv']()
+    exporter.write(COLUMNS, ROWS)
+
+    size = exporter.size()
+    finished = len(exporter.finish().getvalue())
+
+    # Only the end of the stream is written after the rows
+    assert finished - 32 <= size <= finished
+
+
+def test_query_timer():
+    timer = QueryTimer()
+    assert str(timer).startswith("Took ")
+
+    timer.record(0)
+    assert timer.first_row is None
+
+    timer.record(500, 4096)
+    timer.record(250, 2048)
+    timer.stop()
+
+    assert timer.first_row is not None
+    assert timer.start <= timer.first_row <= timer.end  # type: ignore
+    assert timer.rows == 750
+    assert timer.size == 6144
+
+    summary = str(timer)
+    assert "750 rows" in summary
+    assert "rows/s" in summary
+    assert "6.00 KiB" in summary
+
+
+def test_query_timer_size_after_stop():
+    timer = QueryTimer()
+    timer.record(1)
+    timer.stop()
+
+    # Sizing a row after the query has finished must not move its arrival time
+    timer.record(0, 128)
+
+    assert timer.start <= timer.first_row <= timer.end  # type: ignore
+    assert timer.rows == 1
+    assert timer.size == 128
+
+
+def test_schema_cache():
+    connector = object()
+    other = object()
+    summary = {
+        'postgres.public.users': {'id': 'INTEGER NOT NULL'},
+        'postgres.audit.users': {'id': 'INTEGER'},
+        'postgres.public.guilds': {'id': 'BIGINT NOT NULL'},
+    }
+
+    cache = SchemaCache(ttl=60)
+    assert cache.get(connector) is None
+
+    cache.set(connector, summary)
+    assert cache.get(connector) is summary
+    assert cache.get(other) is None
+
+    assert list(SchemaCache.filter(summary, 'users')) == ['postgres.public.users', 'postgres.audit.users']
+    assert list(SchemaCache.filter(summary, 'public.guilds')) == ['postgres.public.guilds']
+    assert SchemaCache.filter(summary, None) is summary
+
+    cache.invalidate(connector)
+    assert cache.get(connector) is None
+
+    expired = SchemaCache(ttl=0)
+    expired.set(connector, summary)
+    assert expired.get(connector) is None
+    assert not expired.entries
+
+
+@pytest.mark.parametrize(
+    ("query", "ddl"),
+    [
+        ("CREATE TABLE users (id INTEGER)", True),
+        ("alter table users add column name text", True),
+        ("INSERT INTO users VALUES (1); DROP TABLE guilds", True),
+        ("UPDATE users SET created = now()", False),
+        ("DELETE FROM users WHERE dropped", False),
+    ]
+)
+def test_ddl_detection(query: str, ddl: bool):
+    assert bool(DDL_REGEX.search(query)) is ddl
+
+
+@pytest.mark.parametrize(
+    ("script", "expected"),
+    [
+        ("SELECT 1; SELECT 2;", ["SELECT 1", "SELECT 2"]),
+        ("SELECT ';' AS a; SELECT \"b;c\" FROM `d;e`", ["SELECT ';' AS a", "SELECT \"b;c\" FROM `d;e`"]),
+        ("SELECT 'it''s; fine'; SELECT 'esc\\'; aped'", ["SELECT 'it''s; fine'", "SELECT 'esc\\'; aped'"]),
+        ("SELECT 1 -- comment; here\n; /* block; comment */ SELECT 2", ["SELECT 1 -- comment; here", "/* block; comment */ SELECT 2"]),
+        ("DO $body$ BEGIN PERFORM 1; END $body$; SELECT $1", ["DO $body$ BEGIN PERFORM 1; END $body$", "SELECT $1"]),
+        ("  ;\n;  ", []),
+    ]
+)
+def test_split_statements(script: str, expected: typing.List[str]):
+    assert split_statements(script) == expected
+
+
+class FetchAdapter(Adapter[typing.List[typing.Dict[str, typing.Any]]]):
+    """
+    An adapter that only implements fetch, so streaming uses the generic fallback.
+    """
+
+    async def fetch(self, query: str) -> typing.List[typing.Dict[str, typing.Any]]:
+        return self.connector
+
+
+RECORDS = [{'id': index, 'name': f"user {index}"} for index in range(1000)]
+
+
+async def collect(adapter: Adapter[typing.Any]):  # type: ignore
+    # jsk_sql_collect only needs the batch size from the feature
+    return await SQLFeature.jsk_sql_collect(types.SimpleNamespace(STREAM_BATCH_SIZE=300), adapter, 'SELECT')  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_stream_fallback():
+    batches = [batch async for batch in FetchAdapter(RECORDS).stream('SELECT', 300)]
+
+    assert [len(rows) for _, rows in batches] == [300, 300, 300, 100]
+    assert all(columns == ('id', 'name') for columns, _ in batches)
+    assert [row for _, rows in batches for row in rows] == [(record['id'], record['name']) for record in RECORDS]
+
+    assert [batch async for batch in FetchAdapter([]).stream('SELECT')] == []
+
+
+@pytest.mark.asyncio
+async def test_collect_limits(monkeypatch):  # type: ignore
+    table, limit, timer = await collect(FetchAdapter(RECORDS))
+    assert limit is None
+    assert len(table) == timer.rows == 1000
+
+    with monkeypatch.context() as patch:
+        patch.setenv('JISHAKU_SQL_ROW_LIMIT', '450')
+        table, limit, timer = await collect(FetchAdapter(RECORDS))
+
+    assert limit == "row"
+    assert len(table) == timer.rows == 450
+
+    with monkeypatch.context() as patch:
+        patch.setenv('JISHAKU_SQL_BYTE_LIMIT', '1')
+        table, limit, timer = await collect(FetchAdapter(RECORDS))
+
+    # The byte limit is checked after each batch
+    assert limit == "size"
+    assert len(table) == timer.rows == 300
+
+
+class FakeAsyncpgConnection:
+    """
+    Just enough of an asyncpg connection to stream from, recording how its transaction ended.
+    """
+
+    def __init__(self, records: typing.List[typing.Dict[str, typing.Any]]):
+        self.records = records
+        self.outcome: typing.Optional[str] = None
+
+    def transaction(self):  # type: ignore
+        connection = self
+
+        class Transaction:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, exc_type, *_):  # type: ignore
+                connection.outcome = 'rollback' if exc_type else 'commit'
+
+        return Transaction()
+
+    async def cursor(self, _: str):  # type: ignore
+        records = iter(self.records)
+
+        class Cursor:
+            async def fetch(self, count: int):  # type: ignore
+                return [record for _, record in zip(range(count), records)]
+
+        return Cursor()
+
+
+@pytest.mark.asyncio
+async def test_asyncpg_stream_commits_when_truncated(monkeypatch):  # type: ignore
+    asyncpg = pytest.importorskip("asyncpg")
+    from jishaku_mod_.features.sql import KNOWN_ADAPTERS  # pylint: disable=import-outside-toplevel
+
+    connection = FakeAsyncpgConnection(RECORDS)
+    adapter = KNOWN_ADAPTERS[asyncpg.Connection](connection)
+
+    with monkeypatch.context() as patch:
+        patch.setenv('JISHAKU_SQL_ROW_LIMIT', '450')
+
+        async with adapter.use():
+            _, limit, _ = await collect(adapter)
+
+    # e.g. INSERT ... RETURNING stopped by the row limit must keep what it inserted
+    assert limit == "row"
+    assert connection.outcome == 'commit'
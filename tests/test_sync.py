@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""
+jishaku sync test
+~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2021 Devon (scarletcafe) R
+:license: MIT, see LICENSE for more details.
+
+"""
+
+import copy
+
+from jishaku_mod_.features.management import diff_command_payloads
+
+
+LOCAL = [
+    {
+        'name': 'ping',
+        'description': 'Pings the bot',
+        'type': 1,
+        'options': [],
+        'nsfw': False,
+        'dm_permission': True,
+        'default_member_permissions': None,
+    },
+    {
+        'name': 'echo',
+        'description': 'Echoes some text',
+        'type': 1,
+        'options': [{'name': 'text', 'description': 'The text', 'type': 3, 'required': True, 'min_length': 0}],
+        'nsfw': False,
+        'dm_permission': True,
+        'default_member_permissions': None,
+    },
+]
+
+
+def remote_version(payload):  # type: ignore
+    # Discord adds metadata and fields left at their defaults, and omits empty ones
+    remote = {key: value for key, value in payload.items() if value not in ([], None)}
+    remote.update(id='1', application_id='2', version='3', integration_types=[0], contexts=None)
+    return remote
+
+
+def test_sync_diff_unchanged():
+    assert not diff_command_payloads(LOCAL, [remote_version(command) for command in reversed(LOCAL)])
+
+
+def test_sync_diff_changes():
+    remote = [remote_version(command) for command in LOCAL]
+    remote[1] = copy.deepcopy(remote[1])
+    remote[1]['options'][0]['required'] = False
+    remote.append(remote_version({'name': 'old', 'description': 'Removed locally', 'type': 1}))
+
+    local = [*LOCAL, {'name': 'new', 'description': 'Added locally', 'type': 1}]
+
+    diff = diff_command_payloads(local, remote)
+
+    assert diff.added == ['new']
+    assert diff.removed == ['old']
+    assert diff.changed == ['echo']